@@ -1,4 +1,4 @@
-from fastapi import Request
+from fastapi import Request, WebSocket
 from fastapi.security.http import HTTPBearer
 
 from app.common.domain.database import SessionLocal
@@ -26,7 +26,35 @@ class BearerAuth(HTTPBearer):
         if scheme.lower() != "bearer":
             raise UnauthorizedRequestException("Invalid authentication scheme")
 
-        if not auth_service.verify_jwt(self.db, token):
+        try:
+            principal = auth_service.get_principal(self.db, token)
+        finally:
+            self.db.close()
+
+        if not principal:
             raise UnauthorizedRequestException("Invalid or expired token")
 
+        request.state.principal = principal
+
         return True
+
+
+def get_websocket_token(websocket: WebSocket) -> str:
+    """Read the bearer token from the handshake headers, or the query string for browser clients"""
+
+    authorization = websocket.headers.get("Authorization", None)
+
+    if not authorization:
+        token = websocket.query_params.get("access_token", None)
+
+        if not token:
+            raise UnauthorizedRequestException("Missing or malformed authorization header")
+
+        return token
+
+    scheme, _, token = authorization.partition(" ")
+
+    if scheme.lower() != "bearer" or not token:
+        raise UnauthorizedRequestException("Invalid authentication scheme")
+
+    return token
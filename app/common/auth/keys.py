@@ -0,0 +1,37 @@
+"""Signing and verification keys for access tokens.
+
+HMAC algorithms sign and verify with SECRET_KEY. Asymmetric algorithms (RS*, PS*, ES*, EdDSA) sign with the PEM private
+key in JWT_PRIVATE_KEY_FILE and verify with the PEM public key in JWT_PUBLIC_KEY_FILE, or the private key's public half,
+so other services can verify tokens with only the public key. Parsed key objects are cached because PyJWT would
+otherwise parse the PEM on every call.
+"""
+from functools import lru_cache
+
+from cryptography.hazmat.primitives import serialization
+
+from app.common.domain.config import JWT_SIGNING_ALGORITHM, JWT_PRIVATE_KEY_FILE, JWT_PUBLIC_KEY_FILE, SECRET_KEY
+
+
+def is_asymmetric(algorithm: str) -> bool:
+    return algorithm.startswith(("RS", "PS", "ES")) or algorithm == "EdDSA"
+
+
+@lru_cache(maxsize=None)
+def get_signing_key():
+    if not is_asymmetric(JWT_SIGNING_ALGORITHM):
+        return SECRET_KEY
+
+    with open(JWT_PRIVATE_KEY_FILE, "rb") as file:
+        return serialization.load_pem_private_key(file.read(), password=None)
+
+
+@lru_cache(maxsize=None)
+def get_verification_key():
+    if not is_asymmetric(JWT_SIGNING_ALGORITHM):
+        return SECRET_KEY
+
+    if not JWT_PUBLIC_KEY_FILE:
+        return get_signing_key().public_key()
+
+    with open(JWT_PUBLIC_KEY_FILE, "rb") as file:
+        return serialization.load_pem_public_key(file.read())
@@ -0,0 +1,19 @@
+from typing import NamedTuple, Optional
+
+
+class Principal(NamedTuple):
+    """The user or client a bearer token was issued to, resolved once per request"""
+
+    id: int
+    username: Optional[str] = None
+    identifier: Optional[str] = None
+    is_admin: bool = False
+    is_staff: bool = False
+
+    @property
+    def is_user(self) -> bool:
+        return self.username is not None
+
+    @property
+    def is_client(self) -> bool:
+        return self.identifier is not None
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, List, Set, Tuple
+
+
+class Subscription:
+    """A subscriber's bounded buffer; once maxsize messages are pending the oldest is dropped, so a slow consumer never
+    blocks publishers"""
+
+    def __init__(self, maxsize: int):
+        self.loop = asyncio.get_running_loop()
+        self.messages: Deque[Any] = deque(maxlen=maxsize)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+        self.closed = False
+
+    def push(self, message: Any) -> None:
+        if len(self.messages) == self.messages.maxlen:
+            self.dropped += 1
+
+        self.messages.append(message)
+        self.ready.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self.ready.set()
+
+    async def receive(self, timeout: float) -> Tuple[List[Any], int]:
+        """Wait up to timeout seconds for messages, returning them with the number dropped since the last call"""
+
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        self.ready.clear()
+
+        messages = list(self.messages)
+        dropped = self.dropped
+        self.messages.clear()
+        self.dropped = 0
+
+        return messages, dropped
+
+
+class BroadcastHub:
+    """In-process fan-out of messages to subscribers of a topic.
+
+    publish may be called from any thread; messages are handed to each subscriber on its own event loop.
+    """
+
+    def __init__(self, subscriber_buffer_size: int):
+        self.subscriber_buffer_size = subscriber_buffer_size
+        self.topics: Dict[Hashable, Set[Subscription]] = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, topic: Hashable) -> Subscription:
+        """Subscribe to a topic; must be called from the event loop the subscription is read on"""
+
+        subscription = Subscription(self.subscriber_buffer_size)
+
+        with self.lock:
+            self.topics.setdefault(topic, set()).add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, topic: Hashable, subscription: Subscription) -> None:
+        with self.lock:
+            subscriptions = self.topics.get(topic)
+
+            if subscriptions is None:
+                return
+
+            subscriptions.discard(subscription)
+
+            if not subscriptions:
+                del self.topics[topic]
+
+    def has_subscribers(self, topic: Hashable) -> bool:
+        with self.lock:
+            return topic in self.topics
+
+    def publish(self, topic: Hashable, message: Any) -> None:
+        for subscription in self.get_subscriptions(topic):
+            call_soon(subscription, subscription.push, message)
+
+    def close(self, topic: Hashable) -> None:
+        """End every subscription to a topic once the messages already published have been delivered"""
+
+        with self.lock:
+            subscriptions = self.topics.pop(topic, set())
+
+        for subscription in subscriptions:
+            call_soon(subscription, subscription.close)
+
+    def close_all(self) -> None:
+        with self.lock:
+            topics = list(self.topics)
+
+        for topic in topics:
+            self.close(topic)
+
+    def get_subscriptions(self, topic: Hashable) -> List[Subscription]:
+        with self.lock:
+            return list(self.topics.get(topic, ()))
+
+
+def call_soon(subscription: Subscription, callback, *args) -> None:
+    try:
+        subscription.loop.call_soon_threadsafe(callback, *args)
+    except RuntimeError:
+        # The subscriber's loop has already closed, so there is nobody left to deliver to
+        pass
@@ -9,3 +9,8 @@ class ExperimentStatus(enum.Enum):
     INITIATED = 1
     RUNNING = 2
     COMPLETED = 3
+
+
+class DownsamplingMethod(str, enum.Enum):
+    LTTB = "lttb"
+    MINMAX = "minmax"
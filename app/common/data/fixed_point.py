@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+import numpy as np
+
+from app.common.exceptions.app_exceptions import BadRequestException
+
+FIXED_POINT_DTYPE = np.dtype("<i8")
+FIXED_POINT_MAX = np.iinfo(FIXED_POINT_DTYPE).max
+
+
+def to_fixed_point(values: np.ndarray, scale: int) -> np.ndarray:
+    """Scale float values to the nearest integer unit, e.g. volts to nanovolts with a scale of 10^9"""
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        scaled = np.rint(np.asarray(values, dtype=np.float64) * scale)
+
+    if not np.isfinite(scaled).all() or (np.abs(scaled) >= FIXED_POINT_MAX).any():
+        raise BadRequestException(f"Values must be finite and within ±{FIXED_POINT_MAX // scale}")
+
+    return scaled.astype(FIXED_POINT_DTYPE)
+
+
+def from_fixed_point(values: np.ndarray, scale: int) -> np.ndarray:
+    return np.asarray(values, dtype=FIXED_POINT_DTYPE) / scale
+
+
+def decimal_to_fixed_point(value: Decimal, scale: int) -> int:
+    scaled = int((value * scale).to_integral_value())
+
+    if abs(scaled) > FIXED_POINT_MAX:
+        raise BadRequestException(f"Values must be within ±{FIXED_POINT_MAX // scale}")
+
+    return scaled
+
+
+def fixed_point_to_float(value: int, scale: int) -> float:
+    return value / scale
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, BigInteger, LargeBinary, String, Integer, DECIMAL
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, BigInteger, LargeBinary, String, Integer, Index, Float
 from sqlalchemy.orm import relationship
 
 from app.common.domain.database import Base
@@ -26,6 +26,7 @@ class User(BaseEntity):
     phone_number = Column(String, unique=True, nullable=True, index=True)
     password_hash = Column(LargeBinary, nullable=False)
     password_salt = Column(LargeBinary, nullable=False)
+    password_hash_parameters = Column(String, nullable=False)  # see app.common.hashing.HashParameters
     is_admin = Column(Boolean, nullable=False, default=False)
     is_staff = Column(Boolean, nullable=False, default=False)
 
@@ -46,26 +47,83 @@ class Client(BaseEntity):
     identifier = Column(String, unique=True, nullable=False, index=True)
     secret_hash = Column(LargeBinary, nullable=False)
     secret_salt = Column(LargeBinary, nullable=False)
+    secret_hash_parameters = Column(String, nullable=False)  # see app.common.hashing.HashParameters
+
+
+class RefreshToken(BaseEntity):
+    __tablename__ = "refresh_tokens"
+
+    token_hash = Column(String, unique=True, nullable=False, index=True)  # SHA-256 of the opaque token
+    expires_on = Column(DateTime, nullable=False)
+    used_on = Column(DateTime, nullable=True)  # set when rotated; presenting it again revokes the client's tokens
+    client_id = Column(Integer, ForeignKey("clients.id"), nullable=False, index=True)
+    client = relationship("Client")
+
+
+class RevokedToken(BaseEntity):
+    __tablename__ = "revoked_tokens"
+
+    token_id = Column(String, unique=True, nullable=False, index=True)  # jti claim, or SHA-256 of tokens without one
+    expires_on = Column(DateTime, nullable=False, index=True)
 
 
 class Experiment(BaseEntity):
     __tablename__ = "experiments"
 
     experiment_status = Column(String, nullable=False)
-    start_voltage = Column(DECIMAL(9, 7), nullable=False)
-    end_voltage = Column(DECIMAL(9, 7), nullable=False)
-    voltage_step = Column(DECIMAL(9, 7), nullable=False)
+    start_voltage = Column(BigInteger, nullable=False)  # nanovolts
+    end_voltage = Column(BigInteger, nullable=False)  # nanovolts
+    voltage_step = Column(BigInteger, nullable=False)  # nanovolts
     user_id = Column(Integer, ForeignKey("users.id"))
     user = relationship("User")
     client_id = Column(Integer, ForeignKey("clients.id"))
     client = relationship("Client")
+    stats = relationship("ExperimentStats", uselist=False, cascade="all, delete-orphan")
+    archived_on = Column(DateTime, nullable=True)  # set once the points have moved to an archive file
+
+
+class ExperimentStats(BaseEntity):
+    __tablename__ = "experiment_stats"
+
+    point_count = Column(BigInteger, default=0, nullable=False)
+    first_timestamp = Column(BigInteger, nullable=True)
+    last_timestamp = Column(BigInteger, nullable=True)
+    min_voltage = Column(BigInteger, nullable=True)  # nanovolts
+    max_voltage = Column(BigInteger, nullable=True)  # nanovolts
+    mean_voltage = Column(Float, default=0.0, nullable=False)  # volts
+    m2_voltage = Column(Float, default=0.0, nullable=False)  # sum of squared deviations, volts squared
+    min_current = Column(BigInteger, nullable=True)  # picoamps
+    max_current = Column(BigInteger, nullable=True)  # picoamps
+    mean_current = Column(Float, default=0.0, nullable=False)  # amps
+    m2_current = Column(Float, default=0.0, nullable=False)  # sum of squared deviations, amps squared
+    experiment_id = Column(Integer, ForeignKey("experiments.id"), unique=True, nullable=False)
 
 
 class Measurement(BaseEntity):
     __tablename__ = "measurements"
+    __table_args__ = (
+        Index("ix_measurements_experiment_id_timestamp", "experiment_id", "timestamp", unique=True),
+        {"postgresql_partition_by": "LIST (experiment_id)"}
+    )
 
     timestamp = Column(BigInteger, nullable=False)
-    voltage = Column(DECIMAL(9, 7), nullable=False)
-    current = Column(DECIMAL(9, 7), nullable=False)
-    experiment_id = Column(Integer, ForeignKey("experiments.id"))
+    voltage = Column(BigInteger, nullable=False)  # nanovolts
+    current = Column(BigInteger, nullable=False)  # picoamps
+    experiment_id = Column(Integer, ForeignKey("experiments.id"), nullable=False)  # partition key on PostgreSQL
+    experiment = relationship("Experiment")
+
+
+class MeasurementChunk(BaseEntity):
+    __tablename__ = "measurement_chunks"
+    __table_args__ = (
+        Index("ix_measurement_chunks_experiment_id_first_timestamp", "experiment_id", "first_timestamp"),
+    )
+
+    first_timestamp = Column(BigInteger, nullable=False)
+    last_timestamp = Column(BigInteger, nullable=False)
+    point_count = Column(Integer, nullable=False)
+    timestamps = Column(LargeBinary, nullable=False)
+    voltages = Column(LargeBinary, nullable=False)
+    currents = Column(LargeBinary, nullable=False)
+    experiment_id = Column(Integer, ForeignKey("experiments.id"), nullable=False)
     experiment = relationship("Experiment")
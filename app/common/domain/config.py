@@ -11,6 +11,9 @@ ABLY_API_KEY = os.environ.get("ABLY_API_KEY")
 SQLALCHEMY_DATABASE_URL = os.environ.get("SQLALCHEMY_DATABASE_URL")
 SECRET_KEY = os.environ.get("SECRET_KEY")
 JWT_SIGNING_ALGORITHM = os.environ.get("JWT_SIGNING_ALGORITHM")
+JWT_PRIVATE_KEY_FILE = os.environ.get("JWT_PRIVATE_KEY_FILE")
+JWT_PUBLIC_KEY_FILE = os.environ.get("JWT_PUBLIC_KEY_FILE")
+JWT_STATELESS_ENABLED = os.environ.get("JWT_STATELESS_ENABLED", "0") == "1"
 ACCESS_TOKEN_EXPIRE_IN_SECONDS = int(os.environ.get("ACCESS_TOKEN_EXPIRE_IN_SECONDS"))
 LOG_LEVEL_CONFIG = os.environ.get("LOG_LEVEL_CONFIG", "DEBUG")
 JSON_LOGS_CONFIG = os.environ.get("JSON_LOGS_CONFIG", "0")
@@ -20,6 +23,46 @@ ADMIN_LAST_NAME = os.environ.get("ADMIN_LAST_NAME")
 ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD")
 USER_TOKEN_RESET_PASSWORD_EXPIRE_MINUTES = int(os.environ.get("USER_TOKEN_RESET_PASSWORD_EXPIRE_MINUTES"))
 USER_TOKEN_RESET_PASSWORD_LENGTH = int(os.environ.get("USER_TOKEN_RESET_PASSWORD_LENGTH"))
+MEASUREMENT_BATCH_MAX_SIZE = int(os.environ.get("MEASUREMENT_BATCH_MAX_SIZE", "10000"))
+MEASUREMENT_STREAM_BATCH_SIZE = int(os.environ.get("MEASUREMENT_STREAM_BATCH_SIZE", "500"))
+MEASUREMENT_STREAM_FLUSH_INTERVAL_IN_SECONDS = float(os.environ.get("MEASUREMENT_STREAM_FLUSH_INTERVAL_IN_SECONDS", "1"))
+MEASUREMENT_STREAM_CLOSE_TIMEOUT_IN_SECONDS = float(os.environ.get("MEASUREMENT_STREAM_CLOSE_TIMEOUT_IN_SECONDS", "10"))
+MEASUREMENT_WRITE_BEHIND_ENABLED = os.environ.get("MEASUREMENT_WRITE_BEHIND_ENABLED", "0") == "1"
+MEASUREMENT_WRITE_BEHIND_BATCH_SIZE = int(os.environ.get("MEASUREMENT_WRITE_BEHIND_BATCH_SIZE", "500"))
+MEASUREMENT_WRITE_BEHIND_FLUSH_INTERVAL_IN_SECONDS = float(os.environ.get("MEASUREMENT_WRITE_BEHIND_FLUSH_INTERVAL_IN_SECONDS", "1"))
+MEASUREMENT_WRITE_BEHIND_MAX_ATTEMPTS = int(os.environ.get("MEASUREMENT_WRITE_BEHIND_MAX_ATTEMPTS", "5"))
+MEASUREMENT_WRITE_BEHIND_RETRY_DELAY_IN_SECONDS = float(os.environ.get("MEASUREMENT_WRITE_BEHIND_RETRY_DELAY_IN_SECONDS", "0.5"))
+MEASUREMENT_STORAGE = os.environ.get("MEASUREMENT_STORAGE", "chunks")
+MEASUREMENT_CHUNK_MAX_POINTS = int(os.environ.get("MEASUREMENT_CHUNK_MAX_POINTS", "4096"))
+MEASUREMENT_IMPORT_CHUNK_SIZE = int(os.environ.get("MEASUREMENT_IMPORT_CHUNK_SIZE", "10000"))
+MEASUREMENT_PAGE_DEFAULT_SIZE = int(os.environ.get("MEASUREMENT_PAGE_DEFAULT_SIZE", "10000"))
+MEASUREMENT_PAGE_MAX_SIZE = int(os.environ.get("MEASUREMENT_PAGE_MAX_SIZE", "100000"))
+MEASUREMENT_EXPORT_BATCH_SIZE = int(os.environ.get("MEASUREMENT_EXPORT_BATCH_SIZE", "5000"))
+MEASUREMENT_DOWNSAMPLE_MAX_POINTS = int(os.environ.get("MEASUREMENT_DOWNSAMPLE_MAX_POINTS", "10000"))
+MEASUREMENT_DOWNSAMPLE_CACHE_SIZE = int(os.environ.get("MEASUREMENT_DOWNSAMPLE_CACHE_SIZE", "128"))
+MEASUREMENT_ANALYSIS_WORKERS = int(os.environ.get("MEASUREMENT_ANALYSIS_WORKERS", "2"))
+MEASUREMENT_ANALYSIS_CACHE_SIZE = int(os.environ.get("MEASUREMENT_ANALYSIS_CACHE_SIZE", "128"))
+MEASUREMENT_TIMESTAMPS_PER_SECOND = float(os.environ.get("MEASUREMENT_TIMESTAMPS_PER_SECOND", "1000"))
+MEASUREMENT_RESAMPLE_MAX_POINTS = int(os.environ.get("MEASUREMENT_RESAMPLE_MAX_POINTS", "100000"))
+MEASUREMENT_ARCHIVE_DIRECTORY = os.environ.get("MEASUREMENT_ARCHIVE_DIRECTORY")
+MEASUREMENT_ARCHIVE_AFTER_DAYS = int(os.environ.get("MEASUREMENT_ARCHIVE_AFTER_DAYS", "90"))
+MEASUREMENT_PARTITION_LOCK_TIMEOUT_IN_MILLISECONDS = int(os.environ.get("MEASUREMENT_PARTITION_LOCK_TIMEOUT_IN_MILLISECONDS", "2000"))
+EXPERIMENT_OVERLAY_MAX_EXPERIMENTS = int(os.environ.get("EXPERIMENT_OVERLAY_MAX_EXPERIMENTS", "50"))
+MEASUREMENT_RESAMPLE_CACHE_SIZE = int(os.environ.get("MEASUREMENT_RESAMPLE_CACHE_SIZE", "128"))
+EXPERIMENT_STREAM_BUFFER_SIZE = int(os.environ.get("EXPERIMENT_STREAM_BUFFER_SIZE", "1000"))
+EXPERIMENT_STREAM_HEARTBEAT_INTERVAL_IN_SECONDS = float(os.environ.get("EXPERIMENT_STREAM_HEARTBEAT_INTERVAL_IN_SECONDS", "15"))
+RESPONSE_CACHE_DIRECTORY = os.environ.get("RESPONSE_CACHE_DIRECTORY", "response_cache")
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+PRINCIPAL_CACHE_SIZE = int(os.environ.get("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_IN_SECONDS = float(os.environ.get("PRINCIPAL_CACHE_TTL_IN_SECONDS", "60"))
+REVOKED_TOKENS_RELOAD_INTERVAL_IN_SECONDS = float(os.environ.get("REVOKED_TOKENS_RELOAD_INTERVAL_IN_SECONDS", "30"))
+PASSWORD_HASH_DIGEST = os.environ.get("PASSWORD_HASH_DIGEST", "sha256")
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("PASSWORD_HASH_ITERATIONS", "100000"))
+PASSWORD_HASH_LENGTH = int(os.environ.get("PASSWORD_HASH_LENGTH", "128"))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get("PASSWORD_HASH_QUEUE_LIMIT", "32"))
+REFRESH_TOKEN_EXPIRE_IN_SECONDS = int(os.environ.get("REFRESH_TOKEN_EXPIRE_IN_SECONDS", str(30 * 24 * 60 * 60)))
+REFRESH_TOKEN_LENGTH = int(os.environ.get("REFRESH_TOKEN_LENGTH", "32"))
 
 if ENVIRONMENT == "TEST":
     SQLALCHEMY_DATABASE_URL = TEST_DATABASE_URL
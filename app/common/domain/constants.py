@@ -13,5 +13,21 @@ USER_TOKENS_URL = "/api/v1/user-tokens"
 
 FORGOT_PASSWORD_TEMPLATE = ""
 
+MEASUREMENT_INSERT_CHUNK_SIZE = 1000
+MEASUREMENT_STORAGE_CHUNKS = "chunks"
+MEASUREMENT_STORAGE_ROWS = "rows"
+
+VOLTAGE_SCALE = 1_000_000_000  # stored in nanovolts
+CURRENT_SCALE = 1_000_000_000_000  # stored in picoamps
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+PACKED_MEASUREMENTS_MEDIA_TYPE = "application/vnd.potentiostat.measurements"
+CSV_MEDIA_TYPE = "text/csv"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 TEST_DATABASE_FILE = "./test.db"
 TEST_DATABASE_URL = f"sqlite:///{TEST_DATABASE_FILE}"
@@ -0,0 +1,39 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+from starlette import status
+
+
+def build_etag(*parts) -> str:
+    """Build a strong ETag from the values a representation is derived from, without serialising it"""
+
+    return '"' + hashlib.sha256(repr(parts).encode()).hexdigest()[:32] + '"'
+
+
+def matches_if_none_match(request: Request, etag: str) -> bool:
+    """Whether the If-None-Match header lists etag or *; weak validators are compared on their opaque tag"""
+
+    header = request.headers.get("if-none-match")
+
+    if not header:
+        return False
+
+    tags = [tag.strip() for tag in header.split(",")]
+
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+def check_not_modified(request: Request, response: Response, etag: str, headers: Optional[dict] = None) -> Optional[Response]:
+    """Set the ETag on response, returning a 304 response to send instead when the client already holds it"""
+
+    response.headers["ETag"] = etag
+
+    if matches_if_none_match(request, etag):
+        return not_modified_response(etag, headers)
+
+    return None
+
+
+def not_modified_response(etag: str, headers: Optional[dict] = None) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, **(headers or {})})
@@ -62,6 +62,21 @@ class UpstreamServerException(AppDomainException):
         super().__init__(status_code, code, message)
 
 
+class ServiceUnavailableException(AppDomainException):
+    def __init__(self, message: str):
+        status_code = 503
+        code = "ServiceUnavailable"
+        super().__init__(status_code, code, message)
+
+
+class UnsupportedMediaTypeException(AppDomainException):
+    def __init__(self, media_type: str):
+        status_code = 415
+        code = "UnsupportedMediaType"
+        message = f"Content type \"{media_type}\" is not supported by this endpoint"
+        super().__init__(status_code, code, message)
+
+
 class UnauthorizedRequestException(AppDomainException):
     def __init__(self, message: str):
         status_code = 401
@@ -0,0 +1,108 @@
+"""PBKDF2 hashing of user passwords and client secrets.
+
+Each credential stores the parameters it was hashed with, encoded as "pbkdf2_<digest>$<iterations>$<length>", so the
+configured parameters can change without invalidating existing credentials; logins rehash credentials whose
+parameters are out of date. The async functions run the hashing on a bounded thread pool, where hashlib releases the
+GIL, so a burst of logins cannot block the event loop; once the pool and its queue are full they raise
+ServiceUnavailableException instead of queueing without bound.
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, NamedTuple, Optional, TypeVar
+
+from app.common.domain.config import PASSWORD_HASH_DIGEST, PASSWORD_HASH_ITERATIONS, PASSWORD_HASH_LENGTH, \
+    PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_LIMIT
+from app.common.exceptions.app_exceptions import ServiceUnavailableException
+
+T = TypeVar("T")
+
+SALT_LENGTH = 32
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending = 0
+
+
+class HashParameters(NamedTuple):
+    digest: str
+    iterations: int
+    length: int
+
+    def encode(self) -> str:
+        return f"pbkdf2_{self.digest}${self.iterations}${self.length}"
+
+    @classmethod
+    def decode(cls, value: str) -> "HashParameters":
+        algorithm, iterations, length = value.split("$")
+        return cls(algorithm[len("pbkdf2_"):], int(iterations), int(length))
+
+
+class Credential(NamedTuple):
+    hash: bytes
+    salt: bytes
+    parameters: str
+
+
+CURRENT_PARAMETERS = HashParameters(PASSWORD_HASH_DIGEST, PASSWORD_HASH_ITERATIONS, PASSWORD_HASH_LENGTH)
+
+
+def derive_key(secret: str, salt: bytes, parameters: HashParameters) -> bytes:
+    return hashlib.pbkdf2_hmac(parameters.digest, secret.encode("utf-8"), salt, parameters.iterations,
+                               dklen=parameters.length)
+
+
+def create_credential(secret: str) -> Credential:
+    """Hash a secret with a new salt and the configured parameters, on the calling thread"""
+
+    salt = os.urandom(SALT_LENGTH)
+    return Credential(derive_key(secret, salt, CURRENT_PARAMETERS), salt, CURRENT_PARAMETERS.encode())
+
+
+def verify_credential(secret: str, credential: Credential) -> bool:
+    key = derive_key(secret, credential.salt, HashParameters.decode(credential.parameters))
+    return hmac.compare_digest(key, credential.hash)
+
+
+def needs_rehash(credential: Credential) -> bool:
+    return credential.parameters != CURRENT_PARAMETERS.encode()
+
+
+async def hash_secret(secret: str) -> Credential:
+    return await run_in_pool(create_credential, secret)
+
+
+async def verify_secret(secret: str, credential: Credential) -> bool:
+    return await run_in_pool(verify_credential, secret, credential)
+
+
+async def run_in_pool(function: Callable[..., T], *args) -> T:
+    global _pending
+
+    if _pending >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT:
+        raise ServiceUnavailableException("Too many concurrent sign-ins, please retry shortly")
+
+    _pending += 1
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_executor(), function, *args)
+    finally:
+        _pending -= 1
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hashing")
+
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
@@ -1,8 +1,12 @@
+import base64
+import binascii
+import json
 import math
 from typing import List, Optional
 
 from pydantic import BaseModel
 
+from app.common.exceptions.app_exceptions import BadRequestException
 from app.common.generics import T
 
 
@@ -56,3 +60,21 @@ def paginate(query, page, size):
 
     total = query.order_by(None).count()
     return Page(content, page, size, total)
+
+
+def encode_cursor(*values) -> str:
+    """Encode keyset values as an opaque, URL-safe cursor"""
+
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise BadRequestException("Invalid cursor")
+
+    if not isinstance(values, list):
+        raise BadRequestException("Invalid cursor")
+
+    return values
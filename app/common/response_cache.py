@@ -0,0 +1,205 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+BODY_SUFFIX = ".gz"
+METADATA_SUFFIX = ".json"
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    content_hash: str
+    media_type: str
+    headers: Dict[str, str]
+    compressed: bool
+
+
+class DiskResponseCache:
+    """Thread-safe cache of serialised response bodies stored gzip-compressed on local disk.
+
+    Each entry is a gzip file plus a JSON sidecar holding the sha256 of the uncompressed body, its media type and any
+    headers to replay. The least recently read entries are deleted once the files exceed max_bytes; recency survives
+    restarts through the file modification times.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.loaded = False
+
+    def get(self, key: Hashable, gzip_accepted: bool) -> Optional[CachedResponse]:
+        name = get_entry_name(key)
+
+        with self.lock:
+            self.load()
+
+            if name not in self.entries:
+                return None
+
+            self.entries.move_to_end(name)
+
+        try:
+            metadata = self.read_metadata(name)
+
+            with open(self.get_path(name, BODY_SUFFIX), "rb") as file:
+                body = file.read()
+
+            os.utime(self.get_path(name, BODY_SUFFIX))
+        except (OSError, ValueError):
+            self.invalidate(key)
+            return None
+
+        return build_cached_response(body, metadata, gzip_accepted)
+
+    def get_or_render(self, key: Hashable, gzip_accepted: bool,
+                      render: Callable[[], Tuple[bytes, str, Dict[str, str]]]) -> CachedResponse:
+        """Serve key from disk, rendering and storing it on a miss; render returns (body, media_type, headers)"""
+
+        cached = self.get(key, gzip_accepted)
+
+        if cached is not None:
+            return cached
+
+        body, media_type, headers = render()
+        compressed = gzip.compress(body)
+        metadata = {"content_hash": hash_content(body), "media_type": media_type, "headers": headers}
+
+        if self.max_bytes > 0:
+            try:
+                self.put(key, compressed, metadata)
+            except OSError as ex:
+                logger.warning(f"Failed to write cached response to {self.directory}: {ex}")
+
+        if gzip_accepted:
+            return build_cached_response(compressed, metadata, True)
+
+        return CachedResponse(body, metadata["content_hash"], media_type, headers, False)
+
+    def put(self, key: Hashable, compressed: bytes, metadata: dict) -> None:
+        name = get_entry_name(key)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.write_atomically(self.get_path(name, METADATA_SUFFIX), json.dumps(metadata).encode())
+        self.write_atomically(self.get_path(name, BODY_SUFFIX), compressed)
+
+        with self.lock:
+            self.load()
+
+            self.total_bytes += len(compressed) - self.entries.get(name, 0)
+            self.entries[name] = len(compressed)
+            self.entries.move_to_end(name)
+
+            while self.total_bytes > self.max_bytes and self.entries:
+                evicted, size = self.entries.popitem(last=False)
+                self.total_bytes -= size
+                self.remove_files(evicted)
+
+    def invalidate(self, key: Hashable) -> None:
+        name = get_entry_name(key)
+
+        with self.lock:
+            self.load()
+            self.total_bytes -= self.entries.pop(name, 0)
+            self.remove_files(name)
+
+    def load(self) -> None:
+        """Index entries already on disk, oldest first; must be called with the lock held"""
+
+        if self.loaded:
+            return
+
+        self.loaded = True
+
+        if not os.path.isdir(self.directory):
+            return
+
+        entries = []
+
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(BODY_SUFFIX):
+                continue
+
+            stat = os.stat(os.path.join(self.directory, file_name))
+            entries.append((stat.st_mtime, file_name[:-len(BODY_SUFFIX)], stat.st_size))
+
+        for _, name, size in sorted(entries):
+            self.entries[name] = size
+            self.total_bytes += size
+
+    def read_metadata(self, name: str) -> dict:
+        with open(self.get_path(name, METADATA_SUFFIX), "rb") as file:
+            return json.loads(file.read())
+
+    def write_atomically(self, path: str, content: bytes) -> None:
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(content)
+
+            os.replace(temporary_path, path)
+        except OSError:
+            os.unlink(temporary_path)
+            raise
+
+    def remove_files(self, name: str) -> None:
+        for suffix in (BODY_SUFFIX, METADATA_SUFFIX):
+            try:
+                os.unlink(self.get_path(name, suffix))
+            except FileNotFoundError:
+                pass
+
+    def get_path(self, name: str, suffix: str) -> str:
+        return os.path.join(self.directory, name + suffix)
+
+
+def build_cached_response(compressed: bytes, metadata: dict, gzip_accepted: bool) -> CachedResponse:
+    return CachedResponse(
+        body=compressed if gzip_accepted else gzip.decompress(compressed),
+        content_hash=metadata["content_hash"],
+        media_type=metadata["media_type"],
+        headers=metadata["headers"],
+        compressed=gzip_accepted
+    )
+
+
+def get_entry_name(key: Hashable) -> str:
+    return hashlib.sha256(repr(key).encode()).hexdigest()
+
+
+def hash_content(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip, honouring q=0 exclusions"""
+
+    accepted = {}
+
+    for item in accept_encoding.split(","):
+        coding, *parameters = [part.strip() for part in item.split(";")]
+        quality = 1.0
+
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        if coding:
+            accepted[coding.lower()] = quality
+
+    return accepted.get("gzip", accepted.get("*", 0.0)) > 0
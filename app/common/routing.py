@@ -0,0 +1,44 @@
+from typing import Callable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+FORM_MEDIA_TYPES = ("application/x-www-form-urlencoded", "multipart/form-data")
+
+
+def get_media_type(content_type: str) -> str:
+    return content_type.split(";")[0].strip().lower()
+
+
+def is_binary_media_type(media_type: str) -> bool:
+    if not media_type or media_type in FORM_MEDIA_TYPES:
+        return False
+
+    return media_type != "application/json" and not media_type.endswith("+json")
+
+
+class BinaryBodyRequest(Request):
+    """Request that hides non-JSON bodies from FastAPI's body parsing.
+
+    The raw bytes are kept on ``request.state.binary_body`` and an empty body is reported instead, so an optional
+    JSON body parameter resolves to None and the endpoint decodes the payload itself.
+    """
+
+    async def body(self) -> bytes:
+        body = await super().body()
+
+        if not is_binary_media_type(get_media_type(self.headers.get("content-type", ""))):
+            return body
+
+        self.state.binary_body = body
+        return b""
+
+
+class BinaryBodyRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def binary_body_route_handler(request: Request) -> Response:
+            return await original_route_handler(BinaryBodyRequest(request.scope, request.receive))
+
+        return binary_body_route_handler
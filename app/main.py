@@ -5,16 +5,20 @@ from fastapi.responses import RedirectResponse
 from logging.config import fileConfig as configure_logging
 from loguru import logger
 
+from app.common import hashing
 from app.common.config.loguru_logging_intercept import setup_loguru_logging_intercept
 from app.common.data.migrations_manager import migrate_database
 from app.common.domain.config import ENVIRONMENT, SQLALCHEMY_DATABASE_URL
-from app.common.domain.constants import ALEMBIC_INI_DIR, LOGGING_CONFIG_DIR, DOCS_URL, MIGRATIONS_DIR, OPEN_API_URL
+from app.common.domain.constants import ALEMBIC_INI_DIR, LOGGING_CONFIG_DIR, DOCS_URL, MIGRATIONS_DIR, OPEN_API_URL, \
+    NEXT_CURSOR_HEADER
 from app.common.exceptions.app_exceptions import AppDomainException
 from app.common.exceptions.handlers import exception_handler, app_exception_handler, validation_exception_handler
 from app.common.middleware.handlers import http_logging_middleware
 from app.modules.auth.auth_controller import controller as auth_controller
 from app.modules.client.client_controller import controller as client_controller
+from app.modules.experiment import experiment_events
 from app.modules.experiment.experiment_controller import controller as experiment_controller
+from app.modules.measurement import measurement_analysis, measurement_buffer
 from app.modules.measurement.measurement_controller import controller as measurement_controller
 from app.modules.user.user_controller import controller as user_controller
 from app.modules.user_token.user_token_controller import controller as user_token_controller
@@ -45,6 +49,7 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 
@@ -76,6 +81,26 @@ app.include_router(user_controller)
 app.include_router(user_token_controller)
 
 
+@app.on_event("shutdown")
+async def flush_measurement_buffers():
+    await measurement_buffer.close_all()
+
+
+@app.on_event("shutdown")
+async def close_experiment_streams():
+    experiment_events.close_all()
+
+
+@app.on_event("shutdown")
+async def shutdown_analysis_workers():
+    measurement_analysis.shutdown_process_pool()
+
+
+@app.on_event("shutdown")
+async def shutdown_password_hashing_workers():
+    hashing.shutdown_executor()
+
+
 @app.get("/", include_in_schema=False)
 async def index():
     response = RedirectResponse(url=DOCS_URL)
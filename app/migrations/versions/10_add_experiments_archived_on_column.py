@@ -0,0 +1,25 @@
+"""Add experiments archived_on column
+
+Revision ID: b83e5f1a9c27
+Revises: 6c2d8f41e0a7
+Create Date: 2026-10-18 14:12:37.530918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b83e5f1a9c27'
+down_revision = '6c2d8f41e0a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('experiments', sa.Column('archived_on', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    # Points of archived experiments stay in their archive files; restore them before downgrading past this revision
+    with op.batch_alter_table('experiments') as batch_op:
+        batch_op.drop_column('archived_on')
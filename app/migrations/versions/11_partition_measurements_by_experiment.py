@@ -0,0 +1,104 @@
+"""Partition measurements by experiment
+
+Revision ID: 2d71c9e4a5b8
+Revises: b83e5f1a9c27
+Create Date: 2026-10-18 16:27:05.912644
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2d71c9e4a5b8'
+down_revision = 'b83e5f1a9c27'
+branch_labels = None
+depends_on = None
+
+COLUMNS = 'id, created_on, updated_on, is_deleted, "timestamp", voltage, "current", experiment_id'
+
+
+def upgrade():
+    op.execute(sa.text("DELETE FROM measurements WHERE experiment_id IS NULL"))
+
+    if op.get_bind().dialect.name != 'postgresql':
+        with op.batch_alter_table('measurements') as batch_op:
+            batch_op.alter_column('experiment_id', existing_type=sa.Integer(), nullable=False)
+        return
+
+    # Rows are moved into a table LIST-partitioned by experiment_id with one partition per experiment that has rows or
+    # can still receive them; the primary key has to include the partition key
+    op.execute(sa.text("ALTER TABLE measurements RENAME TO measurements_unpartitioned"))
+    op.execute(sa.text(
+        "ALTER TABLE measurements_unpartitioned RENAME CONSTRAINT measurements_pkey TO measurements_unpartitioned_pkey"
+    ))
+    op.execute(sa.text("ALTER INDEX ix_measurements_id RENAME TO ix_measurements_unpartitioned_id"))
+    op.execute(sa.text(
+        "ALTER INDEX ix_measurements_experiment_id_timestamp RENAME TO ix_measurements_unpartitioned_experiment_id_timestamp"
+    ))
+    op.execute(sa.text("""
+        CREATE TABLE measurements (
+            id INTEGER NOT NULL DEFAULT nextval('measurements_id_seq'),
+            created_on TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            updated_on TIMESTAMP WITHOUT TIME ZONE,
+            is_deleted BOOLEAN NOT NULL,
+            "timestamp" BIGINT NOT NULL,
+            voltage BIGINT NOT NULL,
+            "current" BIGINT NOT NULL,
+            experiment_id INTEGER NOT NULL REFERENCES experiments (id),
+            PRIMARY KEY (id, experiment_id)
+        ) PARTITION BY LIST (experiment_id)
+    """))
+    op.execute(sa.text("ALTER SEQUENCE measurements_id_seq OWNED BY measurements.id"))
+    op.execute(sa.text("CREATE INDEX ix_measurements_id ON measurements (id)"))
+    op.execute(sa.text(
+        'CREATE UNIQUE INDEX ix_measurements_experiment_id_timestamp ON measurements (experiment_id, "timestamp")'
+    ))
+    op.execute(sa.text("CREATE TABLE measurements_default PARTITION OF measurements DEFAULT"))
+
+    experiment_ids = op.get_bind().execute(sa.text(
+        "SELECT id FROM experiments WHERE experiment_status != 'COMPLETED' "
+        "UNION SELECT DISTINCT experiment_id FROM measurements_unpartitioned"
+    )).scalars().all()
+
+    for experiment_id in experiment_ids:
+        op.execute(sa.text(
+            f"CREATE TABLE measurements_experiment_{experiment_id} PARTITION OF measurements FOR VALUES IN ({experiment_id})"
+        ))
+
+    op.execute(sa.text(f"INSERT INTO measurements ({COLUMNS}) SELECT {COLUMNS} FROM measurements_unpartitioned"))
+    op.execute(sa.text("DROP TABLE measurements_unpartitioned"))
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        with op.batch_alter_table('measurements') as batch_op:
+            batch_op.alter_column('experiment_id', existing_type=sa.Integer(), nullable=True)
+        return
+
+    op.execute(sa.text("ALTER TABLE measurements RENAME TO measurements_partitioned"))
+    op.execute(sa.text(
+        "ALTER TABLE measurements_partitioned RENAME CONSTRAINT measurements_pkey TO measurements_partitioned_pkey"
+    ))
+    op.execute(sa.text("ALTER INDEX ix_measurements_id RENAME TO ix_measurements_partitioned_id"))
+    op.execute(sa.text(
+        "ALTER INDEX ix_measurements_experiment_id_timestamp RENAME TO ix_measurements_partitioned_experiment_id_timestamp"
+    ))
+    op.execute(sa.text("""
+        CREATE TABLE measurements (
+            id INTEGER NOT NULL DEFAULT nextval('measurements_id_seq'),
+            created_on TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            updated_on TIMESTAMP WITHOUT TIME ZONE,
+            is_deleted BOOLEAN NOT NULL,
+            "timestamp" BIGINT NOT NULL,
+            voltage BIGINT NOT NULL,
+            "current" BIGINT NOT NULL,
+            experiment_id INTEGER REFERENCES experiments (id),
+            PRIMARY KEY (id)
+        )
+    """))
+    op.execute(sa.text(f"INSERT INTO measurements ({COLUMNS}) SELECT {COLUMNS} FROM measurements_partitioned"))
+    op.execute(sa.text("ALTER SEQUENCE measurements_id_seq OWNED BY measurements.id"))
+    op.execute(sa.text("DROP TABLE measurements_partitioned"))
+    op.create_index(op.f('ix_measurements_id'), 'measurements', ['id'], unique=False)
+    op.create_index(op.f('ix_measurements_experiment_id_timestamp'), 'measurements', ['experiment_id', 'timestamp'],
+                    unique=True)
@@ -0,0 +1,33 @@
+"""Add credential hash parameters columns
+
+Revision ID: a5d19e3c7f40
+Revises: 7c4e2b9f1d36
+Create Date: 2026-10-19 15:22:08.649371
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a5d19e3c7f40'
+down_revision = '7c4e2b9f1d36'
+branch_labels = None
+depends_on = None
+
+# Existing credentials were hashed with the parameters that used to be hard coded
+LEGACY_HASH_PARAMETERS = 'pbkdf2_sha256$100000$128'
+
+
+def upgrade():
+    op.add_column('users', sa.Column('password_hash_parameters', sa.String(), nullable=False,
+                                     server_default=LEGACY_HASH_PARAMETERS))
+    op.add_column('clients', sa.Column('secret_hash_parameters', sa.String(), nullable=False,
+                                       server_default=LEGACY_HASH_PARAMETERS))
+
+
+def downgrade():
+    # Credentials rehashed with other parameters no longer verify after downgrading past this revision
+    with op.batch_alter_table('clients') as batch_op:
+        batch_op.drop_column('secret_hash_parameters')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('password_hash_parameters')
@@ -0,0 +1,45 @@
+"""Drop measurements default partition
+
+Revision ID: e61b4a8d2f07
+Revises: 3b8f6d0a2e91
+Create Date: 2026-10-20 09:12:44.305118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e61b4a8d2f07'
+down_revision = '3b8f6d0a2e91'
+branch_labels = None
+depends_on = None
+
+COLUMNS = 'id, created_on, updated_on, is_deleted, "timestamp", voltage, "current", experiment_id'
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # DETACH PARTITION CONCURRENTLY is refused while the table has a default partition. Every experiment gets its own
+    # partition when it is created, so rows that did end up in the default partition are moved to one of their own
+    op.execute(sa.text("ALTER TABLE measurements DETACH PARTITION measurements_default"))
+
+    experiment_ids = op.get_bind().execute(sa.text(
+        "SELECT DISTINCT experiment_id FROM measurements_default"
+    )).scalars().all()
+
+    for experiment_id in experiment_ids:
+        op.execute(sa.text(
+            f"CREATE TABLE measurements_experiment_{experiment_id} PARTITION OF measurements FOR VALUES IN ({experiment_id})"
+        ))
+
+    op.execute(sa.text(f"INSERT INTO measurements ({COLUMNS}) SELECT {COLUMNS} FROM measurements_default"))
+    op.execute(sa.text("DROP TABLE measurements_default"))
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute(sa.text("CREATE TABLE measurements_default PARTITION OF measurements DEFAULT"))
@@ -0,0 +1,29 @@
+"""Add unique measurements experiment_id timestamp index
+
+Revision ID: 3f9d2c61b8e4
+Revises: a24aa7b2d612
+Create Date: 2026-10-17 20:45:12.204118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '3f9d2c61b8e4'
+down_revision = 'a24aa7b2d612'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the earliest copy of every retried measurement so the unique index can be created
+    op.execute(sa.text(
+        "DELETE FROM measurements WHERE id NOT IN "
+        "(SELECT MIN(id) FROM measurements GROUP BY experiment_id, timestamp)"
+    ))
+    op.create_index(op.f('ix_measurements_experiment_id_timestamp'), 'measurements', ['experiment_id', 'timestamp'],
+                    unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_measurements_experiment_id_timestamp'), table_name='measurements')
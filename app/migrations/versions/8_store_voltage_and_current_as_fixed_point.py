@@ -0,0 +1,84 @@
+"""Store voltage and current as fixed-point integers
+
+Revision ID: 9a7e03c5d1f6
+Revises: 4fbc5a8eb34c
+Create Date: 2026-10-17 22:14:09.730215
+
+"""
+import numpy as np
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '9a7e03c5d1f6'
+down_revision = '4fbc5a8eb34c'
+branch_labels = None
+depends_on = None
+
+VOLTAGE_SCALE = 1_000_000_000
+CURRENT_SCALE = 1_000_000_000_000
+
+SCALED_COLUMNS = {
+    'experiments': {'start_voltage': VOLTAGE_SCALE, 'end_voltage': VOLTAGE_SCALE, 'voltage_step': VOLTAGE_SCALE},
+    'measurements': {'voltage': VOLTAGE_SCALE, 'current': CURRENT_SCALE}
+}
+
+measurement_chunks = sa.table('measurement_chunks', sa.column('id'), sa.column('voltages'), sa.column('currents'))
+
+
+def upgrade():
+    for table_name, columns in SCALED_COLUMNS.items():
+        if op.get_bind().dialect.name == 'postgresql':
+            for column_name, scale in columns.items():
+                op.alter_column(table_name, column_name, type_=sa.BigInteger(),
+                                existing_type=sa.DECIMAL(precision=9, scale=7), existing_nullable=False,
+                                postgresql_using=f'ROUND({column_name} * {scale})::bigint')
+            continue
+
+        table = sa.table(table_name, *[sa.column(column_name) for column_name in columns])
+        op.execute(table.update().values({
+            column_name: sa.func.round(table.c[column_name] * scale) for column_name, scale in columns.items()
+        }))
+
+        with op.batch_alter_table(table_name) as batch_op:
+            for column_name in columns:
+                batch_op.alter_column(column_name, type_=sa.BigInteger(),
+                                      existing_type=sa.DECIMAL(precision=9, scale=7), existing_nullable=False)
+
+    convert_chunks(lambda values, scale: np.rint(np.frombuffer(values, dtype='<f8') * scale).astype('<i8'))
+
+
+def downgrade():
+    convert_chunks(lambda values, scale: np.frombuffer(values, dtype='<i8') / scale)
+
+    for table_name, columns in SCALED_COLUMNS.items():
+        if op.get_bind().dialect.name == 'postgresql':
+            for column_name, scale in columns.items():
+                op.alter_column(table_name, column_name, type_=sa.DECIMAL(precision=9, scale=7),
+                                existing_type=sa.BigInteger(), existing_nullable=False,
+                                postgresql_using=f'({column_name}::numeric / {scale})::numeric(9, 7)')
+            continue
+
+        with op.batch_alter_table(table_name) as batch_op:
+            for column_name in columns:
+                batch_op.alter_column(column_name, type_=sa.DECIMAL(precision=9, scale=7),
+                                      existing_type=sa.BigInteger(), existing_nullable=False)
+
+        table = sa.table(table_name, *[sa.column(column_name) for column_name in columns])
+        op.execute(table.update().values({
+            column_name: table.c[column_name] / float(scale) for column_name, scale in columns.items()
+        }))
+
+
+def convert_chunks(convert):
+    """Rewrite each chunk's voltage and current blobs with convert(blob, scale)"""
+
+    connection = op.get_bind()
+
+    for chunk in connection.execute(sa.select(measurement_chunks)).fetchall():
+        connection.execute(
+            measurement_chunks.update().where(measurement_chunks.c.id == chunk.id).values(
+                voltages=convert(chunk.voltages, VOLTAGE_SCALE).tobytes(),
+                currents=convert(chunk.currents, CURRENT_SCALE).tobytes()
+            )
+        )
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm.session import Session
 
+from app.common.auth.bearer import BearerAuth
 from app.common.data.dtos import ErrorResponse, ValidationErrorResponse
 from app.common.domain.constants import AUTH_URL
 from app.common.domain.database import get_db
 from app.modules.auth import auth_service
 from app.modules.auth.auth_dtos import AccessTokenResponse, ClientLoginRequest, ResetPasswordRequest, \
-    ForgotPasswordRequest, LoginRequest
+    ForgotPasswordRequest, LoginRequest, PrincipalCacheMetricsResponse, RefreshTokenRequest
 from app.modules.user.user_dtos import UserResponse
 
 controller = APIRouter(
@@ -29,7 +30,7 @@ async def get_access_token_for_user(
         db: Session = Depends(get_db)
 ):
     """Generate access token for valid user credentials"""
-    return auth_service.get_access_token_for_user(db, login_data)
+    return await auth_service.get_access_token_for_user(db, login_data)
 
 
 @controller.post(
@@ -44,8 +45,25 @@ async def get_access_token_for_client(
         request: ClientLoginRequest,
         db: Session = Depends(get_db)
 ):
-    """Generate access token for valid client credentials"""
-    return auth_service.get_access_token_for_client(db, request)
+    """Generate access token and refresh token for valid client credentials"""
+    return await auth_service.get_access_token_for_client(db, request)
+
+
+@controller.post(
+    path="/refresh",
+    status_code=200,
+    responses={
+        200: {"model": AccessTokenResponse},
+        401: {"model": ErrorResponse},
+        422: {"model": ValidationErrorResponse}
+    }
+)
+async def refresh_access_token(
+        request: RefreshTokenRequest,
+        db: Session = Depends(get_db)
+):
+    """Exchange a client refresh token for a new access token and refresh token"""
+    return auth_service.refresh_access_token(db, request)
 
 
 @controller.post(
@@ -79,4 +97,39 @@ async def reset_password(
         db: Session = Depends(get_db)
 ):
     """Reset user password"""
-    return auth_service.reset_password(db, reset_password_data)
+    return await auth_service.reset_password(db, reset_password_data)
+
+
+@controller.post(
+    path="/revoke",
+    dependencies=[Depends(BearerAuth())],
+    status_code=204,
+    responses={
+        204: {},
+        401: {"model": ErrorResponse}
+    }
+)
+async def revoke_token(
+        request: Request,
+        db: Session = Depends(get_db)
+):
+    """Revoke the access token used to authenticate the request"""
+    auth_service.revoke_token(db, request)
+
+
+@controller.get(
+    path="/principal-cache-metrics",
+    dependencies=[Depends(BearerAuth())],
+    status_code=200,
+    responses={
+        200: {"model": PrincipalCacheMetricsResponse},
+        401: {"model": ErrorResponse},
+        403: {"model": ErrorResponse}
+    }
+)
+async def get_principal_cache_metrics(
+        request: Request,
+        db: Session = Depends(get_db)
+):
+    """Get hit, miss and eviction counts of the verified token cache"""
+    return auth_service.get_principal_cache_metrics(db, request)
@@ -0,0 +1,59 @@
+"""In-memory denylist of revoked access tokens.
+
+Revoked token ids are kept as 16-byte digests in a frozenset, reloaded from the revoked_tokens table at most every
+REVOKED_TOKENS_RELOAD_INTERVAL_IN_SECONDS, so checking a token costs a set lookup and a revocation on one worker
+reaches the others within one interval. Rows are kept until the token would have expired anyway.
+"""
+import hashlib
+import threading
+import time
+from datetime import datetime
+from typing import FrozenSet, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.orm.session import Session
+
+from app.common.data.models import RevokedToken
+from app.common.domain.config import REVOKED_TOKENS_RELOAD_INTERVAL_IN_SECONDS
+
+_revoked: FrozenSet[bytes] = frozenset()
+_loaded_at: Optional[float] = None
+_lock = threading.Lock()
+
+
+def is_revoked(db: Session, token_id: str) -> bool:
+    reload_if_stale(db)
+    return get_digest(token_id) in _revoked
+
+
+def revoke(db: Session, token_id: str, expires_on: datetime) -> None:
+    global _revoked
+
+    db.execute(delete(RevokedToken).where(RevokedToken.expires_on <= datetime.utcnow()))
+
+    if not db.query(RevokedToken.id).filter(RevokedToken.token_id == token_id).first():
+        db.add(RevokedToken(token_id=token_id, expires_on=expires_on))
+
+    db.commit()
+
+    with _lock:
+        _revoked = _revoked | {get_digest(token_id)}
+
+
+def reload_if_stale(db: Session) -> None:
+    global _revoked, _loaded_at
+
+    if _loaded_at is not None and time.monotonic() - _loaded_at < REVOKED_TOKENS_RELOAD_INTERVAL_IN_SECONDS:
+        return
+
+    with _lock:
+        if _loaded_at is not None and time.monotonic() - _loaded_at < REVOKED_TOKENS_RELOAD_INTERVAL_IN_SECONDS:
+            return
+
+        rows = db.query(RevokedToken.token_id).filter(RevokedToken.expires_on > datetime.utcnow())
+        _revoked = frozenset(get_digest(row.token_id) for row in rows)
+        _loaded_at = time.monotonic()
+
+
+def get_digest(token_id: str) -> bytes:
+    return hashlib.sha256(token_id.encode("utf-8")).digest()[:16]
@@ -17,6 +17,11 @@ class ClientLoginRequest(BaseModel):
     expires: Optional[int] = ACCESS_TOKEN_EXPIRE_IN_SECONDS
 
 
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+    expires: Optional[int] = ACCESS_TOKEN_EXPIRE_IN_SECONDS
+
+
 class ForgotPasswordRequest(BaseModel):
     username: str
 
@@ -27,17 +32,20 @@ class ResetPasswordRequest(BaseModel):
     token: str
 
 
-class PasswordDto(BaseModel):
-    password_hash: bytes
-    password_salt: bytes
-
-
-class ClientSecretDto(BaseModel):
-    secret_hash: bytes
-    secret_salt: bytes
-
-
 class AccessTokenResponse(BaseModel):
     access_token: str
     token_type: str
     expires_in: int
+    refresh_token: Optional[str] = None
+
+
+class PrincipalCacheMetricsResponse(BaseModel):
+    size: int
+    max_size: int
+    ttl_in_seconds: float
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+    hit_ratio: float
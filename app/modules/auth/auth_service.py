@@ -1,87 +1,95 @@
 import hashlib
 import string
 import time
+import uuid
 from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
 
 import jwt
+from fastapi import Request
 from sqlalchemy.orm.session import Session
 
-from app.common import utils
+from app.common import hashing
+from app.common.auth import keys
+from app.common.auth.principal import Principal
+from app.common.caching import TTLCache
+from app.common.hashing import Credential
 from app.common.data.enums import UserTokenType
 from app.common.data.models import User, Client
 from app.common.domain.config import USER_TOKEN_RESET_PASSWORD_EXPIRE_MINUTES, USER_TOKEN_RESET_PASSWORD_LENGTH, \
-    ACCESS_TOKEN_EXPIRE_IN_SECONDS, JWT_SIGNING_ALGORITHM, SECRET_KEY
+    ACCESS_TOKEN_EXPIRE_IN_SECONDS, JWT_SIGNING_ALGORITHM, JWT_STATELESS_ENABLED, PRINCIPAL_CACHE_SIZE, \
+    PRINCIPAL_CACHE_TTL_IN_SECONDS
 from app.common.domain.constants import FORGOT_PASSWORD_TEMPLATE
-from app.common.exceptions.app_exceptions import UnauthorizedRequestException, NotFoundException
-from app.modules.auth.auth_dtos import ForgotPasswordRequest, PasswordDto, ResetPasswordRequest, LoginRequest, \
-    AccessTokenResponse, ClientLoginRequest, ClientSecretDto
+from app.common.exceptions.app_exceptions import UnauthorizedRequestException, NotFoundException, ForbiddenException
+from app.modules.auth import auth_denylist
+from app.modules.auth.auth_dtos import ForgotPasswordRequest, ResetPasswordRequest, LoginRequest, \
+    AccessTokenResponse, ClientLoginRequest, PrincipalCacheMetricsResponse, RefreshTokenRequest
 from app.modules.client import client_service
 from app.modules.email import email_service
+from app.modules.refresh_token import refresh_token_service
 from app.modules.user import user_service
 from app.modules.user.user_dtos import UserResponse
 from app.modules.user.user_mappings import user_to_user_response
 from app.modules.user_token import user_token_service
 
 
-def get_user_password(user: User) -> PasswordDto:
-    return PasswordDto(
-        password_hash=user.password_hash,
-        password_salt=user.password_salt
-    )
+class CachedPrincipal(NamedTuple):
+    token_id: str
+    principal: Principal
 
 
-def get_client_secret(db: Session, client_id: str) -> ClientSecretDto:
-    client = client_service.get_client_by_identifier(db, client_id)
+_principal_cache: TTLCache[CachedPrincipal] = TTLCache(PRINCIPAL_CACHE_SIZE)
 
-    response = ClientSecretDto(
-        secret_hash=client.secret_hash,
-        secret_salt=client.secret_salt
-    )
 
-    return response
+def get_user_credential(user: User) -> Credential:
+    return Credential(
+        hash=user.password_hash,
+        salt=user.password_salt,
+        parameters=user.password_hash_parameters
+    )
 
 
-def verify_password(password, password_hash, password_salt) -> bool:
-    key = hashlib.pbkdf2_hmac(
-        "sha256",
-        password.encode("utf-8"),
-        password_salt,
-        100000,
-        dklen=128
+def get_client_credential(client: Client) -> Credential:
+    return Credential(
+        hash=client.secret_hash,
+        salt=client.secret_salt,
+        parameters=client.secret_hash_parameters
     )
 
-    return key == password_hash
 
-
-def authenticate_user(db: Session, username: str, password: str) -> bool:
+async def authenticate_user(db: Session, username: str, password: str) -> bool:
     try:
         user = user_service.get_user_by_username(db, username)
     except NotFoundException:
         return False
 
-    user_password = get_user_password(user)
+    user_credential = get_user_credential(user)
 
-    if not user_password:
+    if not await hashing.verify_secret(password, user_credential):
         return False
 
-    if not verify_password(password, user_password.password_hash, user_password.password_salt):
-        return False
+    if hashing.needs_rehash(user_credential):
+        user.password_hash, user.password_salt, user.password_hash_parameters = await hashing.hash_secret(password)
+        db.commit()
 
     return True
 
 
-def authenticate_client(db: Session, client_id: str, secret: str) -> bool:
+async def authenticate_client(db: Session, client_id: str, secret: str) -> bool:
     try:
-        client_secret = get_client_secret(db, client_id)
+        client = client_service.get_client_by_identifier(db, client_id)
     except NotFoundException:
         return False
 
-    if not client_secret:
-        return False
+    client_credential = get_client_credential(client)
 
-    if not verify_password(secret, client_secret.secret_hash, client_secret.secret_salt):
+    if not await hashing.verify_secret(secret, client_credential):
         return False
 
+    if hashing.needs_rehash(client_credential):
+        client.secret_hash, client.secret_salt, client.secret_hash_parameters = await hashing.hash_secret(secret)
+        db.commit()
+
     return True
 
 
@@ -104,73 +112,200 @@ def forgot_password(db: Session, forgot_password_data: ForgotPasswordRequest) ->
     email_service.send_email(user.email, FORGOT_PASSWORD_TEMPLATE, payload)
 
 
-def reset_password(db: Session, reset_password_data: ResetPasswordRequest) -> UserResponse:
+async def reset_password(db: Session, reset_password_data: ResetPasswordRequest) -> UserResponse:
     user = user_service.get_user_by_username(db, reset_password_data.username)
 
     user_token_service.use_token(db, user.id, reset_password_data.token, UserTokenType.RESET_PASSWORD)
 
-    password_hash, password_salt = utils.generate_hash_and_salt(reset_password_data.password)
+    credential = await hashing.hash_secret(reset_password_data.password)
 
-    user.password_hash = password_hash
-    user.password_salt = password_salt
+    user.password_hash = credential.hash
+    user.password_salt = credential.salt
+    user.password_hash_parameters = credential.parameters
 
     db.commit()
     db.refresh(user)
 
+    invalidate_user_principals(user.id)
+
     return user_to_user_response(user)
 
 
-def get_access_token_for_user(db: Session, login_data: LoginRequest) -> AccessTokenResponse:
-    if not authenticate_user(db, login_data.username, login_data.password):
+async def get_access_token_for_user(db: Session, login_data: LoginRequest) -> AccessTokenResponse:
+    if not await authenticate_user(db, login_data.username, login_data.password):
         raise UnauthorizedRequestException("Incorrect username or password")
 
     expiry = get_expiry(login_data.expires)
 
-    data = {"sub": login_data.username, "exp": expiry}
-    return generate_access_token(data)
+    data = {"sub": login_data.username, "exp": expiry, "jti": uuid.uuid4().hex}
+    return generate_access_token(db, data)
 
 
-def get_access_token_for_client(db: Session, request: ClientLoginRequest) -> AccessTokenResponse:
-    if not authenticate_client(db, request.client_id, request.client_secret):
+async def get_access_token_for_client(db: Session, request: ClientLoginRequest) -> AccessTokenResponse:
+    if not await authenticate_client(db, request.client_id, request.client_secret):
         raise UnauthorizedRequestException("Incorrect client identifier or secret")
 
-    expire = get_expiry(request.expires)
+    client = client_service.get_client_by_identifier(db, request.client_id)
+    return generate_client_tokens(db, client, request.expires)
+
+
+def refresh_access_token(db: Session, request: RefreshTokenRequest) -> AccessTokenResponse:
+    """Exchange a refresh token for a new access token and refresh token, without verifying the client secret"""
+
+    client_id = refresh_token_service.use_token(db, request.refresh_token)
+    client = client_service.get_client_by_id(db, client_id)
 
-    data = {"client_id": request.client_id, "exp": expire}
-    return generate_access_token(data)
+    return generate_client_tokens(db, client, request.expires)
 
 
-def decode_jwt(db: Session, token: str) -> dict:
+def generate_client_tokens(db: Session, client: Client, expires: int) -> AccessTokenResponse:
+    expire = get_expiry(expires)
+
+    data = {"client_id": client.identifier, "exp": expire, "jti": uuid.uuid4().hex}
+    response = generate_access_token(db, data)
+    response.refresh_token = refresh_token_service.issue_token(db, client.id)
+
+    return response
+
+
+def decode_jwt(token: str) -> dict:
     try:
-        decoded_token = jwt.decode(token, SECRET_KEY, algorithms=[JWT_SIGNING_ALGORITHM])
+        return jwt.decode(token, keys.get_verification_key(), algorithms=[JWT_SIGNING_ALGORITHM],
+                          options={"require": ["exp"]})
     except jwt.PyJWTError:
         return {}
 
+
+def get_principal(db: Session, token: str) -> Optional[Principal]:
+    """Return the user or client a token was issued to, or None when the token is invalid, revoked or its subject no
+    longer exists.
+
+    Resolved principals are cached by token hash until the earlier of the token's expiry and the cache TTL. In
+    stateless mode a token carrying principal claims is trusted without a database lookup.
+    """
+
+    key = hash_token(token)
+    entry = _principal_cache.get(key)
+
+    if entry is None:
+        decoded_token = decode_jwt(token)
+        principal = claims_to_principal(decoded_token) if JWT_STATELESS_ENABLED else None
+        principal = principal or load_principal(db, decoded_token)
+
+        if principal is None:
+            return None
+
+        entry = CachedPrincipal(get_token_id(token, decoded_token), principal)
+        _principal_cache.put(key, entry, min(decoded_token["exp"], time.time() + PRINCIPAL_CACHE_TTL_IN_SECONDS))
+
+    if auth_denylist.is_revoked(db, entry.token_id):
+        return None
+
+    return entry.principal
+
+
+def load_principal(db: Session, decoded_token: dict) -> Optional[Principal]:
     username = decoded_token.get("sub")
     client_id = decoded_token.get("client_id")
 
-    if not username and not client_id:
-        return {}
+    if username:
+        user = db.query(User.id, User.is_admin, User.is_staff).filter(User.username == username).first()
+        return Principal(id=user.id, username=username, is_admin=user.is_admin, is_staff=user.is_staff) if user else None
 
-    user = db.query(User).filter(User.username == username).first()
-    client = db.query(Client).filter(Client.identifier == client_id).first()
+    if client_id:
+        client = db.query(Client.id).filter(Client.identifier == client_id).first()
+        return Principal(id=client.id, identifier=client_id) if client else None
 
-    if not user and not client:
-        return {}
+    return None
 
-    expiry = decoded_token.get("exp")
 
-    if expiry < time.time():
-        return {}
+def claims_to_principal(decoded_token: dict) -> Optional[Principal]:
+    """Build the principal from the claims generate_access_token embeds in stateless mode, or None for tokens issued
+    without them"""
 
-    return decoded_token
+    if "principal_id" not in decoded_token:
+        return None
 
+    if decoded_token.get("sub"):
+        return Principal(id=decoded_token["principal_id"], username=decoded_token["sub"],
+                         is_admin=decoded_token.get("is_admin", False), is_staff=decoded_token.get("is_staff", False))
 
-def verify_jwt(db: Session, token: str) -> bool:
-    if not decode_jwt(db, token):
-        return False
+    if decoded_token.get("client_id"):
+        return Principal(id=decoded_token["principal_id"], identifier=decoded_token["client_id"])
 
-    return True
+    return None
+
+
+def principal_to_claims(principal: Principal) -> dict:
+    if principal.is_user:
+        return {"principal_id": principal.id, "is_admin": principal.is_admin, "is_staff": principal.is_staff}
+
+    return {"principal_id": principal.id}
+
+
+def get_token_id(token: str, decoded_token: dict) -> str:
+    return decoded_token.get("jti") or hash_token(token)
+
+
+def revoke_token(db: Session, request: Request) -> None:
+    """Revoke the bearer token of the request on every worker; it stops working here immediately"""
+
+    token = get_bearer_token(request)
+    decoded_token = decode_jwt(token)
+
+    if not decoded_token:
+        raise UnauthorizedRequestException("Invalid or expired token")
+
+    auth_denylist.revoke(db, get_token_id(token, decoded_token), datetime.utcfromtimestamp(decoded_token["exp"]))
+    _principal_cache.invalidate(hash_token(token))
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def invalidate_user_principals(user_id: int) -> None:
+    _principal_cache.invalidate_where(lambda entry: entry.principal.is_user and entry.principal.id == user_id)
+
+
+def invalidate_client_principals(client_id: int) -> None:
+    _principal_cache.invalidate_where(lambda entry: entry.principal.is_client and entry.principal.id == client_id)
+
+
+def get_principal_cache_metrics(db: Session, request: Request) -> PrincipalCacheMetricsResponse:
+    logged_in_user = user_service.get_logged_in_user(db, request)
+
+    if not logged_in_user.is_admin:
+        raise ForbiddenException(logged_in_user.username)
+
+    lookups = _principal_cache.hits + _principal_cache.misses
+
+    return PrincipalCacheMetricsResponse(
+        size=len(_principal_cache),
+        max_size=_principal_cache.maxsize,
+        ttl_in_seconds=PRINCIPAL_CACHE_TTL_IN_SECONDS,
+        hits=_principal_cache.hits,
+        misses=_principal_cache.misses,
+        evictions=_principal_cache.evictions,
+        expirations=_principal_cache.expirations,
+        invalidations=_principal_cache.invalidations,
+        hit_ratio=_principal_cache.hits / lookups if lookups else 0.0
+    )
+
+
+def get_request_principal(db: Session, request: Request) -> Optional[Principal]:
+    """Return the principal BearerAuth resolved for the request, resolving it from the header on unguarded routes"""
+
+    if not hasattr(request.state, "principal"):
+        token = get_bearer_token(request)
+        request.state.principal = get_principal(db, token) if token else None
+
+    return request.state.principal
+
+
+def get_bearer_token(request: Request) -> Optional[str]:
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return token if scheme.lower() == "bearer" and token else None
 
 
 def get_expiry(expires: int) -> datetime:
@@ -180,7 +315,10 @@ def get_expiry(expires: int) -> datetime:
     return datetime.utcnow() + timedelta(seconds=ACCESS_TOKEN_EXPIRE_IN_SECONDS)
 
 
-def generate_access_token(data: dict) -> AccessTokenResponse:
-    encoded_jwt = jwt.encode(data, SECRET_KEY, algorithm=JWT_SIGNING_ALGORITHM)
+def generate_access_token(db: Session, data: dict) -> AccessTokenResponse:
+    if JWT_STATELESS_ENABLED:
+        data.update(principal_to_claims(load_principal(db, data)))
+
+    encoded_jwt = jwt.encode(data, keys.get_signing_key(), algorithm=JWT_SIGNING_ALGORITHM)
     expires_in = data.get('exp') - datetime.utcnow()
     return AccessTokenResponse(access_token=encoded_jwt, token_type="bearer", expires_in=expires_in.total_seconds())
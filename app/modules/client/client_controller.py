@@ -31,7 +31,7 @@ async def create_client(
         db: Session = Depends(get_db)
 ):
     """Create new client"""
-    return client_service.create_client(db, request, client_data)
+    return await client_service.create_client(db, request, client_data)
 
 
 @controller.get(
@@ -72,3 +72,23 @@ async def get_client(
 ):
     """Get client by id"""
     return client_service.get_client(db, id, request)
+
+
+@controller.delete(
+    path="/{id}/refresh-tokens",
+    dependencies=[Depends(BearerAuth())],
+    status_code=204,
+    responses={
+        204: {},
+        401: {"model": ErrorResponse},
+        403: {"model": ErrorResponse},
+        404: {"model": ErrorResponse}
+    }
+)
+async def revoke_refresh_tokens(
+        id: int,
+        request: Request,
+        db: Session = Depends(get_db)
+):
+    """Revoke every refresh token of a client"""
+    client_service.revoke_refresh_tokens(db, id, request)
@@ -1,4 +1,4 @@
-from app.common import utils
+from app.common.hashing import Credential
 from app.common.data.models import Client
 from app.modules.client.client_dtos import ClientResponse, ClientCreateRequest
 
@@ -12,13 +12,12 @@ def client_to_client_response(client: Client) -> ClientResponse:
     return result
 
 
-def client_create_to_client(request: ClientCreateRequest) -> Client:
-    secret_hash, secret_salt = utils.generate_hash_and_salt(request.secret)
-
+def client_create_to_client(request: ClientCreateRequest, credential: Credential) -> Client:
     result = Client(
         identifier=request.identifier,
-        secret_hash=secret_hash,
-        secret_salt=secret_salt
+        secret_hash=credential.hash,
+        secret_salt=credential.salt,
+        secret_hash_parameters=credential.parameters
     )
 
     return result
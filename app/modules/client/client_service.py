@@ -1,24 +1,30 @@
+from typing import Optional
+
 from fastapi import Request
 from sqlalchemy.orm import Query
 from sqlalchemy.orm.session import Session
 
+from app.common import hashing
+from app.common.auth.principal import Principal
 from app.common.data.models import Client
-from app.common.exceptions.app_exceptions import ForbiddenException, NotFoundException
+from app.common.exceptions.app_exceptions import ForbiddenException, NotFoundException, UnauthorizedRequestException
 from app.common.pagination import paginate, page_to_page_response, PageResponse
 from app.modules.auth import auth_service
 from app.modules.client.client_dtos import ClientCreateRequest, ClientResponse
 from app.modules.client.client_mappings import client_create_to_client, client_to_client_response
 from app.modules.client.client_queries import SearchClientsQuery
+from app.modules.refresh_token import refresh_token_service
 from app.modules.user import user_service
 
 
-def create_client(db: Session, request: Request, client_data: ClientCreateRequest) -> ClientResponse:
+async def create_client(db: Session, request: Request, client_data: ClientCreateRequest) -> ClientResponse:
     logged_in_user = user_service.get_logged_in_user(db, request)
 
     if not logged_in_user.is_admin:
         raise ForbiddenException(logged_in_user.username)
 
-    client = client_create_to_client(client_data)
+    credential = await hashing.hash_secret(client_data.secret)
+    client = client_create_to_client(client_data, credential)
 
     db.add(client)
     db.commit()
@@ -50,22 +56,34 @@ def filter_clients(db: Session, query: SearchClientsQuery) -> Query:
     return db_query
 
 
-def get_logged_in_client(db: Session, request: Request) -> Client:
-    try:
-        return get_current_client(db, request)
-    except NotFoundException:
+def get_logged_in_client(db: Session, request: Request) -> Principal:
+    principal = auth_service.get_request_principal(db, request)
+
+    if not principal or not principal.is_client:
         raise ForbiddenException()
 
+    return principal
+
 
 def get_current_client(db: Session, request: Request) -> Client:
-    client_id = get_client_identifier_from_token(db, request)
-    return get_client_by_identifier(db, client_id)
+    return get_client_by_id(db, get_logged_in_client(db, request).id)
+
+
+def get_client_identifier_from_token(db: Session, request: Request) -> Optional[str]:
+    principal = auth_service.get_request_principal(db, request)
+    return principal.identifier if principal else None
 
 
-def get_client_identifier_from_token(db: Session, request: Request) -> str:
-    token = request.headers.get("Authorization").split(" ")[1]
-    payload = auth_service.decode_jwt(db, token)
-    return payload.get("client_id")
+def get_client_from_token(db: Session, token: str) -> Principal:
+    principal = auth_service.get_principal(db, token)
+
+    if not principal:
+        raise UnauthorizedRequestException("Invalid or expired token")
+
+    if not principal.is_client:
+        raise ForbiddenException()
+
+    return principal
 
 
 def get_client_by_identifier(db: Session, client_id: str) -> Client:
@@ -88,6 +106,17 @@ def get_client(db: Session, id: int, request: Request) -> ClientResponse:
     return client_to_client_response(client)
 
 
+def revoke_refresh_tokens(db: Session, id: int, request: Request) -> None:
+    logged_in_user = user_service.get_logged_in_user(db, request)
+
+    if not logged_in_user.is_admin:
+        raise ForbiddenException(logged_in_user.username)
+
+    client = get_client_by_id(db, id)
+
+    refresh_token_service.revoke_client_tokens(db, client.id)
+
+
 def get_client_by_id(db: Session, id: int) -> Client:
     client = db.query(Client).filter(Client.id == id).first()
 
@@ -1,17 +1,23 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm.session import Session
 
 from app.common.auth.bearer import BearerAuth
 from app.common.data.dtos import ErrorResponse, ValidationErrorResponse
-from app.common.domain.constants import EXPERIMENTS_URL
+from app.common.domain.constants import EXPERIMENTS_URL, MSGPACK_MEDIA_TYPE, PACKED_MEASUREMENTS_MEDIA_TYPE, \
+    NEXT_CURSOR_HEADER, NDJSON_MEDIA_TYPE, CSV_MEDIA_TYPE, EVENT_STREAM_MEDIA_TYPE
 from app.common.domain.database import get_db
 from app.common.pagination import PageResponse
 from app.modules.experiment import experiment_service
-from app.modules.experiment.experiment_dtos import ExperimentResponse, ExperimentCreateRequest
+from app.modules.experiment.experiment_dtos import ExperimentResponse, ExperimentCreateRequest, ExperimentSummaryResponse, \
+    ExperimentOverlayRequest, ExperimentOverlayResponse
 from app.modules.experiment.experiment_queries import SearchExperimentsQuery
-from app.modules.measurement.measurement_dtos import MeasurementResponse
+from app.modules.measurement.measurement_controller import BINARY_BODY
+from app.modules.measurement.measurement_dtos import MeasurementPointResponse, MeasurementAnalysisResponse, \
+    ResampledMeasurementsResponse
+from app.modules.measurement.measurement_queries import MeasurementRangeQuery, MeasurementDownsampleQuery
 
 controller = APIRouter(
     prefix=EXPERIMENTS_URL,
@@ -43,17 +49,43 @@ async def create_experiment(
     status_code=200,
     responses={
         200: {"model": PageResponse},
+        304: {"description": "Not modified since the ETag in If-None-Match"},
         401: {"model": ErrorResponse},
         403: {"model": ErrorResponse}
     }
 )
 async def search_experiments(
         request: Request,
+        response: Response,
         query: SearchExperimentsQuery = Depends(),
         db: Session = Depends(get_db)
 ):
-    """Search experiments"""
-    return experiment_service.search_experiments(db, request, query)
+    """Search experiments; responses carry an ETag and If-None-Match returns 304 when the page is unchanged"""
+    return experiment_service.search_experiments(db, request, response, query)
+
+
+@controller.post(
+    path="/overlay",
+    dependencies=[Depends(BearerAuth())],
+    status_code=200,
+    responses={
+        200: {"model": ExperimentOverlayResponse},
+        401: {"model": ErrorResponse},
+        403: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        422: {"model": ValidationErrorResponse}
+    }
+)
+async def get_experiment_overlay(
+        overlay_data: ExperimentOverlayRequest,
+        request: Request,
+        db: Session = Depends(get_db)
+):
+    """Get several experiments and their points as column arrays keyed by experiment id, to overlay runs in one call.
+
+    Set points to downsample each experiment to at most that many points with the given method.
+    """
+    return experiment_service.get_experiment_overlay(db, request, overlay_data)
 
 
 @controller.get(
@@ -62,6 +94,7 @@ async def search_experiments(
     status_code=200,
     responses={
         200: {"model": ExperimentResponse},
+        304: {"description": "Not modified since the ETag in If-None-Match"},
         401: {"model": ErrorResponse},
         403: {"model": ErrorResponse},
         404: {"model": ErrorResponse},
@@ -71,10 +104,36 @@ async def search_experiments(
 async def get_experiment(
         id: int,
         request: Request,
+        response: Response,
+        include_summary: bool = False,
         db: Session = Depends(get_db)
 ):
-    """Get experiment by id"""
-    return experiment_service.get_experiment(db, id, request)
+    """Get experiment by id, optionally embedding its measurement summary.
+
+    Responses carry an ETag; If-None-Match returns 304 when neither the experiment nor its measurements changed.
+    """
+    return experiment_service.get_experiment(db, id, request, response, include_summary)
+
+
+@controller.get(
+    path="/{id}/summary",
+    dependencies=[Depends(BearerAuth())],
+    status_code=200,
+    responses={
+        200: {"model": ExperimentSummaryResponse},
+        401: {"model": ErrorResponse},
+        403: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        422: {"model": ValidationErrorResponse}
+    }
+)
+async def get_experiment_summary(
+        id: int,
+        request: Request,
+        db: Session = Depends(get_db)
+):
+    """Get the point count, time span and per-channel min, max, mean and variance of an experiment's measurements"""
+    return experiment_service.get_experiment_summary(db, id, request)
 
 
 @controller.get(
@@ -82,7 +141,13 @@ async def get_experiment(
     dependencies=[Depends(BearerAuth())],
     status_code=200,
     responses={
-        200: {"model": List[MeasurementResponse]},
+        200: {
+            "model": List[MeasurementPointResponse],
+            "content": {MSGPACK_MEDIA_TYPE: BINARY_BODY, PACKED_MEASUREMENTS_MEDIA_TYPE: BINARY_BODY},
+            "headers": {NEXT_CURSOR_HEADER: {"description": "Cursor of the next page", "schema": {"type": "string"}}}
+        },
+        304: {"description": "Not modified since the ETag in If-None-Match"},
+        400: {"model": ErrorResponse},
         401: {"model": ErrorResponse},
         403: {"model": ErrorResponse},
         404: {"model": ErrorResponse},
@@ -90,12 +155,149 @@ async def get_experiment(
     }
 )
 async def get_experiment_measurements(
+        id: int,
+        request: Request,
+        query: MeasurementRangeQuery = Depends(),
+        db: Session = Depends(get_db)
+):
+    """Get a page of experiment measurements by id as JSON, msgpack or packed records, negotiated through the Accept
+    header.
+
+    Points are ordered by timestamp and can be limited to [from_timestamp, to_timestamp]. When more points remain, the
+    X-Next-Cursor response header holds the cursor to pass for the next page. Pages of COMPLETED experiments are served
+    from a gzip-compressed disk cache, with Content-Encoding: gzip when the client accepts it.
+    """
+    return experiment_service.get_experiment_measurements(db, id, request, query)
+
+
+@controller.get(
+    path="/{id}/measurements/downsampled",
+    dependencies=[Depends(BearerAuth())],
+    status_code=200,
+    responses={
+        200: {
+            "model": List[MeasurementPointResponse],
+            "content": {MSGPACK_MEDIA_TYPE: BINARY_BODY, PACKED_MEASUREMENTS_MEDIA_TYPE: BINARY_BODY}
+        },
+        401: {"model": ErrorResponse},
+        403: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        422: {"model": ValidationErrorResponse}
+    }
+)
+async def get_experiment_downsampled_measurements(
+        id: int,
+        request: Request,
+        query: MeasurementDownsampleQuery = Depends(),
+        db: Session = Depends(get_db)
+):
+    """Get at most the requested number of points of an experiment for plotting.
+
+    lttb keeps the visual shape of the current curve; minmax keeps the lowest and highest current of each bucket so
+    peaks are never dropped.
+    """
+    return experiment_service.get_experiment_downsampled_measurements(db, id, request, query)
+
+
+@controller.get(
+    path="/{id}/measurements/resampled",
+    dependencies=[Depends(BearerAuth())],
+    status_code=200,
+    responses={
+        200: {"model": ResampledMeasurementsResponse},
+        400: {"model": ErrorResponse},
+        401: {"model": ErrorResponse},
+        403: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        422: {"model": ValidationErrorResponse}
+    }
+)
+async def get_experiment_resampled_measurements(
+        id: int,
+        request: Request,
+        db: Session = Depends(get_db)
+):
+    """Get an experiment's currents interpolated onto its programmed voltage grid, so runs can be compared point for
+    point.
+
+    voltages holds the grid from start_voltage towards end_voltage in voltage_step increments. Each forward or reverse
+    sweep has one current per grid voltage, or null where the sweep did not reach that voltage.
+    """
+    return experiment_service.get_experiment_resampled_measurements(db, id, request)
+
+
+@controller.get(
+    path="/{id}/analysis",
+    dependencies=[Depends(BearerAuth())],
+    status_code=200,
+    responses={
+        200: {"model": MeasurementAnalysisResponse},
+        401: {"model": ErrorResponse},
+        403: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        422: {"model": ValidationErrorResponse}
+    }
+)
+async def analyse_experiment(
         id: int,
         request: Request,
         db: Session = Depends(get_db)
 ):
-    """Get experiment measurements by id"""
-    return experiment_service.get_experiment_measurements(db, id, request)
+    """Get the cyclic-voltammetry analysis of an experiment: its forward and reverse sweeps, anodic and cathodic peaks
+    and the charge passed in each sweep, in coulombs"""
+    return await experiment_service.analyse_experiment(db, id, request)
+
+
+@controller.get(
+    path="/{id}/measurements/export",
+    dependencies=[Depends(BearerAuth())],
+    status_code=200,
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}, CSV_MEDIA_TYPE: {"schema": {"type": "string"}}}},
+        401: {"model": ErrorResponse},
+        403: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        422: {"model": ValidationErrorResponse}
+    }
+)
+async def export_experiment_measurements(
+        id: int,
+        request: Request,
+        db: Session = Depends(get_db)
+):
+    """Export every measurement of an experiment as NDJSON or CSV, negotiated through the Accept header.
+
+    The export is streamed in fixed-size batches, so it works for experiments of any size.
+    """
+    return experiment_service.export_experiment_measurements(db, id, request)
+
+
+@controller.get(
+    path="/{id}/stream",
+    dependencies=[Depends(BearerAuth())],
+    status_code=200,
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {EVENT_STREAM_MEDIA_TYPE: {"schema": {"type": "string"}}}},
+        401: {"model": ErrorResponse},
+        403: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        422: {"model": ValidationErrorResponse}
+    }
+)
+async def stream_experiment(
+        id: int,
+        request: Request,
+        db: Session = Depends(get_db)
+):
+    """Follow an experiment live as server-sent events.
+
+    The stream opens with a status event and then carries measurements events with newly stored points, status events
+    for each transition and import events for CSV imports, ending once the experiment completes. A dropped event
+    reports how many events a slow reader missed.
+    """
+    return experiment_service.stream_experiment(db, id, request)
 
 
 @controller.put(
@@ -137,5 +339,5 @@ async def stop_experiment(
         db: Session = Depends(get_db)
 ):
     """Stop experiment"""
-    experiment_service.stop_experiment(db, id, request)
+    await experiment_service.stop_experiment(db, id, request)
 
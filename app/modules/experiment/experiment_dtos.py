@@ -1,20 +1,57 @@
 from decimal import Decimal
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, conint, conlist
+
+from app.common.data.enums import DownsamplingMethod
+from app.common.domain.config import EXPERIMENT_OVERLAY_MAX_EXPERIMENTS, MEASUREMENT_DOWNSAMPLE_MAX_POINTS
+
+
+class ExperimentSummaryResponse(BaseModel):
+    experiment_id: int
+    point_count: int
+    first_timestamp: Optional[int]
+    last_timestamp: Optional[int]
+    min_voltage: Optional[float]
+    max_voltage: Optional[float]
+    mean_voltage: Optional[float]
+    variance_voltage: Optional[float]
+    min_current: Optional[float]
+    max_current: Optional[float]
+    mean_current: Optional[float]
+    variance_current: Optional[float]
 
 
 class ExperimentResponse(BaseModel):
     id: int
     experiment_status: str
-    start_voltage: Decimal
-    end_voltage: Decimal
-    voltage_step: Decimal
+    start_voltage: float
+    end_voltage: float
+    voltage_step: float
     username: str
     client_id: str
+    summary: Optional[ExperimentSummaryResponse]
 
 
 class ExperimentCreateRequest(BaseModel):
     client_id: str
-    start_voltage: Decimal = Field(decimal_places=7)
-    end_voltage: Decimal = Field(decimal_places=7)
-    voltage_step: Decimal = Field(decimal_places=7)
+    start_voltage: Decimal = Field(decimal_places=9)
+    end_voltage: Decimal = Field(decimal_places=9)
+    voltage_step: Decimal = Field(decimal_places=9)
+
+
+class ExperimentOverlayRequest(BaseModel):
+    experiment_ids: conlist(int, min_items=1, max_items=EXPERIMENT_OVERLAY_MAX_EXPERIMENTS)
+    points: Optional[conint(ge=3, le=MEASUREMENT_DOWNSAMPLE_MAX_POINTS)]
+    method: DownsamplingMethod = DownsamplingMethod.LTTB
+
+
+class ExperimentOverlaySeriesResponse(BaseModel):
+    experiment: ExperimentResponse
+    timestamps: List[int]
+    voltages: List[float]
+    currents: List[float]
+
+
+class ExperimentOverlayResponse(BaseModel):
+    experiments: Dict[int, ExperimentOverlaySeriesResponse]
@@ -0,0 +1,105 @@
+import json
+from collections import defaultdict
+from typing import AsyncIterator, Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.orm.session import Session
+
+from app.common.broadcast import BroadcastHub, Subscription
+from app.common.data.enums import ExperimentStatus
+from app.common.data.fixed_point import fixed_point_to_float
+from app.common.data.models import Experiment
+from app.common.domain.config import EXPERIMENT_STREAM_BUFFER_SIZE, EXPERIMENT_STREAM_HEARTBEAT_INTERVAL_IN_SECONDS
+from app.common.domain.constants import VOLTAGE_SCALE, CURRENT_SCALE
+
+PENDING_MEASUREMENTS_KEY = "pending_measurement_events"
+HEARTBEAT = b": heartbeat\n\n"
+
+_hub = BroadcastHub(EXPERIMENT_STREAM_BUFFER_SIZE)
+
+
+def subscribe(experiment_id: int) -> Subscription:
+    return _hub.subscribe(experiment_id)
+
+
+async def stream_events(experiment_id: int, experiment_status: str, subscription: Subscription) -> AsyncIterator[bytes]:
+    """Yield server-sent events for an experiment until it completes; a comment is sent whenever the stream has been
+    idle for the heartbeat interval so that dead connections are noticed"""
+
+    try:
+        yield format_event("status", {"experiment_id": experiment_id, "experiment_status": experiment_status})
+
+        if experiment_status == ExperimentStatus.COMPLETED.name:
+            return
+
+        while True:
+            messages, dropped = await subscription.receive(EXPERIMENT_STREAM_HEARTBEAT_INTERVAL_IN_SECONDS)
+
+            if dropped:
+                yield format_event("dropped", {"experiment_id": experiment_id, "count": dropped})
+
+            for message in messages:
+                yield message
+
+            if subscription.closed:
+                return
+
+            if not messages and not dropped:
+                yield HEARTBEAT
+    finally:
+        _hub.unsubscribe(experiment_id, subscription)
+
+
+def publish_status(experiment: Experiment) -> None:
+    data = {"experiment_id": experiment.id, "experiment_status": experiment.experiment_status}
+    _hub.publish(experiment.id, format_event("status", data))
+
+
+def publish_import(experiment_id: int, received: int, inserted: int) -> None:
+    data = {"experiment_id": experiment_id, "received": received, "inserted": inserted}
+    _hub.publish(experiment_id, format_event("import", data))
+
+
+def record_measurements(db: Session, rows: List[dict]) -> None:
+    """Queue inserted fixed-point measurement rows to be published once the session commits"""
+
+    if rows and any(_hub.has_subscribers(experiment_id) for experiment_id in {row["experiment_id"] for row in rows}):
+        db.info.setdefault(PENDING_MEASUREMENTS_KEY, []).extend(rows)
+
+
+@event.listens_for(Session, "after_commit")
+def publish_pending_measurements(db: Session) -> None:
+    rows_by_experiment: Dict[int, List[dict]] = defaultdict(list)
+
+    for row in db.info.pop(PENDING_MEASUREMENTS_KEY, []):
+        rows_by_experiment[row["experiment_id"]].append(row)
+
+    for experiment_id, rows in rows_by_experiment.items():
+        measurements = [
+            {
+                "timestamp": row["timestamp"],
+                "voltage": fixed_point_to_float(row["voltage"], VOLTAGE_SCALE),
+                "current": fixed_point_to_float(row["current"], CURRENT_SCALE)
+            }
+            for row in rows
+        ]
+        data = {"experiment_id": experiment_id, "measurements": measurements}
+
+        _hub.publish(experiment_id, format_event("measurements", data))
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_pending_measurements(db: Session) -> None:
+    db.info.pop(PENDING_MEASUREMENTS_KEY, None)
+
+
+def close(experiment_id: int) -> None:
+    _hub.close(experiment_id)
+
+
+def close_all() -> None:
+    _hub.close_all()
+
+
+def format_event(event_type: str, data: dict) -> bytes:
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n".encode()
@@ -1,16 +1,62 @@
-from app.common.data.models import Experiment
-from app.modules.experiment.experiment_dtos import ExperimentResponse
+from typing import Dict, List, Optional
 
+from app.common.data.fixed_point import fixed_point_to_float
+from app.common.data.models import Experiment, ExperimentStats
+from app.common.domain.constants import VOLTAGE_SCALE, CURRENT_SCALE
+from app.modules.experiment.experiment_dtos import ExperimentResponse, ExperimentSummaryResponse, \
+    ExperimentOverlayResponse, ExperimentOverlaySeriesResponse
+from app.modules.measurement.measurement_columns import MeasurementColumns
 
-def experiment_to_experiment_response(experiment: Experiment) -> ExperimentResponse:
+
+def experiment_to_experiment_response(experiment: Experiment, include_summary: bool = False) -> ExperimentResponse:
     result = ExperimentResponse(
         id=experiment.id,
         experiment_status=experiment.experiment_status,
-        start_voltage=experiment.start_voltage,
-        end_voltage=experiment.end_voltage,
-        voltage_step=experiment.voltage_step,
+        start_voltage=fixed_point_to_float(experiment.start_voltage, VOLTAGE_SCALE),
+        end_voltage=fixed_point_to_float(experiment.end_voltage, VOLTAGE_SCALE),
+        voltage_step=fixed_point_to_float(experiment.voltage_step, VOLTAGE_SCALE),
         username=experiment.user.username,
-        client_id=experiment.client.identifier
+        client_id=experiment.client.identifier,
+        summary=experiment_stats_to_summary_response(experiment.id, experiment.stats) if include_summary else None
     )
 
     return result
+
+
+def experiment_stats_to_summary_response(experiment_id: int, stats: Optional[ExperimentStats]) -> ExperimentSummaryResponse:
+    if stats is None or not stats.point_count:
+        return ExperimentSummaryResponse(experiment_id=experiment_id, point_count=0)
+
+    result = ExperimentSummaryResponse(
+        experiment_id=experiment_id,
+        point_count=stats.point_count,
+        first_timestamp=stats.first_timestamp,
+        last_timestamp=stats.last_timestamp,
+        min_voltage=fixed_point_to_float(stats.min_voltage, VOLTAGE_SCALE),
+        max_voltage=fixed_point_to_float(stats.max_voltage, VOLTAGE_SCALE),
+        mean_voltage=stats.mean_voltage,
+        variance_voltage=stats.m2_voltage / stats.point_count,
+        min_current=fixed_point_to_float(stats.min_current, CURRENT_SCALE),
+        max_current=fixed_point_to_float(stats.max_current, CURRENT_SCALE),
+        mean_current=stats.mean_current,
+        variance_current=stats.m2_current / stats.point_count
+    )
+
+    return result
+
+
+def experiments_to_experiment_overlay_response(experiments: List[Experiment],
+                                               columns: Dict[int, MeasurementColumns]) -> ExperimentOverlayResponse:
+    """Build the overlay from stored points; values are already validated, so pydantic validation is skipped"""
+
+    series = {
+        experiment.id: ExperimentOverlaySeriesResponse.construct(
+            experiment=experiment_to_experiment_response(experiment),
+            timestamps=columns[experiment.id].timestamps.tolist(),
+            voltages=columns[experiment.id].voltages.tolist(),
+            currents=columns[experiment.id].currents.tolist()
+        )
+        for experiment in experiments
+    }
+
+    return ExperimentOverlayResponse.construct(experiments=series)
@@ -1,22 +1,37 @@
+import asyncio
 from typing import List, Union, Optional
 
-from fastapi import Request
-from sqlalchemy.orm import Query
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from sqlalchemy.orm import Query, joinedload
 from sqlalchemy.orm.session import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.common import notifications
+from app.common.auth.principal import Principal
 from app.common.data.enums import ExperimentStatus
-from app.common.data.models import Experiment, User, Client
+from app.common.data.fixed_point import decimal_to_fixed_point
+from app.common.data.models import Experiment, ExperimentStats, User, Client
+from app.common.domain.config import MEASUREMENT_STREAM_CLOSE_TIMEOUT_IN_SECONDS
+from app.common.domain.constants import VOLTAGE_SCALE, EVENT_STREAM_MEDIA_TYPE
 from app.common.exceptions.app_exceptions import ForbiddenException, NotFoundException, BadRequestException, \
     UpstreamServerException
+from app.common.etags import build_etag, check_not_modified
 from app.common.models import Notification
 from app.common.pagination import paginate, page_to_page_response, PageResponse
 from app.modules.client import client_service
-from app.modules.experiment.experiment_dtos import ExperimentCreateRequest, ExperimentResponse
-from app.modules.experiment.experiment_mappings import experiment_to_experiment_response
+from app.modules.experiment import experiment_events
+from app.modules.experiment.experiment_dtos import ExperimentCreateRequest, ExperimentResponse, \
+    ExperimentSummaryResponse, ExperimentOverlayRequest, ExperimentOverlayResponse
+from app.modules.experiment.experiment_mappings import experiment_to_experiment_response, \
+    experiment_stats_to_summary_response, experiments_to_experiment_overlay_response
 from app.modules.experiment.experiment_queries import SearchExperimentsQuery
-from app.modules.measurement import measurement_service
-from app.modules.measurement.measurement_dtos import MeasurementResponse
+from app.modules.measurement import measurement_buffer, measurement_codecs, measurement_partitions, measurement_service, \
+    measurement_streams
+from app.modules.measurement.measurement_dtos import MeasurementPointResponse, MeasurementAnalysisResponse, \
+    ResampledMeasurementsResponse
+from app.modules.measurement.measurement_queries import MeasurementRangeQuery, MeasurementDownsampleQuery
 from app.modules.user import user_service
 
 
@@ -53,19 +68,25 @@ def get_unfinished_experiment_for_client(db: Session, client: Client) -> Experim
                                        Experiment.client_id == client.id).first()
 
 
-def persist_experiment(db: Session, logged_in_user: User, client: Client, request: ExperimentCreateRequest) -> Experiment:
+def persist_experiment(db: Session, logged_in_user: Principal, client: Client, request: ExperimentCreateRequest) -> Experiment:
     experiment = build_experiment(logged_in_user, client, request)
+
+    db.add(experiment)
+    db.flush()
+    measurement_partitions.create_partition(db, experiment.id)
+
     return save_experiment(db, experiment)
 
 
-def build_experiment(logged_in_user: User, client: Client, request: ExperimentCreateRequest) -> Experiment:
+def build_experiment(logged_in_user: Principal, client: Client, request: ExperimentCreateRequest) -> Experiment:
     return Experiment(
         experiment_status=ExperimentStatus.INITIATED.name,
-        start_voltage=request.start_voltage,
-        end_voltage=request.end_voltage,
-        voltage_step=request.voltage_step,
+        start_voltage=decimal_to_fixed_point(request.start_voltage, VOLTAGE_SCALE),
+        end_voltage=decimal_to_fixed_point(request.end_voltage, VOLTAGE_SCALE),
+        voltage_step=decimal_to_fixed_point(request.voltage_step, VOLTAGE_SCALE),
         user_id=logged_in_user.id,
-        client_id=client.id
+        client_id=client.id,
+        stats=ExperimentStats(point_count=0, mean_voltage=0.0, m2_voltage=0.0, mean_current=0.0, m2_current=0.0)
     )
 
 
@@ -86,19 +107,27 @@ def build_notification(experiment: ExperimentResponse) -> Notification:
     return Notification(event="experiment.created", payload=experiment)
 
 
-def search_experiments(db: Session, request: Request, query: SearchExperimentsQuery) -> PageResponse:
+def search_experiments(db: Session, request: Request, response: Response,
+                       query: SearchExperimentsQuery) -> Union[PageResponse, Response]:
     logged_in_user = user_service.get_logged_in_user(db, request)
 
     db_query = filter_experiments(db, query, logged_in_user)
 
     page = paginate(db_query, query.page, query.size)
+    etag = build_etag("experiments", query.page, query.size, page.total, *map(get_experiment_version, page.content))
+    not_modified = check_not_modified(request, response, etag)
+
+    if not_modified is not None:
+        return not_modified
+
     page.content = list(map(experiment_to_experiment_response, page.content))
 
     return page_to_page_response(page)
 
 
-def filter_experiments(db: Session, query: SearchExperimentsQuery, logged_in_user: User) -> Query:
-    db_query = db.query(Experiment)
+def filter_experiments(db: Session, query: SearchExperimentsQuery, logged_in_user: Principal) -> Query:
+    db_query = db.query(Experiment) \
+        .options(joinedload(Experiment.user), joinedload(Experiment.client), joinedload(Experiment.stats))
 
     if query.experiment_status is not None:
         db_query = db_query.filter(Experiment.experiment_status == query.experiment_status)
@@ -113,24 +142,126 @@ def filter_experiments(db: Session, query: SearchExperimentsQuery, logged_in_use
     return db_query
 
 
-def get_experiment(db: Session, id: int, request: Request) -> ExperimentResponse:
+def get_experiment(db: Session, id: int, request: Request, response: Response,
+                   include_summary: bool = False) -> Union[ExperimentResponse, Response]:
+    experiment = get_visible_experiment(db, id, request)
+    etag = build_etag("experiment", include_summary, *get_experiment_version(experiment))
+    not_modified = check_not_modified(request, response, etag)
+
+    if not_modified is not None:
+        return not_modified
+
+    return experiment_to_experiment_response(experiment, include_summary)
+
+
+def get_experiment_version(experiment: Experiment) -> tuple:
+    """Values that change whenever an experiment's representation or measurements change, read from the experiment
+    and its stats row only, so conditional requests never load measurements"""
+
+    stats = experiment.stats
+
+    return (
+        experiment.id,
+        str(experiment.updated_on),
+        experiment.experiment_status,
+        experiment.user.username,
+        experiment.client.identifier,
+        stats.point_count if stats is not None else 0,
+        stats.last_timestamp if stats is not None else None
+    )
+
+
+def get_experiment_summary(db: Session, id: int, request: Request) -> ExperimentSummaryResponse:
+    experiment = get_visible_experiment(db, id, request)
+
+    return experiment_stats_to_summary_response(experiment.id, experiment.stats)
+
+
+def get_experiment_measurements(db: Session, id: int, request: Request, query: MeasurementRangeQuery) -> Response:
+    experiment = get_visible_experiment(db, id, request)
+    media_type = measurement_codecs.negotiate_media_type(request.headers.get("accept", ""))
+
+    return measurement_service.get_encoded_measurements(db, experiment, media_type, query, request)
+
+
+def export_experiment_measurements(db: Session, id: int, request: Request) -> StreamingResponse:
+    experiment = get_visible_experiment(db, id, request)
+    media_type = measurement_codecs.negotiate_export_media_type(request.headers.get("accept", ""))
+
+    return measurement_service.export_measurements(db, experiment, media_type)
+
+
+def get_experiment_downsampled_measurements(db: Session, id: int, request: Request,
+                                            query: MeasurementDownsampleQuery) -> Union[List[MeasurementPointResponse], Response]:
+    experiment = get_visible_experiment(db, id, request)
+    media_type = measurement_codecs.negotiate_media_type(request.headers.get("accept", ""))
+
+    return measurement_service.get_downsampled_measurements(db, experiment, query, media_type)
+
+
+def stream_experiment(db: Session, id: int, request: Request) -> StreamingResponse:
+    experiment = get_visible_experiment(db, id, request)
+    subscription = experiment_events.subscribe(experiment.id)
+    events = experiment_events.stream_events(experiment.id, experiment.experiment_status, subscription)
+
+    # The stream can stay open for the whole sweep, so hand the connection back to the pool instead of holding it
+    db.close()
+
+    return StreamingResponse(events, media_type=EVENT_STREAM_MEDIA_TYPE,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def get_experiment_overlay(db: Session, request: Request, overlay_data: ExperimentOverlayRequest) -> ExperimentOverlayResponse:
+    experiment_ids = list(dict.fromkeys(overlay_data.experiment_ids))
+    experiments = get_visible_experiments(db, experiment_ids, request)
+    columns = measurement_service.get_overlay_columns(db, experiments, overlay_data.points, overlay_data.method)
+
+    return experiments_to_experiment_overlay_response(experiments, columns)
+
+
+def get_visible_experiments(db: Session, ids: List[int], request: Request) -> List[Experiment]:
+    """Authorise several experiments with one query, returning them in the order of ids"""
+
     logged_in_user = user_service.get_logged_in_user(db, request)
-    experiment = get_experiment_by_id(db, id)
+    experiments = db.query(Experiment) \
+        .options(joinedload(Experiment.user), joinedload(Experiment.client), joinedload(Experiment.stats)) \
+        .filter(Experiment.id.in_(ids)) \
+        .all()
+    experiments_by_id = {experiment.id: experiment for experiment in experiments}
 
-    if not logged_in_user.is_admin and logged_in_user.id != experiment.user_id:
+    missing_ids = [id for id in ids if id not in experiments_by_id]
+
+    if missing_ids:
+        raise NotFoundException(message=f"Experiments with ids: {', '.join(map(str, missing_ids))} do not exist")
+
+    if not logged_in_user.is_admin and any(experiment.user_id != logged_in_user.id for experiment in experiments):
         raise ForbiddenException(logged_in_user.username)
 
-    return experiment_to_experiment_response(experiment)
+    return [experiments_by_id[id] for id in ids]
+
+
+def get_experiment_resampled_measurements(db: Session, id: int, request: Request) -> ResampledMeasurementsResponse:
+    experiment = get_visible_experiment(db, id, request)
+
+    return measurement_service.get_resampled_measurements(db, experiment)
+
 
+async def analyse_experiment(db: Session, id: int, request: Request) -> MeasurementAnalysisResponse:
+    experiment = get_visible_experiment(db, id, request)
+
+    return await measurement_service.analyse_measurements(db, experiment)
+
+
+def get_visible_experiment(db: Session, id: int, request: Request) -> Experiment:
+    """Get an experiment the logged in user owns, or any experiment for an admin"""
 
-def get_experiment_measurements(db: Session, id: int, request: Request) -> List[MeasurementResponse]:
     logged_in_user = user_service.get_logged_in_user(db, request)
     experiment = get_experiment_by_id(db, id)
 
     if not logged_in_user.is_admin and logged_in_user.id != experiment.user_id:
         raise ForbiddenException(logged_in_user.username)
 
-    return measurement_service.get_measurements(db, experiment.id)
+    return experiment
 
 
 def get_experiment_by_id(db: Session, id: int) -> Experiment:
@@ -152,8 +283,10 @@ def start_experiment(db, id, request) -> None:
     experiment.experiment_status = ExperimentStatus.RUNNING.name
     save_experiment(db, experiment)
 
+    experiment_events.publish_status(experiment)
 
-def validate_experiment_belongs_to_logged_in_client(logged_in_client: Client, experiment: Experiment) -> None:
+
+def validate_experiment_belongs_to_logged_in_client(logged_in_client: Principal, experiment: Experiment) -> None:
     if logged_in_client.id != experiment.client_id:
         raise ForbiddenException(logged_in_client.identifier)
 
@@ -163,7 +296,7 @@ def validate_experiment_is_initiated(experiment: Experiment) -> None:
         raise BadRequestException(f"Cannot start {experiment.experiment_status} experiment")
 
 
-def stop_experiment(db, id, request) -> None:
+async def stop_experiment(db, id, request) -> None:
     logged_in_user = get_logged_in_user(db, request)
     logged_in_client = get_logged_in_client(db, request)
 
@@ -175,25 +308,49 @@ def stop_experiment(db, id, request) -> None:
     validate_experiment_belongs_to_logged_in_user_or_client(logged_in_user, logged_in_client, experiment)
     validate_experiment_is_not_completed(experiment)
 
+    # Streamed and buffered points are written before the status changes, so COMPLETED means the data is final
+    await close_measurement_streams(experiment.id)
+    await measurement_buffer.close(experiment.id)
+
     experiment.experiment_status = ExperimentStatus.COMPLETED.name
     save_experiment(db, experiment)
 
+    experiment_events.publish_status(experiment)
+    experiment_events.close(experiment.id)
+
+    await run_in_threadpool(measurement_service.compact_measurements, db, experiment.id)
+
+
+async def close_measurement_streams(experiment_id: int) -> None:
+    """Wait for open streaming sessions to flush their last points, so they are written before compaction"""
+
+    finished = measurement_streams.close_streams(experiment_id)
+
+    if not finished:
+        return
+
+    _, pending = await asyncio.wait(finished, timeout=MEASUREMENT_STREAM_CLOSE_TIMEOUT_IN_SECONDS)
+
+    if pending:
+        logger.warning(f"{len(pending)} measurement streams of experiment {experiment_id} did not finish flushing")
+
 
-def get_logged_in_user(db: Session, request: Request) -> Optional[User]:
+def get_logged_in_user(db: Session, request: Request) -> Optional[Principal]:
     try:
         return user_service.get_logged_in_user(db, request)
     except ForbiddenException:
         return None
 
 
-def get_logged_in_client(db: Session, request: Request) -> Optional[Client]:
+def get_logged_in_client(db: Session, request: Request) -> Optional[Principal]:
     try:
         return client_service.get_logged_in_client(db, request)
     except ForbiddenException:
         return None
 
 
-def validate_experiment_belongs_to_logged_in_user_or_client(logged_in_user: User, logged_in_client: Client, experiment: Experiment) -> None:
+def validate_experiment_belongs_to_logged_in_user_or_client(logged_in_user: Optional[Principal],
+                                                            logged_in_client: Optional[Principal], experiment: Experiment) -> None:
     if logged_in_user and logged_in_user.id != experiment.user_id:
         raise ForbiddenException(logged_in_user.username)
 
@@ -0,0 +1,117 @@
+"""Cyclic-voltammetry analysis of an experiment's points.
+
+analyse runs in a worker process, so it only takes and returns plain arrays, numbers and dicts.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+from app.common.domain.config import MEASUREMENT_ANALYSIS_WORKERS
+
+VERTEX_LOW_PROGRESS = 0.25
+VERTEX_HIGH_PROGRESS = 0.75
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=MEASUREMENT_ANALYSIS_WORKERS)
+
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+
+def analyse(timestamps: np.ndarray, voltages: np.ndarray, currents: np.ndarray, start_voltage: float,
+            end_voltage: float, timestamps_per_second: float) -> dict:
+    """Split the points into sweeps, find each sweep's peak and integrate the charge passed.
+
+    Positive-going sweeps report their anodic (highest current) peak and negative-going sweeps their cathodic (lowest
+    current) peak. Charge is the trapezoidal integral of current over time, in coulombs.
+    """
+
+    if not timestamps.size:
+        return {"point_count": 0, "total_charge": 0.0, "sweeps": [], "anodic_peak": None, "cathodic_peak": None}
+
+    seconds = (timestamps - timestamps[0]) / timestamps_per_second
+    charge = np.concatenate([[0.0], np.cumsum((currents[1:] + currents[:-1]) / 2 * np.diff(seconds))])
+    boundaries = np.concatenate([[0], find_vertices(voltages, start_voltage, end_voltage), [timestamps.size - 1]])
+
+    sweeps = []
+
+    for index, (start, end) in enumerate(zip(boundaries[:-1].tolist(), boundaries[1:].tolist())):
+        positive_going = voltages[end] >= voltages[start]
+        segment = currents[start:end + 1]
+        peak = start + int(np.argmax(segment) if positive_going else np.argmin(segment))
+
+        sweeps.append({
+            "index": index,
+            "direction": "forward" if positive_going == (end_voltage >= start_voltage) else "reverse",
+            "start_timestamp": int(timestamps[start]),
+            "end_timestamp": int(timestamps[end]),
+            "start_voltage": float(voltages[start]),
+            "end_voltage": float(voltages[end]),
+            "point_count": end - start + 1,
+            "charge": float(charge[end] - charge[start]),
+            "peak_type": "anodic" if positive_going else "cathodic",
+            "peak": build_peak(timestamps, voltages, currents, peak)
+        })
+
+    return {
+        "point_count": int(timestamps.size),
+        "total_charge": float(charge[-1]),
+        "sweeps": sweeps,
+        "anodic_peak": select_peak(sweeps, "anodic", max),
+        "cathodic_peak": select_peak(sweeps, "cathodic", min)
+    }
+
+
+def find_vertices(voltages: np.ndarray, start_voltage: float, end_voltage: float) -> np.ndarray:
+    """Find the indices where the sweep direction reverses.
+
+    Each point's progress from start_voltage (0) to end_voltage (1) is classed as low, high or in between. A vertex is
+    the extreme of every low or high stretch that the sweep enters and then leaves, so noise around the vertex or the
+    middle of the window cannot split a sweep.
+    """
+
+    span = end_voltage - start_voltage
+
+    if span == 0:
+        return np.empty(0, dtype=np.int64)
+
+    progress = (voltages - start_voltage) / span
+    zones = np.where(progress >= VERTEX_HIGH_PROGRESS, 1, np.where(progress <= VERTEX_LOW_PROGRESS, -1, 0))
+    marked = np.flatnonzero(zones)
+    changes = np.flatnonzero(np.diff(zones[marked]))
+
+    vertices = []
+
+    for entered, left in zip(changes[:-1].tolist(), changes[1:].tolist()):
+        start, end = marked[entered + 1], marked[left] + 1
+        stretch = progress[start:end]
+        vertices.append(start + int(np.argmax(stretch) if zones[start] == 1 else np.argmin(stretch)))
+
+    return np.asarray(vertices, dtype=np.int64)
+
+
+def build_peak(timestamps: np.ndarray, voltages: np.ndarray, currents: np.ndarray, index: int) -> dict:
+    return {"timestamp": int(timestamps[index]), "voltage": float(voltages[index]), "current": float(currents[index])}
+
+
+def select_peak(sweeps: List[dict], peak_type: str, choose) -> Optional[dict]:
+    peaks = [sweep["peak"] for sweep in sweeps if sweep["peak_type"] == peak_type]
+
+    if not peaks:
+        return None
+
+    return choose(peaks, key=lambda peak: peak["current"])
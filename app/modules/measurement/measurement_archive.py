@@ -0,0 +1,229 @@
+"""Cold storage of completed experiments' points in compressed per-experiment files.
+
+An archive is a file header followed by blocks of up to ARCHIVE_BLOCK_POINTS points in timestamp order. Each block
+header holds its point count, first and last timestamp and payload size, so range reads skip blocks without
+decompressing them. The payload is the zlib-compressed, delta-encoded fixed-point timestamp, voltage and current
+columns.
+"""
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from datetime import datetime, timedelta
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import delete
+from sqlalchemy.orm.session import Session
+
+from app.common.data.enums import ExperimentStatus
+from app.common.data.fixed_point import FIXED_POINT_DTYPE
+from app.common.data.models import Experiment, Measurement, MeasurementChunk
+from app.common.domain.config import MEASUREMENT_ARCHIVE_DIRECTORY, MEASUREMENT_ARCHIVE_AFTER_DAYS
+from app.common.domain.database import SessionLocal, engine
+from app.common.exceptions.app_exceptions import SystemErrorException
+from app.modules.measurement import measurement_partitions, measurement_store
+from app.modules.measurement.measurement_columns import MeasurementColumns, concatenate_columns, slice_columns, \
+    merge_columns
+
+ARCHIVE_MAGIC = b"PSTATARC"
+ARCHIVE_VERSION = 1
+ARCHIVE_BLOCK_POINTS = 65536
+ARCHIVE_COMPRESSION_LEVEL = 9
+
+FILE_HEADER = struct.Struct("<8sHQ")
+BLOCK_HEADER = struct.Struct("<IqqI")
+
+
+def get_archive_path(experiment_id: int) -> str:
+    return os.path.join(MEASUREMENT_ARCHIVE_DIRECTORY, f"experiment-{experiment_id}.bin")
+
+
+def require_archive_path(experiment_id: int) -> str:
+    """Return the path of an archived experiment's file, raising a SystemErrorException when it is missing"""
+
+    path = get_archive_path(experiment_id) if MEASUREMENT_ARCHIVE_DIRECTORY is not None else None
+
+    if path is None or not os.path.isfile(path):
+        logger.error(f"The archive of experiment {experiment_id} is missing from {path or 'an unset directory'}")
+        raise SystemErrorException(f"The archive for experiment {experiment_id} is missing")
+
+    return path
+
+
+def is_archive_directory_usable() -> bool:
+    return MEASUREMENT_ARCHIVE_DIRECTORY is not None and os.path.isabs(MEASUREMENT_ARCHIVE_DIRECTORY) \
+        and os.path.isdir(MEASUREMENT_ARCHIVE_DIRECTORY)
+
+
+def archive_completed_experiments(db: Session, days: int = MEASUREMENT_ARCHIVE_AFTER_DAYS) -> List[Tuple[int, int]]:
+    """Archive every experiment COMPLETED more than days ago, returning (experiment id, point count) pairs"""
+
+    completed_before = datetime.utcnow() - timedelta(days=days)
+    experiments = db.query(Experiment).filter(
+        Experiment.experiment_status == ExperimentStatus.COMPLETED.name,
+        Experiment.archived_on.is_(None),
+        Experiment.updated_on < completed_before
+    ).order_by(Experiment.id).all()
+
+    return [(experiment.id, archive_experiment(db, experiment)) for experiment in experiments]
+
+
+def archive_experiment(db: Session, experiment: Experiment) -> int:
+    """Write an experiment's points to its archive, then delete its chunks and rows in the same transaction that marks
+    it archived. The file is complete and synced before anything is deleted, so a failure leaves the points in the
+    database and the next run overwrites the file."""
+
+    columns = merge_columns([
+        measurement_store.read_chunk_columns(db, experiment.id),
+        measurement_store.read_row_columns(db, experiment.id)
+    ])
+
+    write_archive(get_archive_path(experiment.id), columns)
+
+    db.execute(delete(MeasurementChunk).where(MeasurementChunk.experiment_id == experiment.id))
+
+    if not measurement_partitions.truncate_partition(db, experiment.id):
+        db.execute(delete(Measurement).where(Measurement.experiment_id == experiment.id))
+
+    experiment.archived_on = datetime.utcnow()
+    db.commit()
+
+    return columns.size
+
+
+def write_archive(path: str, columns: MeasurementColumns) -> None:
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(FILE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, columns.size))
+
+            for start in range(0, columns.size, ARCHIVE_BLOCK_POINTS):
+                file.write(encode_block(slice_columns(columns, start, start + ARCHIVE_BLOCK_POINTS)))
+
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.unlink(temporary_path)
+        raise
+
+
+def encode_block(columns: MeasurementColumns) -> bytes:
+    payload = b"".join(delta_encode(values).tobytes() for values in columns)
+    compressed = zlib.compress(payload, ARCHIVE_COMPRESSION_LEVEL)
+    header = BLOCK_HEADER.pack(columns.size, int(columns.timestamps[0]), int(columns.timestamps[-1]), len(compressed))
+
+    return header + compressed
+
+
+def delta_encode(values: np.ndarray) -> np.ndarray:
+    """Store the first value and then differences, which are small for steadily sampled sweeps and compress well"""
+
+    return np.diff(values.astype(FIXED_POINT_DTYPE), prepend=np.zeros(1, dtype=FIXED_POINT_DTYPE))
+
+
+def delta_decode(deltas: np.ndarray) -> np.ndarray:
+    return np.cumsum(deltas, dtype=FIXED_POINT_DTYPE)
+
+
+def iterate_archive(experiment_id: int, from_timestamp: Optional[int] = None,
+                    to_timestamp: Optional[int] = None) -> Iterator[MeasurementColumns]:
+    """Yield the fixed-point blocks of an archive that overlap [from_timestamp, to_timestamp], trimmed to the range"""
+
+    with open(require_archive_path(experiment_id), "rb") as file:
+        read_file_header(file)
+
+        while True:
+            header = file.read(BLOCK_HEADER.size)
+
+            if not header:
+                return
+
+            count, first_timestamp, last_timestamp, size = BLOCK_HEADER.unpack(header)
+
+            if from_timestamp is not None and last_timestamp < from_timestamp:
+                file.seek(size, os.SEEK_CUR)
+                continue
+            if to_timestamp is not None and first_timestamp > to_timestamp:
+                return
+
+            columns = decode_block(file.read(size), count)
+            yield measurement_store.trim_columns(columns, from_timestamp, to_timestamp)
+
+
+def read_file_header(file: BinaryIO) -> int:
+    magic, version, count = FILE_HEADER.unpack(file.read(FILE_HEADER.size))
+
+    if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+        raise ValueError(f"{file.name} is not a version {ARCHIVE_VERSION} measurement archive")
+
+    return count
+
+
+def decode_block(compressed: bytes, count: int) -> MeasurementColumns:
+    values = np.frombuffer(zlib.decompress(compressed), dtype=FIXED_POINT_DTYPE).reshape(3, count)
+    return MeasurementColumns(*(delta_decode(deltas) for deltas in values))
+
+
+def read_archive(experiment_id: int, from_timestamp: Optional[int] = None,
+                 to_timestamp: Optional[int] = None) -> MeasurementColumns:
+    return concatenate_columns(list(iterate_archive(experiment_id, from_timestamp, to_timestamp)))
+
+
+def read_archive_page(experiment_id: int, from_timestamp: Optional[int], to_timestamp: Optional[int],
+                      limit: int) -> MeasurementColumns:
+    """Decode blocks until the first limit points of the range are known"""
+
+    blocks = iterate_archive(experiment_id, from_timestamp, to_timestamp)
+    parts = []
+
+    try:
+        for columns in blocks:
+            parts.append(columns)
+
+            if sum(part.size for part in parts) >= limit:
+                break
+    finally:
+        blocks.close()
+
+    return slice_columns(concatenate_columns(parts), 0, limit)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move the points of long completed experiments to compressed files")
+    parser.add_argument("--days", type=int, default=MEASUREMENT_ARCHIVE_AFTER_DAYS,
+                        help="Archive experiments completed more than this many days ago")
+    args = parser.parse_args()
+
+    if not is_archive_directory_usable():
+        sys.exit("MEASUREMENT_ARCHIVE_DIRECTORY must be set to an absolute path of an existing directory on persistent "
+                 "storage, as archived points are deleted from the database")
+
+    db = SessionLocal()
+
+    try:
+        archived = archive_completed_experiments(db, args.days)
+    finally:
+        db.close()
+
+    for experiment_id, count in archived:
+        print(f"Archived {count} measurements of experiment {experiment_id}")
+
+    print(f"Archived {len(archived)} experiments")
+
+    dropped = measurement_partitions.drop_empty_partitions(engine)
+
+    print(f"Dropped {len(dropped)} empty measurement partitions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from loguru import logger
+from starlette.concurrency import run_in_threadpool
+
+from app.common.domain.config import MEASUREMENT_WRITE_BEHIND_BATCH_SIZE, MEASUREMENT_WRITE_BEHIND_FLUSH_INTERVAL_IN_SECONDS, \
+    MEASUREMENT_WRITE_BEHIND_MAX_ATTEMPTS, MEASUREMENT_WRITE_BEHIND_RETRY_DELAY_IN_SECONDS
+from app.common.domain.database import SessionLocal
+from app.modules.measurement import measurement_service
+from app.modules.measurement.measurement_dtos import MeasurementBufferMetricsResponse
+
+
+class PendingMeasurement:
+    def __init__(self, row: dict):
+        self.row = row
+        self.enqueued_at = time.monotonic()
+
+
+class ExperimentBuffer:
+    def __init__(self, experiment_id: int):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.ensure_future(drain(experiment_id, self.queue))
+
+
+class BufferMetrics:
+    def __init__(self):
+        self.flushes = 0
+        self.flushed_points = 0
+        self.failed_points = 0
+        self.retries = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+
+
+_buffers: Dict[int, ExperimentBuffer] = {}
+_metrics = BufferMetrics()
+
+
+def enqueue(experiment_id: int, row: dict) -> None:
+    """Queue a validated measurement row; must be called from the event loop thread"""
+
+    buffer = _buffers.get(experiment_id)
+
+    if buffer is None:
+        buffer = _buffers[experiment_id] = ExperimentBuffer(experiment_id)
+
+    buffer.queue.put_nowait(PendingMeasurement(row))
+
+
+async def flush(experiment_id: int) -> None:
+    """Wait until every measurement queued so far for the experiment has been written, or dropped after its retries"""
+
+    buffer = _buffers.get(experiment_id)
+
+    if buffer is None:
+        return
+
+    waiter = asyncio.get_running_loop().create_future()
+    buffer.queue.put_nowait(waiter)
+
+    await waiter
+
+
+async def close(experiment_id: int) -> None:
+    try:
+        await flush(experiment_id)
+    finally:
+        buffer = _buffers.pop(experiment_id, None)
+
+        if buffer is not None:
+            buffer.task.cancel()
+
+
+async def close_all() -> None:
+    for experiment_id in list(_buffers):
+        await close(experiment_id)
+
+
+async def drain(experiment_id: int, queue: asyncio.Queue) -> None:
+    while True:
+        pending, waiters = await collect_batch(queue)
+
+        try:
+            await write_batch_with_retries(experiment_id, pending)
+        except Exception as ex:
+            logger.error(f"Dropped {len(pending)} buffered measurements for experiment {experiment_id} "
+                         f"after {MEASUREMENT_WRITE_BEHIND_MAX_ATTEMPTS} attempts: {ex}")
+            _metrics.failed_points += len(pending)
+            resolve_waiters(waiters, ex)
+            continue
+
+        resolve_waiters(waiters)
+
+
+async def collect_batch(queue: asyncio.Queue):
+    """Collect queued items until the size threshold, the time threshold or a flush request is reached"""
+
+    loop = asyncio.get_running_loop()
+    pending: List[PendingMeasurement] = []
+    waiters: List[asyncio.Future] = []
+
+    item = await queue.get()
+    deadline = loop.time() + MEASUREMENT_WRITE_BEHIND_FLUSH_INTERVAL_IN_SECONDS
+
+    while True:
+        if isinstance(item, PendingMeasurement):
+            pending.append(item)
+        else:
+            waiters.append(item)
+
+        timeout = deadline - loop.time()
+
+        if waiters or len(pending) >= MEASUREMENT_WRITE_BEHIND_BATCH_SIZE or timeout <= 0:
+            return pending, waiters
+
+        try:
+            item = await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return pending, waiters
+
+
+async def write_batch_with_retries(experiment_id: int, pending: List[PendingMeasurement]) -> None:
+    """Write a batch, retrying with exponential backoff; later points wait in the queue so ordering is kept"""
+
+    delay = MEASUREMENT_WRITE_BEHIND_RETRY_DELAY_IN_SECONDS
+
+    for attempt in range(1, MEASUREMENT_WRITE_BEHIND_MAX_ATTEMPTS):
+        try:
+            await write_batch(pending)
+            return
+        except Exception as ex:
+            logger.warning(f"Attempt {attempt} to write {len(pending)} buffered measurements for experiment "
+                           f"{experiment_id} failed, retrying in {delay}s: {ex}")
+            _metrics.retries += 1
+
+        await asyncio.sleep(delay)
+        delay *= 2
+
+    await write_batch(pending)
+
+
+async def write_batch(pending: List[PendingMeasurement]) -> None:
+    if not pending:
+        return
+
+    await run_in_threadpool(write_rows, [measurement.row for measurement in pending])
+
+    latency = time.monotonic() - min(measurement.enqueued_at for measurement in pending)
+
+    _metrics.flushes += 1
+    _metrics.flushed_points += len(pending)
+    _metrics.last_flush_latency = latency
+    _metrics.max_flush_latency = max(_metrics.max_flush_latency, latency)
+    _metrics.total_flush_latency += latency
+
+
+def write_rows(rows: List[dict]) -> None:
+    db = SessionLocal()
+
+    try:
+        measurement_service.insert_measurements(db, rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+def resolve_waiters(waiters: List[asyncio.Future], ex: Optional[Exception] = None) -> None:
+    for waiter in waiters:
+        if waiter.done():
+            continue
+
+        if ex is not None:
+            waiter.set_exception(ex)
+        else:
+            waiter.set_result(None)
+
+
+def get_metrics() -> MeasurementBufferMetricsResponse:
+    queue_depths = {experiment_id: buffer.queue.qsize() for experiment_id, buffer in _buffers.items()}
+    average_flush_latency = _metrics.total_flush_latency / _metrics.flushes if _metrics.flushes else 0.0
+
+    return MeasurementBufferMetricsResponse(
+        queue_depths=queue_depths,
+        total_queue_depth=sum(queue_depths.values()),
+        flushes=_metrics.flushes,
+        flushed_points=_metrics.flushed_points,
+        failed_points=_metrics.failed_points,
+        retries=_metrics.retries,
+        last_flush_latency_in_seconds=_metrics.last_flush_latency,
+        max_flush_latency_in_seconds=_metrics.max_flush_latency,
+        average_flush_latency_in_seconds=average_flush_latency
+    )
@@ -0,0 +1,155 @@
+from typing import Optional, Tuple
+
+import msgpack
+import numpy as np
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+
+from app.common.domain.constants import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, PACKED_MEASUREMENTS_MEDIA_TYPE, \
+    CSV_MEDIA_TYPE, NDJSON_MEDIA_TYPE
+from app.common.exceptions.app_exceptions import BadRequestException, UnsupportedMediaTypeException
+from app.common.routing import get_media_type
+from app.modules.measurement.measurement_columns import MEASUREMENT_RECORD_DTYPE, MeasurementColumns, \
+    records_to_columns, columns_to_records
+from app.modules.measurement.measurement_dtos import MeasurementCreateRequest
+
+BINARY_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, PACKED_MEASUREMENTS_MEDIA_TYPE)
+EXPORT_MEDIA_TYPES = (NDJSON_MEDIA_TYPE, CSV_MEDIA_TYPE)
+CSV_HEADER = b"timestamp,voltage,current\n"
+
+
+def get_content_media_type(request: Request) -> str:
+    return get_media_type(request.headers.get("content-type", ""))
+
+
+def get_binary_body(request: Request) -> Optional[bytes]:
+    return getattr(request.state, "binary_body", None)
+
+
+def decode_measurement(request: Request) -> MeasurementCreateRequest:
+    media_type = get_content_media_type(request)
+
+    if media_type != MSGPACK_MEDIA_TYPE:
+        raise UnsupportedMediaTypeException(media_type)
+
+    payload = unpack_msgpack(get_binary_body(request))
+
+    try:
+        return MeasurementCreateRequest.parse_obj(payload)
+    except ValidationError as ex:
+        raise RequestValidationError([ErrorWrapper(ex, ("body",))])
+
+
+def decode_measurement_batch(request: Request, experiment_id: Optional[int]) -> Tuple[int, MeasurementColumns]:
+    media_type = get_content_media_type(request)
+    body = get_binary_body(request)
+
+    if media_type == PACKED_MEASUREMENTS_MEDIA_TYPE:
+        columns = decode_packed_measurements(body)
+    elif media_type == MSGPACK_MEDIA_TYPE:
+        payload = unpack_msgpack(body)
+
+        if not isinstance(payload, dict):
+            raise BadRequestException("Msgpack payload must be a map with \"experiment_id\" and \"measurements\"")
+
+        experiment_id = payload.get("experiment_id", experiment_id)
+        columns = decode_msgpack_measurements(payload.get("measurements"))
+    else:
+        raise UnsupportedMediaTypeException(media_type)
+
+    if not isinstance(experiment_id, int):
+        raise BadRequestException("An integer experiment_id is required")
+
+    return experiment_id, columns
+
+
+def decode_packed_measurements(body: bytes) -> MeasurementColumns:
+    """Decode little-endian (int64 timestamp, float64 voltage, float64 current) records in one pass"""
+
+    if len(body) % MEASUREMENT_RECORD_DTYPE.itemsize:
+        raise BadRequestException(
+            f"Packed measurements must be a whole number of {MEASUREMENT_RECORD_DTYPE.itemsize}-byte records"
+        )
+
+    return records_to_columns(np.frombuffer(body, dtype=MEASUREMENT_RECORD_DTYPE))
+
+
+def decode_msgpack_measurements(measurements) -> MeasurementColumns:
+    """Decode points given either as [timestamp, voltage, current] arrays or as maps with those keys"""
+
+    try:
+        records = [
+            (point["timestamp"], point["voltage"], point["current"]) if isinstance(point, dict) else tuple(point)
+            for point in measurements
+        ]
+
+        return records_to_columns(np.array(records, dtype=MEASUREMENT_RECORD_DTYPE))
+    except (KeyError, TypeError, ValueError):
+        raise BadRequestException("Measurements must be [timestamp, voltage, current] arrays or maps with those keys")
+
+
+def unpack_msgpack(body: bytes):
+    try:
+        return msgpack.unpackb(body, raw=False)
+    except (ValueError, msgpack.UnpackException) as ex:
+        raise BadRequestException(f"Malformed msgpack payload: {ex}")
+
+
+def negotiate_media_type(accept: str) -> str:
+    """Pick the first supported media type from an Accept header, falling back to JSON"""
+
+    for candidate in accept.split(","):
+        media_type = get_media_type(candidate)
+
+        if media_type in BINARY_MEDIA_TYPES:
+            return media_type
+
+        if media_type in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            return JSON_MEDIA_TYPE
+
+    return JSON_MEDIA_TYPE
+
+
+def encode_measurements(media_type: str, experiment_id: int, columns: MeasurementColumns) -> bytes:
+    if media_type == PACKED_MEASUREMENTS_MEDIA_TYPE:
+        return columns_to_records(columns).tobytes()
+
+    if media_type == MSGPACK_MEDIA_TYPE:
+        measurements = list(zip(columns.timestamps.tolist(), columns.voltages.tolist(), columns.currents.tolist()))
+        return msgpack.packb({"experiment_id": experiment_id, "measurements": measurements})
+
+    raise UnsupportedMediaTypeException(media_type)
+
+
+def encode_json(content) -> bytes:
+    """Serialise content exactly as FastAPI's default JSON response would"""
+
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+
+def negotiate_export_media_type(accept: str) -> str:
+    """Pick the first export format from an Accept header, falling back to NDJSON"""
+
+    for candidate in accept.split(","):
+        media_type = get_media_type(candidate)
+
+        if media_type in EXPORT_MEDIA_TYPES:
+            return media_type
+
+    return NDJSON_MEDIA_TYPE
+
+
+def encode_export_lines(media_type: str, experiment_id: int, columns: MeasurementColumns) -> bytes:
+    rows = zip(columns.timestamps.tolist(), columns.voltages.tolist(), columns.currents.tolist())
+
+    if media_type == CSV_MEDIA_TYPE:
+        return "".join(f"{timestamp},{voltage},{current}\n" for timestamp, voltage, current in rows).encode()
+
+    return "".join(
+        f'{{"timestamp":{timestamp},"voltage":{voltage},"current":{current},"experiment_id":{experiment_id}}}\n'
+        for timestamp, voltage, current in rows
+    ).encode()
@@ -0,0 +1,106 @@
+from typing import Iterable, List, NamedTuple, Sequence
+
+import numpy as np
+
+MEASUREMENT_RECORD_DTYPE = np.dtype([("timestamp", "<i8"), ("voltage", "<f8"), ("current", "<f8")])
+FIXED_POINT_RECORD_DTYPE = np.dtype([("timestamp", "<i8"), ("voltage", "<i8"), ("current", "<i8")])
+
+
+class MeasurementColumns(NamedTuple):
+    timestamps: np.ndarray
+    voltages: np.ndarray
+    currents: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return self.timestamps.size
+
+
+def empty_columns() -> MeasurementColumns:
+    return records_to_columns(np.empty(0, dtype=MEASUREMENT_RECORD_DTYPE))
+
+
+def records_to_columns(records: np.ndarray) -> MeasurementColumns:
+    return MeasurementColumns(
+        timestamps=np.ascontiguousarray(records["timestamp"], dtype=np.int64),
+        voltages=np.ascontiguousarray(records["voltage"], dtype=records.dtype["voltage"]),
+        currents=np.ascontiguousarray(records["current"], dtype=records.dtype["current"])
+    )
+
+
+def columns_to_records(columns: MeasurementColumns) -> np.ndarray:
+    records = np.empty(columns.size, dtype=MEASUREMENT_RECORD_DTYPE)
+    records["timestamp"] = columns.timestamps
+    records["voltage"] = columns.voltages
+    records["current"] = columns.currents
+
+    return records
+
+
+def points_to_columns(points: Sequence) -> MeasurementColumns:
+    """Build columns from objects exposing timestamp, voltage and current attributes"""
+
+    return MeasurementColumns(
+        timestamps=np.fromiter((point.timestamp for point in points), dtype=np.int64, count=len(points)),
+        voltages=np.fromiter((point.voltage for point in points), dtype=np.float64, count=len(points)),
+        currents=np.fromiter((point.current for point in points), dtype=np.float64, count=len(points))
+    )
+
+
+def rows_to_columns(rows: Iterable[Sequence], dtype: np.dtype = MEASUREMENT_RECORD_DTYPE) -> MeasurementColumns:
+    """Build columns from (timestamp, voltage, current) tuples such as database result rows"""
+
+    records = np.array([tuple(row) for row in rows], dtype=dtype)
+    return records_to_columns(records)
+
+
+def columns_to_rows(columns: MeasurementColumns, experiment_id: int) -> List[dict]:
+    timestamps = columns.timestamps.tolist()
+    voltages = columns.voltages.tolist()
+    currents = columns.currents.tolist()
+
+    return [
+        {"timestamp": timestamp, "voltage": voltage, "current": current, "experiment_id": experiment_id}
+        for timestamp, voltage, current in zip(timestamps, voltages, currents)
+    ]
+
+
+def concatenate_columns(parts: List[MeasurementColumns]) -> MeasurementColumns:
+    if not parts:
+        return empty_columns()
+
+    return MeasurementColumns(
+        timestamps=np.concatenate([part.timestamps for part in parts]),
+        voltages=np.concatenate([part.voltages for part in parts]),
+        currents=np.concatenate([part.currents for part in parts])
+    )
+
+
+def take_columns(columns: MeasurementColumns, indices: np.ndarray) -> MeasurementColumns:
+    """Select points by index array or boolean mask"""
+
+    return MeasurementColumns(
+        timestamps=columns.timestamps[indices],
+        voltages=columns.voltages[indices],
+        currents=columns.currents[indices]
+    )
+
+
+def slice_columns(columns: MeasurementColumns, start: int, stop: int) -> MeasurementColumns:
+    return MeasurementColumns(
+        timestamps=columns.timestamps[start:stop],
+        voltages=columns.voltages[start:stop],
+        currents=columns.currents[start:stop]
+    )
+
+
+def merge_columns(parts: List[MeasurementColumns]) -> MeasurementColumns:
+    """Concatenate parts and restore timestamp order when more than one part holds points"""
+
+    parts = [part for part in parts if part.size]
+
+    if len(parts) == 1:
+        return parts[0]
+
+    columns = concatenate_columns(parts)
+    return take_columns(columns, np.argsort(columns.timestamps, kind="stable"))
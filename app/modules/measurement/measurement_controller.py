@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends, Request
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Request, WebSocket
 from sqlalchemy.orm.session import Session
 
 from app.common.auth.bearer import BearerAuth
-from app.common.data.dtos import ValidationErrorResponse
-from app.common.domain.constants import MEASUREMENTS_URL
+from app.common.data.dtos import ErrorResponse, ValidationErrorResponse
+from app.common.domain.constants import MEASUREMENTS_URL, MSGPACK_MEDIA_TYPE, PACKED_MEASUREMENTS_MEDIA_TYPE, \
+    CSV_MEDIA_TYPE
 from app.common.domain.database import get_db
+from app.common.routing import BinaryBodyRoute
 from app.modules.measurement import measurement_service
-from app.modules.measurement.measurement_dtos import MeasurementResponse, MeasurementCreateRequest
+from app.modules.measurement.measurement_dtos import MeasurementResponse, MeasurementCreateRequest, \
+    MeasurementBatchCreateRequest, MeasurementBatchResponse, MeasurementBufferMetricsResponse
 
 controller = APIRouter(
     prefix=MEASUREMENTS_URL,
-    tags=["Measurements"]
+    tags=["Measurements"],
+    route_class=BinaryBodyRoute
 )
 
+BINARY_BODY = {"schema": {"type": "string", "format": "binary"}}
+
 
 @controller.post(
     path="",
@@ -20,13 +28,98 @@ controller = APIRouter(
     status_code=200,
     responses={
         200: {"model": MeasurementResponse},
+        415: {"model": ErrorResponse},
         422: {"model": ValidationErrorResponse}
-    }
+    },
+    openapi_extra={"requestBody": {"content": {MSGPACK_MEDIA_TYPE: BINARY_BODY}}}
 )
 async def create_measurement(
-        measurement_data: MeasurementCreateRequest,
         request: Request,
+        measurement_data: Optional[MeasurementCreateRequest] = None,
         db: Session = Depends(get_db)
 ):
     """Create new measurement"""
     return measurement_service.create_measurement(db, request, measurement_data)
+
+
+@controller.post(
+    path="/batch",
+    dependencies=[Depends(BearerAuth())],
+    status_code=200,
+    responses={
+        200: {"model": MeasurementBatchResponse},
+        400: {"model": ErrorResponse},
+        403: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        415: {"model": ErrorResponse},
+        422: {"model": ValidationErrorResponse}
+    },
+    openapi_extra={"requestBody": {"content": {MSGPACK_MEDIA_TYPE: BINARY_BODY, PACKED_MEASUREMENTS_MEDIA_TYPE: BINARY_BODY}}}
+)
+async def create_measurements(
+        request: Request,
+        batch_data: Optional[MeasurementBatchCreateRequest] = None,
+        experiment_id: Optional[int] = None,
+        db: Session = Depends(get_db)
+):
+    """Create measurements for an experiment in bulk from JSON, msgpack or packed little-endian records.
+
+    Packed bodies are (int64 timestamp, float64 voltage, float64 current) records and take the experiment id from the
+    experiment_id query parameter.
+    """
+    return measurement_service.create_measurements(db, request, batch_data, experiment_id)
+
+
+@controller.post(
+    path="/import",
+    dependencies=[Depends(BearerAuth())],
+    status_code=200,
+    responses={
+        200: {"model": MeasurementBatchResponse},
+        400: {"model": ErrorResponse},
+        403: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        415: {"model": ErrorResponse}
+    },
+    openapi_extra={"requestBody": {"required": True, "content": {CSV_MEDIA_TYPE: {"schema": {"type": "string"}}}}}
+)
+async def import_measurements(
+        request: Request,
+        experiment_id: int,
+        header: bool = False,
+        db: Session = Depends(get_db)
+):
+    """Import a large offline run from timestamp,voltage,current CSV lines.
+
+    The body is streamed into the database without being held in memory, using COPY on PostgreSQL. Set header to skip
+    the first line.
+    """
+    return await measurement_service.import_measurements(db, request, experiment_id, header)
+
+
+@controller.websocket("/stream")
+async def stream_measurements(
+        websocket: WebSocket,
+        experiment_id: int,
+        db: Session = Depends(get_db)
+):
+    """Stream measurements for a running experiment over a single authenticated connection"""
+    await measurement_service.stream_measurements(db, websocket, experiment_id)
+
+
+@controller.get(
+    path="/buffer-metrics",
+    dependencies=[Depends(BearerAuth())],
+    status_code=200,
+    responses={
+        200: {"model": MeasurementBufferMetricsResponse},
+        401: {"model": ErrorResponse},
+        403: {"model": ErrorResponse}
+    }
+)
+async def get_buffer_metrics(
+        request: Request,
+        db: Session = Depends(get_db)
+):
+    """Get write-behind buffer queue depth and flush latency"""
+    return measurement_service.get_buffer_metrics(db, request)
@@ -0,0 +1,62 @@
+import numpy as np
+
+from app.common.data.enums import DownsamplingMethod
+from app.modules.measurement.measurement_columns import MeasurementColumns, take_columns
+
+
+def downsample(columns: MeasurementColumns, points: int, method: DownsamplingMethod) -> MeasurementColumns:
+    """Reduce columns to at most points points, keeping the shape of current over time"""
+
+    if columns.size <= points:
+        return columns
+
+    if method == DownsamplingMethod.MINMAX:
+        return take_columns(columns, minmax_indices(columns, points))
+
+    return take_columns(columns, lttb_indices(columns, points))
+
+
+def bucket_edges(size: int, buckets: int) -> np.ndarray:
+    return np.linspace(0, size, buckets + 1).astype(np.int64)
+
+
+def minmax_indices(columns: MeasurementColumns, points: int) -> np.ndarray:
+    """Keep the lowest and highest current of each of points / 2 equal-count buckets, in timestamp order"""
+
+    buckets = max(points // 2, 1)
+    bucket_ids = np.repeat(np.arange(buckets), np.diff(bucket_edges(columns.size, buckets)))
+
+    order = np.lexsort((columns.currents, bucket_ids))
+    starts = np.searchsorted(bucket_ids[order], np.arange(buckets))
+    ends = np.append(starts[1:], columns.size) - 1
+
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+def lttb_indices(columns: MeasurementColumns, points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: keep the first and last points and, from each bucket in between, the point
+    forming the largest triangle with the previously kept point and the average of the next bucket"""
+
+    x = (columns.timestamps - columns.timestamps[0]).astype(np.float64)
+    y = columns.currents
+    edges = bucket_edges(columns.size - 2, points - 2) + 1
+
+    indices = np.empty(points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = columns.size - 1
+
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else columns.size
+
+        average_x = x[next_start:next_end].mean()
+        average_y = y[next_start:next_end].mean()
+        previous = indices[bucket]
+
+        areas = np.abs(
+            (x[previous] - average_x) * (y[start:end] - y[previous]) -
+            (x[previous] - x[start:end]) * (average_y - y[previous])
+        )
+        indices[bucket + 1] = start + int(np.argmax(areas))
+
+    return indices
@@ -1,18 +1,99 @@
-from decimal import Decimal
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, conlist
+
+from app.common.domain.config import MEASUREMENT_BATCH_MAX_SIZE
 
 
 class MeasurementResponse(BaseModel):
-    id: int
+    id: Optional[int]
+    timestamp: int
+    voltage: float
+    current: float
+    experiment_id: int
+
+
+class MeasurementPointResponse(BaseModel):
     timestamp: int
-    voltage: Decimal
-    current: Decimal
+    voltage: float
+    current: float
     experiment_id: int
 
 
 class MeasurementCreateRequest(BaseModel):
     experiment_id: int
     timestamp: int
-    voltage: Decimal
-    current: Decimal
+    voltage: float
+    current: float
+
+
+class MeasurementPointRequest(BaseModel):
+    timestamp: int
+    voltage: float
+    current: float
+
+
+class MeasurementBatchCreateRequest(BaseModel):
+    experiment_id: int
+    measurements: conlist(MeasurementPointRequest, min_items=1, max_items=MEASUREMENT_BATCH_MAX_SIZE)
+
+
+class MeasurementBatchResponse(BaseModel):
+    experiment_id: int
+    received: int
+    inserted: int
+
+
+class MeasurementBufferMetricsResponse(BaseModel):
+    queue_depths: Dict[int, int]
+    total_queue_depth: int
+    flushes: int
+    flushed_points: int
+    failed_points: int
+    retries: int
+    last_flush_latency_in_seconds: float
+    max_flush_latency_in_seconds: float
+    average_flush_latency_in_seconds: float
+
+
+class PeakResponse(BaseModel):
+    timestamp: int
+    voltage: float
+    current: float
+
+
+class SweepAnalysisResponse(BaseModel):
+    index: int
+    direction: str
+    start_timestamp: int
+    end_timestamp: int
+    start_voltage: float
+    end_voltage: float
+    point_count: int
+    charge: float
+    peak_type: str
+    peak: PeakResponse
+
+
+class MeasurementAnalysisResponse(BaseModel):
+    experiment_id: int
+    point_count: int
+    total_charge: float
+    sweeps: List[SweepAnalysisResponse]
+    anodic_peak: Optional[PeakResponse]
+    cathodic_peak: Optional[PeakResponse]
+
+
+class ResampledSweepResponse(BaseModel):
+    index: int
+    direction: str
+    start_timestamp: int
+    end_timestamp: int
+    currents: List[Optional[float]]
+
+
+class ResampledMeasurementsResponse(BaseModel):
+    experiment_id: int
+    point_count: int
+    voltages: List[float]
+    sweeps: List[ResampledSweepResponse]
@@ -0,0 +1,208 @@
+"""Bulk import of measurement CSV uploads.
+
+Run ``python -m app.modules.measurement.measurement_import --help`` to import a file from the command line.
+"""
+import argparse
+import csv
+import io
+import sys
+from itertools import islice
+from typing import AsyncIterator, BinaryIO, Optional, Tuple
+
+import anyio
+import numpy as np
+import psycopg2
+from sqlalchemy.orm.session import Session
+
+from app.common.data.models import Experiment
+from app.common.domain.config import MEASUREMENT_IMPORT_CHUNK_SIZE
+from app.common.domain.constants import VOLTAGE_SCALE, CURRENT_SCALE
+from app.common.domain.database import SessionLocal
+from app.common.exceptions.app_exceptions import AppDomainException, BadRequestException
+from app.modules.client import client_service
+from app.modules.measurement import measurement_service, measurement_stats, measurement_store
+from app.modules.measurement.measurement_columns import MEASUREMENT_RECORD_DTYPE, records_to_columns
+
+COPY_TABLE = "measurement_imports"
+POINTS_TABLE = "measurement_import_points"
+
+
+class RequestBodyReader(io.RawIOBase):
+    """Blocking file-like view of a request body stream, for use from a worker thread started by anyio"""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self.chunks = chunks
+        self.pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self.pending:
+            chunk = anyio.from_thread.run(self.next_chunk)
+
+            if chunk is None:
+                return 0
+
+            self.pending = chunk
+
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+
+        return size
+
+    async def next_chunk(self) -> Optional[bytes]:
+        try:
+            return await self.chunks.__anext__()
+        except StopAsyncIteration:
+            return None
+
+
+def import_csv(db: Session, experiment: Experiment, source: BinaryIO, header: bool = False) -> Tuple[int, int]:
+    """Import timestamp,voltage,current lines in one transaction, returning the received and inserted counts.
+
+    Points whose timestamp is already stored for the experiment are skipped, as with the other ingestion paths.
+    """
+
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            result = copy_csv(db, experiment, source, header)
+        else:
+            result = insert_csv(db, experiment, source, header)
+    except Exception:
+        db.rollback()
+        raise
+
+    db.commit()
+
+    return result
+
+
+def copy_csv(db: Session, experiment: Experiment, source: BinaryIO, header: bool) -> Tuple[int, int]:
+    """Stream the upload into a temporary table with COPY, then move the new points into measurements and the stats"""
+
+    stats = measurement_stats.lock_stats(db, experiment.id)
+    cursor = db.connection().connection.cursor()
+
+    try:
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {COPY_TABLE} "
+            f'("timestamp" BIGINT, voltage DOUBLE PRECISION, "current" DOUBLE PRECISION) ON COMMIT DROP'
+        )
+        cursor.copy_expert(f"COPY {COPY_TABLE} FROM STDIN WITH (FORMAT csv, HEADER {str(header).lower()})", source)
+        received = cursor.rowcount
+
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {POINTS_TABLE} ON COMMIT DROP AS "
+            f'SELECT DISTINCT ON (i."timestamp") i."timestamp", ROUND(i.voltage * {VOLTAGE_SCALE})::bigint AS voltage, '
+            f'ROUND(i."current" * {CURRENT_SCALE})::bigint AS "current" FROM {COPY_TABLE} i '
+            f'WHERE NOT EXISTS (SELECT 1 FROM measurements m WHERE m.experiment_id = %s AND m."timestamp" = i."timestamp") '
+            f'ORDER BY i."timestamp"',
+            (experiment.id,)
+        )
+        cursor.execute(
+            f'SELECT count(*), min("timestamp"), max("timestamp"), '
+            f'min(voltage), max(voltage), avg(voltage / {VOLTAGE_SCALE}.0), var_pop(voltage / {VOLTAGE_SCALE}.0), '
+            f'min("current"), max("current"), avg("current" / {CURRENT_SCALE}.0), '
+            f'var_pop("current" / {CURRENT_SCALE}.0) FROM {POINTS_TABLE}'
+        )
+        aggregates = cursor.fetchone()
+
+        cursor.execute(
+            f'INSERT INTO measurements (created_on, is_deleted, "timestamp", voltage, "current", experiment_id) '
+            f'SELECT timezone(\'utc\', now()), false, "timestamp", voltage, "current", %s FROM {POINTS_TABLE} '
+            f'ON CONFLICT (experiment_id, "timestamp") DO NOTHING',
+            (experiment.id,)
+        )
+        inserted = cursor.rowcount
+    except psycopg2.DataError as ex:
+        raise BadRequestException(f"Invalid measurement CSV: {str(ex).splitlines()[0]}")
+    finally:
+        cursor.close()
+
+    if aggregates[0]:
+        measurement_stats.merge_stats(stats, aggregates_to_stats(*aggregates))
+
+    return received, inserted
+
+
+def aggregates_to_stats(count, first_timestamp, last_timestamp, min_voltage, max_voltage, mean_voltage,
+                        variance_voltage, min_current, max_current, mean_current,
+                        variance_current) -> measurement_stats.PointStats:
+    return measurement_stats.PointStats(
+        count=count,
+        first_timestamp=first_timestamp,
+        last_timestamp=last_timestamp,
+        min_voltage=min_voltage,
+        max_voltage=max_voltage,
+        mean_voltage=float(mean_voltage),
+        m2_voltage=float(variance_voltage) * count,
+        min_current=min_current,
+        max_current=max_current,
+        mean_current=float(mean_current),
+        m2_current=float(variance_current) * count
+    )
+
+
+def insert_csv(db: Session, experiment: Experiment, source: BinaryIO, header: bool) -> Tuple[int, int]:
+    """Parse the upload in chunks and write each chunk with executemany, for dialects without COPY"""
+
+    lines = csv.reader(io.TextIOWrapper(source, encoding="utf-8", newline=""))
+    statement = measurement_service.build_measurement_insert(db)
+    received = 0
+    inserted = 0
+
+    if header:
+        next(lines, None)
+
+    while True:
+        records = [tuple(line) for line in islice(lines, MEASUREMENT_IMPORT_CHUNK_SIZE) if line]
+
+        if not records:
+            return received, inserted
+
+        rows = measurement_store.build_rows(experiment.id, parse_records(records, received))
+        received += len(rows)
+        rows = measurement_stats.record_new_rows(db, rows)
+
+        if rows:
+            inserted += db.execute(statement, rows).rowcount
+
+
+def parse_records(records: list, offset: int):
+    try:
+        return records_to_columns(np.array(records, dtype=MEASUREMENT_RECORD_DTYPE))
+    except (TypeError, ValueError) as ex:
+        raise BadRequestException(f"Invalid measurement CSV after line {offset}: {ex}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import timestamp,voltage,current CSV lines into a running experiment")
+    parser.add_argument("file", help="CSV file to import, or - to read from stdin")
+    parser.add_argument("--experiment-id", type=int, required=True)
+    parser.add_argument("--client-id", required=True, help="Identifier of the client that owns the experiment")
+    parser.add_argument("--header", action="store_true", help="Skip the first line of the file")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+
+    try:
+        client = client_service.get_client_by_identifier(db, args.client_id)
+        experiment = measurement_service.get_writable_experiment(db, client, args.experiment_id)
+
+        if args.file == "-":
+            received, inserted = import_csv(db, experiment, sys.stdin.buffer, args.header)
+        else:
+            with open(args.file, "rb") as source:
+                received, inserted = import_csv(db, experiment, source, args.header)
+    except AppDomainException as ex:
+        sys.exit(ex.message)
+    finally:
+        db.close()
+
+    print(f"Imported {inserted} of {received} measurements into experiment {args.experiment_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,67 @@
+from typing import List
+
+import numpy as np
+
+from app.common.data.fixed_point import fixed_point_to_float
 from app.common.data.models import Measurement
-from app.modules.measurement.measurement_dtos import MeasurementResponse
+from app.common.domain.constants import VOLTAGE_SCALE, CURRENT_SCALE
+from app.modules.measurement.measurement_columns import MeasurementColumns
+from app.modules.measurement.measurement_dtos import MeasurementResponse, MeasurementCreateRequest, \
+    MeasurementPointResponse, ResampledMeasurementsResponse, ResampledSweepResponse
 
 
 def measurement_to_measurement_response(measurement: Measurement) -> MeasurementResponse:
     result = MeasurementResponse(
         id=measurement.id,
         timestamp=measurement.timestamp,
-        voltage=measurement.voltage,
-        current=measurement.current,
+        voltage=fixed_point_to_float(measurement.voltage, VOLTAGE_SCALE),
+        current=fixed_point_to_float(measurement.current, CURRENT_SCALE),
         experiment_id=measurement.experiment.id
     )
 
     return result
+
+
+def measurement_create_to_queued_measurement_response(measurement_data: MeasurementCreateRequest) -> MeasurementResponse:
+    result = MeasurementResponse(
+        timestamp=measurement_data.timestamp,
+        voltage=measurement_data.voltage,
+        current=measurement_data.current,
+        experiment_id=measurement_data.experiment_id
+    )
+
+    return result
+
+
+def columns_to_measurement_responses(experiment_id: int,
+                                     columns: MeasurementColumns) -> List[MeasurementPointResponse]:
+    """Build responses for stored points; values are already validated, so pydantic validation is skipped"""
+
+    return [
+        MeasurementPointResponse.construct(timestamp=timestamp, voltage=voltage, current=current, experiment_id=experiment_id)
+        for timestamp, voltage, current in zip(
+            columns.timestamps.tolist(), columns.voltages.tolist(), columns.currents.tolist()
+        )
+    ]
+
+
+def resampled_to_resampled_measurements_response(experiment_id: int, voltages: np.ndarray,
+                                                 resampled: dict) -> ResampledMeasurementsResponse:
+    sweeps = [
+        ResampledSweepResponse.construct(**{**sweep, "currents": nan_to_none(sweep["currents"])})
+        for sweep in resampled["sweeps"]
+    ]
+
+    return ResampledMeasurementsResponse.construct(
+        experiment_id=experiment_id,
+        point_count=resampled["point_count"],
+        voltages=voltages.tolist(),
+        sweeps=sweeps
+    )
+
+
+def nan_to_none(values: np.ndarray) -> list:
+    result = values.astype(object)
+    result[np.isnan(values)] = None
+
+    return result.tolist()
@@ -0,0 +1,164 @@
+"""Per-experiment partitions of the measurements table on PostgreSQL.
+
+Migration 11 turns measurements into a table LIST-partitioned by experiment_id, with one partition per experiment.
+Every measurement query filters on experiment_id, so the planner only visits the experiment's partition, and removing
+an experiment's staged rows is a TRUNCATE of its partition instead of a mass DELETE.
+
+A partition is created with its experiment and emptied when its rows are compacted into chunks or, with rows storage,
+archived. The nightly archive job then detaches and drops the empty partitions of finished experiments; migration 15
+removed the default partition so that detaching does not lock the whole table. On other databases, and on PostgreSQL
+databases that have not been migrated, every function is a no-op.
+"""
+from typing import List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.session import Session
+
+from app.common.data.enums import ExperimentStatus
+from app.common.domain.config import MEASUREMENT_PARTITION_LOCK_TIMEOUT_IN_MILLISECONDS
+from app.common.exceptions.app_exceptions import ServiceUnavailableException
+
+LOCK_NOT_AVAILABLE = "55P03"
+
+_partitioned: Optional[bool] = None
+
+
+def is_partitioned(db: Session) -> bool:
+    global _partitioned
+
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+
+    if _partitioned is None:
+        _partitioned = db.execute(text("SELECT relkind = 'p' FROM pg_class WHERE oid = 'measurements'::regclass")).scalar()
+
+    return _partitioned
+
+
+def get_partition_name(experiment_id: int) -> str:
+    return f"measurements_experiment_{int(experiment_id)}"
+
+
+def create_partition(db: Session, experiment_id: int) -> None:
+    """Create the partition an experiment's rows are routed to, in the caller's transaction.
+
+    CREATE TABLE ... PARTITION OF would take ACCESS EXCLUSIVE on measurements, so the table is created on its own and
+    then attached, which only takes SHARE UPDATE EXCLUSIVE and lets reads and writes of other experiments carry on.
+    The attach waits at most MEASUREMENT_PARTITION_LOCK_TIMEOUT_IN_MILLISECONDS behind a conflicting lock, so a blocked
+    creation fails fast with a 503 instead of queueing every other query on measurements behind it.
+    """
+
+    if not is_partitioned(db):
+        return
+
+    name = get_partition_name(experiment_id)
+
+    try:
+        db.execute(text(f"SET LOCAL lock_timeout = {int(MEASUREMENT_PARTITION_LOCK_TIMEOUT_IN_MILLISECONDS)}"))
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} (LIKE measurements INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        ))
+        db.execute(text(f"ALTER TABLE measurements ATTACH PARTITION {name} FOR VALUES IN ({int(experiment_id)})"))
+        db.execute(text("SET LOCAL lock_timeout TO DEFAULT"))
+    except OperationalError as ex:
+        if getattr(ex.orig, "pgcode", None) != LOCK_NOT_AVAILABLE:
+            raise
+
+        db.rollback()
+        logger.warning(f"Timed out waiting for a lock to create the measurements partition of experiment {experiment_id}")
+        raise ServiceUnavailableException("The measurements table is busy, please retry shortly")
+
+
+def truncate_partition(db: Session, experiment_id: int, max_id: Optional[int] = None) -> bool:
+    """Empty an experiment's partition in the caller's transaction, returning whether it was emptied.
+
+    Only the partition is locked, so reads and writes of other experiments carry on. With max_id set, the partition is
+    only emptied when it holds no row with a greater id, so rows written after the caller read the partition are never
+    lost; callers fall back to a DELETE when False is returned. The empty partition is dropped later by
+    drop_empty_partitions.
+    """
+
+    if not is_partitioned(db):
+        return False
+
+    name = get_partition_name(experiment_id)
+
+    if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+        return False
+
+    db.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+
+    if max_id is not None and db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name} WHERE id > :max_id)"),
+                                         {"max_id": max_id}).scalar():
+        return False
+
+    db.execute(text(f"TRUNCATE {name}"))
+
+    return True
+
+
+def get_droppable_partitions(connection: Connection) -> List[Tuple[int, str, bool]]:
+    """Find the partitions of experiments that are COMPLETED or no longer exist, with whether a detach is pending"""
+
+    return connection.execute(text("""
+        SELECT CAST(substring(child.relname FROM 'measurements_experiment_([0-9]+)$') AS INTEGER), child.relname,
+               inherits.inhdetachpending
+        FROM pg_inherits inherits
+        JOIN pg_class child ON child.oid = inherits.inhrelid
+        LEFT JOIN experiments ON experiments.id = CAST(substring(child.relname FROM 'measurements_experiment_([0-9]+)$')
+                                                       AS INTEGER)
+        WHERE inherits.inhparent = 'measurements'::regclass
+          AND child.relname ~ '^measurements_experiment_[0-9]+$'
+          AND (experiments.id IS NULL OR experiments.experiment_status = :completed)
+        ORDER BY child.relname
+    """), {"completed": ExperimentStatus.COMPLETED.name}).all()
+
+
+def drop_empty_partitions(engine: Engine) -> List[int]:
+    """Detach and drop the empty partitions of finished experiments, returning their experiment ids.
+
+    DETACH PARTITION CONCURRENTLY cannot run in a transaction, so this runs on an autocommit connection as its own job;
+    it only takes SHARE UPDATE EXCLUSIVE on measurements, so reads and writes of running experiments are not blocked.
+    A detach interrupted by a previous run is finalized first. A partition that received rows after the emptiness
+    check is attached again instead of being dropped.
+    """
+
+    if engine.dialect.name != "postgresql":
+        return []
+
+    dropped = []
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if not connection.execute(text("SELECT relkind = 'p' FROM pg_class WHERE oid = 'measurements'::regclass")).scalar():
+            return []
+
+        for experiment_id, name, detach_pending in get_droppable_partitions(connection):
+            if detach_pending:
+                connection.execute(text(f"ALTER TABLE measurements DETACH PARTITION {name} FINALIZE"))
+            elif connection.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+                continue
+            else:
+                connection.execute(text(f"ALTER TABLE measurements DETACH PARTITION {name} CONCURRENTLY"))
+
+            if drop_detached_partition(engine, experiment_id, name):
+                dropped.append(experiment_id)
+
+    return dropped
+
+
+def drop_detached_partition(engine: Engine, experiment_id: int, name: str) -> bool:
+    with engine.begin() as connection:
+        connection.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+
+        if connection.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+            connection.execute(text(
+                f"ALTER TABLE measurements ATTACH PARTITION {name} FOR VALUES IN ({int(experiment_id)})"
+            ))
+            return False
+
+        connection.execute(text(f"DROP TABLE {name}"))
+
+    return True
@@ -0,0 +1,19 @@
+from typing import Optional
+
+from pydantic import BaseModel, conint
+
+from app.common.data.enums import DownsamplingMethod
+from app.common.domain.config import MEASUREMENT_PAGE_DEFAULT_SIZE, MEASUREMENT_PAGE_MAX_SIZE, \
+    MEASUREMENT_DOWNSAMPLE_MAX_POINTS
+
+
+class MeasurementRangeQuery(BaseModel):
+    from_timestamp: Optional[int]
+    to_timestamp: Optional[int]
+    limit: conint(ge=1, le=MEASUREMENT_PAGE_MAX_SIZE) = MEASUREMENT_PAGE_DEFAULT_SIZE
+    cursor: Optional[str]
+
+
+class MeasurementDownsampleQuery(BaseModel):
+    points: conint(ge=3, le=MEASUREMENT_DOWNSAMPLE_MAX_POINTS)
+    method: DownsamplingMethod = DownsamplingMethod.LTTB
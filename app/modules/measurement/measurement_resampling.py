@@ -0,0 +1,55 @@
+import numpy as np
+
+from app.common.domain.config import MEASUREMENT_RESAMPLE_MAX_POINTS
+from app.common.exceptions.app_exceptions import BadRequestException
+from app.modules.measurement.measurement_analysis import find_vertices
+from app.modules.measurement.measurement_columns import MeasurementColumns
+
+
+def build_voltage_grid(start_voltage: int, end_voltage: int, voltage_step: int) -> np.ndarray:
+    """Build the programmed voltages from start_voltage towards end_voltage, in fixed point so the steps are exact"""
+
+    step = abs(voltage_step)
+
+    if step == 0:
+        raise BadRequestException("Cannot resample an experiment with a voltage step of 0")
+
+    count = abs(end_voltage - start_voltage) // step + 1
+
+    if count > MEASUREMENT_RESAMPLE_MAX_POINTS:
+        raise BadRequestException(f"The voltage grid has {count} points, more than {MEASUREMENT_RESAMPLE_MAX_POINTS}")
+
+    direction = 1 if end_voltage >= start_voltage else -1
+
+    return start_voltage + direction * step * np.arange(count, dtype=np.int64)
+
+
+def resample(columns: MeasurementColumns, grid: np.ndarray, start_voltage: float, end_voltage: float) -> dict:
+    """Interpolate each sweep's current at every grid voltage.
+
+    Sweeps are split at the vertices found by the analysis, so forward and reverse branches are interpolated apart.
+    Each sweep's currents follow the grid order; grid voltages the sweep never reached are NaN.
+    """
+
+    if not columns.size:
+        return {"point_count": 0, "sweeps": []}
+
+    voltages, currents = columns.voltages, columns.currents
+    boundaries = np.concatenate([[0], find_vertices(voltages, start_voltage, end_voltage), [columns.size - 1]])
+
+    sweeps = []
+
+    for index, (start, end) in enumerate(zip(boundaries[:-1].tolist(), boundaries[1:].tolist())):
+        positive_going = voltages[end] >= voltages[start]
+        order = np.argsort(voltages[start:end + 1], kind="stable")
+
+        sweeps.append({
+            "index": index,
+            "direction": "forward" if positive_going == (end_voltage >= start_voltage) else "reverse",
+            "start_timestamp": int(columns.timestamps[start]),
+            "end_timestamp": int(columns.timestamps[end]),
+            "currents": np.interp(grid, voltages[start:end + 1][order], currents[start:end + 1][order],
+                                  left=np.nan, right=np.nan)
+        })
+
+    return {"point_count": columns.size, "sweeps": sweeps}
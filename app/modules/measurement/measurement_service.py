@@ -1,30 +1,278 @@
-from typing import List
+import asyncio
+import io
+from typing import AsyncIterator, Dict, List, MutableMapping, Optional, Sequence, Tuple, Union
 
-from fastapi import Request
+from fastapi import Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from pydantic import ValidationError, parse_raw_as
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql import Insert
 from sqlalchemy.orm.session import Session
+from starlette import status
+from starlette.concurrency import run_in_threadpool
 
-from app.common.data.enums import ExperimentStatus
-from app.common.data.models import Measurement, Experiment, Client
-from app.common.exceptions.app_exceptions import ForbiddenException, BadRequestException
+from app.common.auth.bearer import get_websocket_token
+from app.common.auth.principal import Principal
+from app.common.data.enums import ExperimentStatus, DownsamplingMethod
+from app.common.data.fixed_point import fixed_point_to_float, from_fixed_point
+from app.common.data.models import Measurement, Experiment
+from app.common.domain.config import MEASUREMENT_STREAM_BATCH_SIZE, MEASUREMENT_STREAM_FLUSH_INTERVAL_IN_SECONDS, \
+    MEASUREMENT_WRITE_BEHIND_ENABLED, MEASUREMENT_BATCH_MAX_SIZE, MEASUREMENT_STORAGE, MEASUREMENT_EXPORT_BATCH_SIZE, \
+    MEASUREMENT_DOWNSAMPLE_CACHE_SIZE, MEASUREMENT_ANALYSIS_CACHE_SIZE, MEASUREMENT_TIMESTAMPS_PER_SECOND, \
+    RESPONSE_CACHE_DIRECTORY, RESPONSE_CACHE_MAX_BYTES, MEASUREMENT_RESAMPLE_CACHE_SIZE
+from app.common.domain.constants import MEASUREMENT_INSERT_CHUNK_SIZE, JSON_MEDIA_TYPE, MEASUREMENT_STORAGE_ROWS, \
+    CSV_MEDIA_TYPE, NEXT_CURSOR_HEADER, VOLTAGE_SCALE
+from app.common.exceptions.app_exceptions import AppDomainException, ForbiddenException, BadRequestException, \
+    UnsupportedMediaTypeException
+from app.common.caching import LRUCache
+from app.common.etags import build_etag, matches_if_none_match, not_modified_response
+from app.common.pagination import encode_cursor, decode_cursor
+from app.common.response_cache import CachedResponse, DiskResponseCache, accepts_gzip
 from app.modules.client import client_service
-from app.modules.experiment import experiment_service
-from app.modules.measurement.measurement_dtos import MeasurementCreateRequest, MeasurementResponse
-from app.modules.measurement.measurement_mappings import measurement_to_measurement_response
+from app.modules.experiment import experiment_events, experiment_service
+from app.modules.measurement import measurement_analysis, measurement_archive, measurement_buffer, \
+    measurement_codecs, measurement_downsampling, measurement_import, measurement_resampling, measurement_stats, \
+    measurement_store, measurement_streams
+from app.modules.measurement.measurement_columns import MeasurementColumns, points_to_columns, concatenate_columns, \
+    slice_columns, columns_to_rows
+from app.modules.measurement.measurement_dtos import MeasurementCreateRequest, MeasurementResponse, \
+    MeasurementBatchCreateRequest, MeasurementBatchResponse, MeasurementPointRequest, MeasurementBufferMetricsResponse, \
+    MeasurementAnalysisResponse, MeasurementPointResponse, ResampledMeasurementsResponse
+from app.modules.measurement.measurement_mappings import measurement_to_measurement_response, \
+    measurement_create_to_queued_measurement_response, columns_to_measurement_responses, \
+    resampled_to_resampled_measurements_response
+from app.modules.measurement.measurement_queries import MeasurementRangeQuery, MeasurementDownsampleQuery
+from app.modules.user import user_service
 
+_downsampled_cache: LRUCache[MeasurementColumns] = LRUCache(MEASUREMENT_DOWNSAMPLE_CACHE_SIZE)
+_analysis_cache: LRUCache[MeasurementAnalysisResponse] = LRUCache(MEASUREMENT_ANALYSIS_CACHE_SIZE)
+_resampled_cache: LRUCache[ResampledMeasurementsResponse] = LRUCache(MEASUREMENT_RESAMPLE_CACHE_SIZE)
+_response_cache = DiskResponseCache(RESPONSE_CACHE_DIRECTORY, RESPONSE_CACHE_MAX_BYTES)
 
-def create_measurement(db: Session, request: Request, measurement_data: MeasurementCreateRequest) -> MeasurementResponse:
+
+def create_measurement(db: Session, request: Request, measurement_data: Optional[MeasurementCreateRequest]) -> MeasurementResponse:
     logged_in_client = client_service.get_logged_in_client(db, request)
-    experiment = experiment_service.get_experiment_by_id(db, measurement_data.experiment_id)
 
-    validate_experiment_belongs_to_logged_in_client(logged_in_client, experiment)
-    validate_experiment_is_running(experiment)
+    if measurement_data is None:
+        measurement_data = measurement_codecs.decode_measurement(request)
+
+    experiment = get_writable_experiment(db, logged_in_client, measurement_data.experiment_id)
+
+    if MEASUREMENT_WRITE_BEHIND_ENABLED:
+        measurement_buffer.enqueue(experiment.id, build_measurement_row(experiment, measurement_data))
+        return measurement_create_to_queued_measurement_response(measurement_data)
 
     measurement = persist_measurement(db, experiment, measurement_data)
 
     return measurement_to_measurement_response(measurement)
 
 
-def validate_experiment_belongs_to_logged_in_client(logged_in_client: Client, experiment: Experiment) -> None:
+def create_measurements(db: Session, request: Request, batch_data: Optional[MeasurementBatchCreateRequest],
+                        experiment_id: Optional[int]) -> MeasurementBatchResponse:
+    logged_in_client = client_service.get_logged_in_client(db, request)
+    experiment_id, columns = get_batch_columns(request, batch_data, experiment_id)
+
+    validate_batch_size(columns)
+
+    experiment = get_writable_experiment(db, logged_in_client, experiment_id)
+
+    inserted = persist_measurements(db, experiment, columns)
+
+    return MeasurementBatchResponse(
+        experiment_id=experiment.id,
+        received=columns.size,
+        inserted=inserted
+    )
+
+
+def get_batch_columns(request: Request, batch_data: Optional[MeasurementBatchCreateRequest],
+                      experiment_id: Optional[int]) -> Tuple[int, MeasurementColumns]:
+    if batch_data is not None:
+        return batch_data.experiment_id, points_to_columns(batch_data.measurements)
+
+    if measurement_codecs.get_binary_body(request) is None:
+        raise BadRequestException("Request body is required")
+
+    return measurement_codecs.decode_measurement_batch(request, experiment_id)
+
+
+def validate_batch_size(columns: MeasurementColumns) -> None:
+    if not 0 < columns.size <= MEASUREMENT_BATCH_MAX_SIZE:
+        raise BadRequestException(f"A batch must contain between 1 and {MEASUREMENT_BATCH_MAX_SIZE} measurements")
+
+
+async def import_measurements(db: Session, request: Request, experiment_id: int, header: bool) -> MeasurementBatchResponse:
+    logged_in_client = client_service.get_logged_in_client(db, request)
+    media_type = measurement_codecs.get_content_media_type(request)
+
+    if media_type != CSV_MEDIA_TYPE:
+        raise UnsupportedMediaTypeException(media_type)
+
+    experiment = get_writable_experiment(db, logged_in_client, experiment_id)
+    source = io.BufferedReader(measurement_import.RequestBodyReader(request.stream()))
+
+    received, inserted = await run_in_threadpool(measurement_import.import_csv, db, experiment, source, header)
+    experiment_events.publish_import(experiment.id, received, inserted)
+
+    return MeasurementBatchResponse(
+        experiment_id=experiment.id,
+        received=received,
+        inserted=inserted
+    )
+
+
+async def stream_measurements(db: Session, websocket: WebSocket, experiment_id: int) -> None:
+    try:
+        experiment = get_stream_experiment(db, websocket, experiment_id)
+    except AppDomainException as ex:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=ex.message)
+        return
+
+    await websocket.accept()
+
+    session = measurement_streams.register(experiment.id)
+
+    try:
+        await receive_stream_frames(db, websocket, experiment, session.completed)
+    except WebSocketDisconnect:
+        return
+    except Exception as ex:
+        logger.exception(f"Measurement stream for experiment {experiment.id} failed: {ex}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="Measurements could not be stored")
+        return
+    finally:
+        measurement_streams.unregister(experiment.id, session)
+
+    await websocket.close(code=status.WS_1000_NORMAL_CLOSURE, reason=f"Experiment is {ExperimentStatus.COMPLETED.name}")
+
+
+def get_stream_experiment(db: Session, websocket: WebSocket, experiment_id: int) -> Experiment:
+    token = get_websocket_token(websocket)
+    logged_in_client = client_service.get_client_from_token(db, token)
+
+    return get_writable_experiment(db, logged_in_client, experiment_id)
+
+
+async def receive_stream_frames(db: Session, websocket: WebSocket, experiment: Experiment, completed: asyncio.Event) -> None:
+    """Buffer incoming points and persist them in micro-batches until the experiment completes or the socket closes.
+
+    Points received before a disconnect or completion are still flushed, so nothing the device sent is dropped. The
+    buffer holds fixed-point columns of frames that already passed validation, so a bad frame is rejected on its own.
+    """
+
+    loop = asyncio.get_running_loop()
+    buffer: List[MeasurementColumns] = []
+    deadline = loop.time() + MEASUREMENT_STREAM_FLUSH_INTERVAL_IN_SECONDS
+    receiving = asyncio.ensure_future(receive_stream_frame(websocket))
+    completion = asyncio.ensure_future(completed.wait())
+
+    try:
+        while not completion.done():
+            timeout = max(deadline - loop.time(), 0) if buffer else None
+            await asyncio.wait({receiving, completion}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if receiving.done():
+                frame = receiving.result()
+                receiving = asyncio.ensure_future(receive_stream_frame(websocket))
+                await buffer_stream_frame(websocket, buffer, frame)
+
+            if sum(columns.size for columns in buffer) >= MEASUREMENT_STREAM_BATCH_SIZE or (buffer and loop.time() >= deadline):
+                await flush_stream_buffer(db, websocket, experiment, buffer)
+                deadline = loop.time() + MEASUREMENT_STREAM_FLUSH_INTERVAL_IN_SECONDS
+    except WebSocketDisconnect:
+        try:
+            flush_stream_points(db, experiment, buffer)
+        except AppDomainException as ex:
+            count = sum(columns.size for columns in buffer)
+            logger.error(f"Dropped {count} streamed measurements of experiment {experiment.id}: {ex.message}")
+        raise
+    finally:
+        receiving.cancel()
+        completion.cancel()
+
+    await flush_stream_buffer(db, websocket, experiment, buffer)
+
+
+async def receive_stream_frame(websocket: WebSocket) -> Union[str, bytes]:
+    message = await websocket.receive()
+
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+
+    if message.get("text") is not None:
+        return message["text"]
+
+    return message.get("bytes") or b""
+
+
+async def buffer_stream_frame(websocket: WebSocket, buffer: List[MeasurementColumns], frame: Union[str, bytes]) -> None:
+    try:
+        buffer.append(measurement_store.encode_columns(parse_stream_frame(frame)))
+    except (AppDomainException, ValidationError, ValueError) as ex:
+        message = ex.message if isinstance(ex, AppDomainException) else str(ex)
+        await websocket.send_json({"event": "error", "message": f"Invalid measurement frame: {message}"})
+
+
+def parse_stream_frame(frame: Union[str, bytes]) -> MeasurementColumns:
+    """Text frames carry a JSON point or array of points; binary frames carry packed measurement records"""
+
+    if isinstance(frame, bytes):
+        return measurement_codecs.decode_packed_measurements(frame)
+
+    if frame.lstrip().startswith("["):
+        return points_to_columns(parse_raw_as(List[MeasurementPointRequest], frame))
+
+    return points_to_columns([MeasurementPointRequest.parse_raw(frame)])
+
+
+async def flush_stream_buffer(db: Session, websocket: WebSocket, experiment: Experiment,
+                              buffer: List[MeasurementColumns]) -> None:
+    try:
+        last_timestamp = flush_stream_points(db, experiment, buffer)
+    except AppDomainException as ex:
+        count = sum(columns.size for columns in buffer)
+        buffer.clear()
+        await websocket.send_json({"event": "error", "message": f"{count} measurements were not stored: {ex.message}"})
+        return
+
+    if last_timestamp is not None:
+        await websocket.send_json({"event": "ack", "timestamp": last_timestamp})
+
+
+def flush_stream_points(db: Session, experiment: Experiment, buffer: List[MeasurementColumns]) -> Optional[int]:
+    """Store the buffered fixed-point columns; the buffer is only cleared once they are committed"""
+
+    columns = concatenate_columns(buffer)
+
+    if not columns.size:
+        return None
+
+    try:
+        insert_measurements(db, columns_to_rows(columns, experiment.id))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    buffer.clear()
+
+    return int(columns.timestamps.max())
+
+
+def get_writable_experiment(db: Session, logged_in_client: Principal, experiment_id: int) -> Experiment:
+    """Get an experiment the client may post measurements for"""
+
+    experiment = experiment_service.get_experiment_by_id(db, experiment_id)
+
+    validate_experiment_belongs_to_logged_in_client(logged_in_client, experiment)
+    validate_experiment_is_running(experiment)
+
+    return experiment
+
+
+def validate_experiment_belongs_to_logged_in_client(logged_in_client: Principal, experiment: Experiment) -> None:
     if logged_in_client.id != experiment.client_id:
         raise ForbiddenException(logged_in_client.identifier)
 
@@ -34,28 +282,310 @@ def validate_experiment_is_running(experiment: Experiment) -> None:
         raise BadRequestException(f"Cannot post measurements for {experiment.experiment_status} experiment")
 
 
-def persist_measurement(db: Session, experiment: Experiment, measurement_data: MeasurementCreateRequest):
-    measurement = build_measurement(experiment, measurement_data)
-    return save_measurement(db, measurement)
+def persist_measurement(db: Session, experiment: Experiment, measurement_data: MeasurementCreateRequest) -> Measurement:
+    """Store a measurement, returning the stored row when a retried post has already written it"""
 
+    insert_measurements(db, [build_measurement_row(experiment, measurement_data)])
+    db.commit()
 
-def build_measurement(experiment: Experiment, measurement_data: MeasurementCreateRequest) -> Measurement:
-    return Measurement(
-        timestamp=measurement_data.timestamp,
-        voltage=measurement_data.voltage,
-        current=measurement_data.current,
-        experiment_id=experiment.id
-    )
+    return get_measurement_by_timestamp(db, experiment.id, measurement_data.timestamp)
+
+
+def get_measurement_by_timestamp(db: Session, experiment_id: int, timestamp: int) -> Measurement:
+    return db.query(Measurement).filter(Measurement.experiment_id == experiment_id,
+                                        Measurement.timestamp == timestamp).first()
 
 
-def save_measurement(db, measurement):
-    db.add(measurement)
+def persist_measurements(db: Session, experiment: Experiment, columns: MeasurementColumns) -> int:
+    rows = measurement_store.build_rows(experiment.id, columns)
+
+    inserted = insert_measurements(db, rows)
     db.commit()
-    db.refresh(measurement)
 
-    return measurement
+    return inserted
+
+
+def build_measurement_row(experiment: Experiment, measurement_data: MeasurementCreateRequest) -> dict:
+    return measurement_store.build_rows(experiment.id, points_to_columns([measurement_data]))[0]
+
+
+def insert_measurements(db: Session, rows: List[dict]) -> int:
+    """Write rows as multi-row inserts without committing, so callers control the transaction.
+
+    Rows whose (experiment_id, timestamp) already exist are skipped, so retried posts are no-ops; the return value
+    only counts rows that were actually inserted. The inserted rows are added to the experiment stats in the same
+    transaction and published to live experiment streams once it commits.
+    """
+
+    inserted = 0
+    statement = build_measurement_insert(db)
+    rows = measurement_stats.record_new_rows(db, rows)
+
+    for start in range(0, len(rows), MEASUREMENT_INSERT_CHUNK_SIZE):
+        result = db.execute(statement.values(rows[start:start + MEASUREMENT_INSERT_CHUNK_SIZE]))
+        inserted += result.rowcount
+
+    experiment_events.record_measurements(db, rows)
+
+    return inserted
+
+
+def build_measurement_insert(db: Session) -> Insert:
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        return postgresql.insert(Measurement).on_conflict_do_nothing(index_elements=["experiment_id", "timestamp"])
+
+    if dialect == "sqlite":
+        return sqlite.insert(Measurement).on_conflict_do_nothing(index_elements=["experiment_id", "timestamp"])
+
+    return insert(Measurement)
+
+
+def get_measurement_page(db: Session, experiment: Experiment,
+                         query: MeasurementRangeQuery) -> Tuple[MeasurementColumns, Optional[str]]:
+    """Read one page of points and the cursor of the page after it, if there is one"""
+
+    from_timestamp, to_timestamp = get_page_range(experiment.id, query)
+    columns = measurement_store.read_page(db, experiment, from_timestamp, to_timestamp, query.limit + 1)
+
+    return slice_columns(columns, 0, query.limit), get_next_cursor(experiment.id, columns.timestamps, query.limit)
+
+
+def get_page_range(experiment_id: int, query: MeasurementRangeQuery) -> Tuple[Optional[int], Optional[int]]:
+    """Resolve the inclusive timestamp range of a page; a cursor continues after the last timestamp it saw"""
+
+    if query.cursor is None:
+        return query.from_timestamp, query.to_timestamp
+
+    values = decode_cursor(query.cursor)
+
+    if len(values) != 2 or values[0] != experiment_id or not isinstance(values[1], int):
+        raise BadRequestException("Invalid cursor")
+
+    from_timestamp = values[1] + 1
+
+    if query.from_timestamp is not None:
+        from_timestamp = max(from_timestamp, query.from_timestamp)
+
+    return from_timestamp, query.to_timestamp
+
+
+def get_next_cursor(experiment_id: int, timestamps: Sequence[int], limit: int) -> Optional[str]:
+    if len(timestamps) <= limit:
+        return None
+
+    return encode_cursor(experiment_id, int(timestamps[limit - 1]))
+
+
+def get_measurement_columns(db: Session, experiment: Experiment) -> MeasurementColumns:
+    return measurement_store.read_columns(db, experiment)
+
+
+def compact_measurements(db: Session, experiment_id: int) -> int:
+    if MEASUREMENT_STORAGE == MEASUREMENT_STORAGE_ROWS:
+        return 0
+
+    return measurement_store.compact(db, experiment_id)
+
+
+def get_encoded_measurements(db: Session, experiment: Experiment, media_type: str, query: MeasurementRangeQuery,
+                             request: Request) -> Response:
+    """Get a page of measurements; the cursor of the next page is returned in the X-Next-Cursor header.
+
+    Pages of COMPLETED experiments are final, so they are rendered once and then served from the disk cache. The
+    ETag is derived from the experiment version, so If-None-Match is answered with 304 before any point is read.
+    """
+
+    completed = experiment.experiment_status == ExperimentStatus.COMPLETED.name
+    gzip_accepted = completed and accepts_gzip(request.headers.get("accept-encoding", ""))
+    key = (
+        "measurements", MEASUREMENT_STORAGE, *experiment_service.get_experiment_version(experiment), media_type,
+        query.from_timestamp, query.to_timestamp, query.limit, query.cursor
+    )
+    etag = build_etag(*key, gzip_accepted)
+    headers = {"Vary": "Accept, Accept-Encoding", "ETag": etag}
+
+    if matches_if_none_match(request, etag):
+        return not_modified_response(etag, headers)
+
+    if not completed:
+        content, media_type, page_headers = render_measurement_page(db, experiment, media_type, query)
+        return Response(content=content, media_type=media_type, headers={**headers, **page_headers})
+
+    cached = _response_cache.get_or_render(key, gzip_accepted,
+                                           lambda: render_measurement_page(db, experiment, media_type, query))
+
+    return cached_response_to_response(cached, headers)
+
+
+def render_measurement_page(db: Session, experiment: Experiment, media_type: str,
+                            query: MeasurementRangeQuery) -> Tuple[bytes, str, Dict[str, str]]:
+    headers = {}
+
+    columns, next_cursor = get_measurement_page(db, experiment, query)
+
+    if media_type == JSON_MEDIA_TYPE:
+        content = measurement_codecs.encode_json(columns_to_measurement_responses(experiment.id, columns))
+    else:
+        content = measurement_codecs.encode_measurements(media_type, experiment.id, columns)
+
+    set_next_cursor(headers, next_cursor)
+
+    return content, media_type, headers
+
+
+def cached_response_to_response(cached: CachedResponse, headers: Dict[str, str]) -> Response:
+    headers = {**headers, **cached.headers}
+
+    if cached.compressed:
+        headers["Content-Encoding"] = "gzip"
+
+    return Response(content=cached.body, media_type=cached.media_type, headers=headers)
+
+
+def encode_columns_response(experiment_id: int, columns: MeasurementColumns, media_type: str,
+                            headers: Optional[dict] = None) -> Union[List[MeasurementPointResponse], Response]:
+    """Return JSON responses for FastAPI to serialise, or a binary response with the encoded columns"""
+
+    if media_type == JSON_MEDIA_TYPE:
+        return columns_to_measurement_responses(experiment_id, columns)
+
+    content = measurement_codecs.encode_measurements(media_type, experiment_id, columns)
+
+    return Response(content=content, media_type=media_type, headers={"Vary": "Accept", **(headers or {})})
+
+
+def get_downsampled_measurements(db: Session, experiment: Experiment, query: MeasurementDownsampleQuery,
+                                 media_type: str) -> Union[List[MeasurementPointResponse], Response]:
+    """Downsample an experiment's points; results for COMPLETED experiments are cached by experiment version, so points
+    written after completion are never hidden behind a stale entry"""
+
+    def compute() -> MeasurementColumns:
+        columns = measurement_store.read_columns(db, experiment)
+        return measurement_downsampling.downsample(columns, query.points, query.method)
+
+    if experiment.experiment_status == ExperimentStatus.COMPLETED.name:
+        key = (*experiment_service.get_experiment_version(experiment), query.points, query.method)
+        columns = _downsampled_cache.get_or_compute(key, compute)
+    else:
+        columns = compute()
+
+    return encode_columns_response(experiment.id, columns, media_type)
+
+
+def get_overlay_columns(db: Session, experiments: List[Experiment], points: Optional[int],
+                        method: DownsamplingMethod) -> Dict[int, MeasurementColumns]:
+    columns = measurement_store.read_columns_for_experiments(db, experiments)
+
+    if points is None:
+        return columns
+
+    return {
+        experiment_id: measurement_downsampling.downsample(experiment_columns, points, method)
+        for experiment_id, experiment_columns in columns.items()
+    }
+
+
+def get_resampled_measurements(db: Session, experiment: Experiment) -> ResampledMeasurementsResponse:
+    """Interpolate currents onto the programmed voltage grid; results for COMPLETED experiments are cached by
+    experiment version"""
+
+    def compute() -> ResampledMeasurementsResponse:
+        grid = measurement_resampling.build_voltage_grid(experiment.start_voltage, experiment.end_voltage,
+                                                         experiment.voltage_step)
+        voltages = from_fixed_point(grid, VOLTAGE_SCALE)
+        resampled = measurement_resampling.resample(
+            measurement_store.read_columns(db, experiment),
+            voltages,
+            fixed_point_to_float(experiment.start_voltage, VOLTAGE_SCALE),
+            fixed_point_to_float(experiment.end_voltage, VOLTAGE_SCALE)
+        )
+
+        return resampled_to_resampled_measurements_response(experiment.id, voltages, resampled)
+
+    if experiment.experiment_status == ExperimentStatus.COMPLETED.name:
+        return _resampled_cache.get_or_compute(experiment_service.get_experiment_version(experiment), compute)
+
+    return compute()
+
+
+def export_measurements(db: Session, experiment: Experiment, media_type: str) -> StreamingResponse:
+    if experiment.archived_on is not None:
+        # Fail before the response starts, as an error raised while streaming can only abort the connection
+        measurement_archive.require_archive_path(experiment.id)
+
+    extension = "csv" if media_type == CSV_MEDIA_TYPE else "ndjson"
+    headers = {
+        "Content-Disposition": f"attachment; filename=experiment-{experiment.id}-measurements.{extension}",
+        "Vary": "Accept"
+    }
+
+    return StreamingResponse(stream_export_lines(db, experiment, media_type), media_type=media_type, headers=headers)
+
+
+async def stream_export_lines(db: Session, experiment: Experiment, media_type: str) -> AsyncIterator[bytes]:
+    """Encode batches read in a worker thread; when the client disconnects, the pending await is cancelled and the
+    batch generator is closed, which closes its database cursor."""
+
+    batches = measurement_store.iterate_columns(db, experiment, MEASUREMENT_EXPORT_BATCH_SIZE)
+
+    try:
+        if media_type == CSV_MEDIA_TYPE:
+            yield measurement_codecs.CSV_HEADER
+
+        while True:
+            columns = await run_in_threadpool(next, batches, None)
+
+            if columns is None:
+                return
+
+            yield measurement_codecs.encode_export_lines(media_type, experiment.id, columns)
+    finally:
+        batches.close()
+
+
+async def analyse_measurements(db: Session, experiment: Experiment) -> MeasurementAnalysisResponse:
+    """Analyse an experiment in the process pool; results for COMPLETED experiments are memoised by experiment version"""
+
+    completed = experiment.experiment_status == ExperimentStatus.COMPLETED.name
+
+    key = experiment_service.get_experiment_version(experiment)
+
+    if completed:
+        cached = _analysis_cache.get(key)
+
+        if cached is not None:
+            return cached
+
+    columns = measurement_store.read_columns(db, experiment)
+    result = await asyncio.get_running_loop().run_in_executor(
+        measurement_analysis.get_process_pool(),
+        measurement_analysis.analyse,
+        columns.timestamps,
+        columns.voltages,
+        columns.currents,
+        fixed_point_to_float(experiment.start_voltage, VOLTAGE_SCALE),
+        fixed_point_to_float(experiment.end_voltage, VOLTAGE_SCALE),
+        MEASUREMENT_TIMESTAMPS_PER_SECOND
+    )
+    analysis = MeasurementAnalysisResponse(experiment_id=experiment.id, **result)
+
+    if completed:
+        _analysis_cache.put(key, analysis)
+
+    return analysis
+
+
+def set_next_cursor(headers: MutableMapping[str, str], next_cursor: Optional[str]) -> None:
+    if next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def get_buffer_metrics(db: Session, request: Request) -> MeasurementBufferMetricsResponse:
+    logged_in_user = user_service.get_logged_in_user(db, request)
 
+    if not logged_in_user.is_admin:
+        raise ForbiddenException(logged_in_user.username)
 
-def get_measurements(db: Session, experiment_id: int) -> List[MeasurementResponse]:
-    measurements = db.query(Measurement).filter(Measurement.experiment_id == experiment_id).all()
-    return list(map(measurement_to_measurement_response, measurements))
+    return measurement_buffer.get_metrics()
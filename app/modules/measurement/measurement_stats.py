@@ -0,0 +1,146 @@
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm.session import Session
+
+from app.common.data.fixed_point import from_fixed_point
+from app.common.data.models import ExperimentStats, Measurement
+from app.common.domain.constants import VOLTAGE_SCALE, CURRENT_SCALE
+from app.modules.measurement import measurement_store
+
+
+class PointStats(NamedTuple):
+    """Count, bounds, mean and sum of squared deviations (M2) of a batch of points"""
+
+    count: int
+    first_timestamp: int
+    last_timestamp: int
+    min_voltage: int
+    max_voltage: int
+    mean_voltage: float
+    m2_voltage: float
+    min_current: int
+    max_current: int
+    mean_current: float
+    m2_current: float
+
+
+def lock_stats(db: Session, experiment_id: int) -> ExperimentStats:
+    """Get the experiment's stats row locked for update, creating it for experiments that predate stats"""
+
+    stats = db.query(ExperimentStats).filter(ExperimentStats.experiment_id == experiment_id).with_for_update().first()
+
+    if stats is None:
+        stats = ExperimentStats(experiment_id=experiment_id, point_count=0, mean_voltage=0.0, m2_voltage=0.0,
+                                mean_current=0.0, m2_current=0.0)
+        db.add(stats)
+        db.flush()
+
+    return stats
+
+
+def record_new_rows(db: Session, rows: List[dict]) -> List[dict]:
+    """Drop rows whose (experiment_id, timestamp) is already stored or repeated, and add the rest to the stats.
+
+    Each experiment's stats row is locked first, so concurrent ingestion of the same points cannot count them twice.
+    Must run in the transaction that inserts the returned rows.
+    """
+
+    new_rows = []
+
+    for experiment_id in dict.fromkeys(row["experiment_id"] for row in rows):
+        experiment_rows = [row for row in rows if row["experiment_id"] == experiment_id]
+        stats = lock_stats(db, experiment_id)
+
+        experiment_rows = drop_stored_rows(db, experiment_id, experiment_rows)
+
+        if experiment_rows:
+            merge_stats(stats, compute_stats(experiment_rows))
+            new_rows.extend(experiment_rows)
+
+    return new_rows
+
+
+def drop_stored_rows(db: Session, experiment_id: int, rows: List[dict]) -> List[dict]:
+    """Drop repeated rows and rows whose timestamp is already stored, either as a row or in a compacted chunk"""
+
+    timestamps = np.fromiter((row["timestamp"] for row in rows), dtype=np.int64, count=len(rows))
+    _, first_indices = np.unique(timestamps, return_index=True)
+    from_timestamp, to_timestamp = int(timestamps.min()), int(timestamps.max())
+
+    stored_rows = np.fromiter(db.execute(
+        select(Measurement.timestamp).where(
+            Measurement.experiment_id == experiment_id,
+            Measurement.timestamp.between(from_timestamp, to_timestamp)
+        )
+    ).scalars(), dtype=np.int64)
+    chunked = measurement_store.read_chunk_columns(db, experiment_id, from_timestamp, to_timestamp)
+    stored = np.concatenate([stored_rows, chunked.timestamps])
+
+    keep = first_indices[~np.isin(timestamps[first_indices], stored)]
+
+    return [rows[index] for index in np.sort(keep).tolist()]
+
+
+def compute_stats(rows: List[dict]) -> PointStats:
+    timestamps = np.fromiter((row["timestamp"] for row in rows), dtype=np.int64, count=len(rows))
+    voltages = np.fromiter((row["voltage"] for row in rows), dtype=np.int64, count=len(rows))
+    currents = np.fromiter((row["current"] for row in rows), dtype=np.int64, count=len(rows))
+
+    mean_voltage, m2_voltage = mean_and_m2(from_fixed_point(voltages, VOLTAGE_SCALE))
+    mean_current, m2_current = mean_and_m2(from_fixed_point(currents, CURRENT_SCALE))
+
+    return PointStats(
+        count=len(rows),
+        first_timestamp=int(timestamps.min()),
+        last_timestamp=int(timestamps.max()),
+        min_voltage=int(voltages.min()),
+        max_voltage=int(voltages.max()),
+        mean_voltage=mean_voltage,
+        m2_voltage=m2_voltage,
+        min_current=int(currents.min()),
+        max_current=int(currents.max()),
+        mean_current=mean_current,
+        m2_current=m2_current
+    )
+
+
+def mean_and_m2(values: np.ndarray) -> Tuple[float, float]:
+    mean = float(values.mean())
+    return mean, float(np.square(values - mean).sum())
+
+
+def merge_stats(stats: ExperimentStats, batch: PointStats) -> None:
+    """Combine a batch into the running stats with the parallel form of Welford's algorithm"""
+
+    count = stats.point_count + batch.count
+
+    stats.mean_voltage, stats.m2_voltage = merge_moments(stats.point_count, stats.mean_voltage, stats.m2_voltage,
+                                                         batch.count, batch.mean_voltage, batch.m2_voltage)
+    stats.mean_current, stats.m2_current = merge_moments(stats.point_count, stats.mean_current, stats.m2_current,
+                                                         batch.count, batch.mean_current, batch.m2_current)
+
+    stats.first_timestamp = min_or_value(stats.first_timestamp, batch.first_timestamp)
+    stats.last_timestamp = max_or_value(stats.last_timestamp, batch.last_timestamp)
+    stats.min_voltage = min_or_value(stats.min_voltage, batch.min_voltage)
+    stats.max_voltage = max_or_value(stats.max_voltage, batch.max_voltage)
+    stats.min_current = min_or_value(stats.min_current, batch.min_current)
+    stats.max_current = max_or_value(stats.max_current, batch.max_current)
+    stats.point_count = count
+
+
+def merge_moments(count: int, mean: float, m2: float, batch_count: int, batch_mean: float,
+                  batch_m2: float) -> Tuple[float, float]:
+    total = count + batch_count
+    delta = batch_mean - mean
+
+    return mean + delta * batch_count / total, m2 + batch_m2 + delta * delta * count * batch_count / total
+
+
+def min_or_value(existing: Optional[int], value: int) -> int:
+    return value if existing is None else min(existing, value)
+
+
+def max_or_value(existing: Optional[int], value: int) -> int:
+    return value if existing is None else max(existing, value)
@@ -0,0 +1,329 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import delete, select
+from sqlalchemy.orm.session import Session
+from sqlalchemy.sql import Select
+
+from app.common.data.fixed_point import FIXED_POINT_DTYPE, to_fixed_point, from_fixed_point
+from app.common.data.models import Experiment, Measurement, MeasurementChunk
+from app.common.domain.config import MEASUREMENT_CHUNK_MAX_POINTS
+from app.common.domain.constants import VOLTAGE_SCALE, CURRENT_SCALE
+from app.modules.measurement import measurement_archive, measurement_partitions
+from app.modules.measurement.measurement_columns import FIXED_POINT_RECORD_DTYPE, MeasurementColumns, \
+    rows_to_columns, records_to_columns, columns_to_rows, take_columns, slice_columns, merge_columns
+
+
+def encode_columns(columns: MeasurementColumns) -> MeasurementColumns:
+    """Convert volts and amps to the stored nanovolt and picoamp integers"""
+
+    return MeasurementColumns(
+        timestamps=columns.timestamps,
+        voltages=to_fixed_point(columns.voltages, VOLTAGE_SCALE),
+        currents=to_fixed_point(columns.currents, CURRENT_SCALE)
+    )
+
+
+def decode_columns(columns: MeasurementColumns) -> MeasurementColumns:
+    return MeasurementColumns(
+        timestamps=columns.timestamps,
+        voltages=from_fixed_point(columns.voltages, VOLTAGE_SCALE),
+        currents=from_fixed_point(columns.currents, CURRENT_SCALE)
+    )
+
+
+def build_rows(experiment_id: int, columns: MeasurementColumns) -> List[dict]:
+    return columns_to_rows(encode_columns(columns), experiment_id)
+
+
+def read_columns(db: Session, experiment: Experiment) -> MeasurementColumns:
+    """Read an experiment's points from its archive, or from packed chunks and any rows that have not been compacted
+    yet"""
+
+    if experiment.archived_on is not None:
+        return decode_columns(measurement_archive.read_archive(experiment.id))
+
+    stored = merge_columns([read_chunk_columns(db, experiment.id), read_row_columns(db, experiment.id)])
+    return decode_columns(stored)
+
+
+def read_columns_for_experiments(db: Session, experiments: Sequence[Experiment]) -> Dict[int, MeasurementColumns]:
+    """Read the points of several experiments with one IN-filtered scan of each store, ordered by experiment and
+    timestamp, so the cost does not grow with the number of round trips"""
+
+    experiment_ids = [experiment.id for experiment in experiments]
+
+    chunks = db.execute(
+        select(MeasurementChunk.experiment_id, MeasurementChunk.timestamps, MeasurementChunk.voltages,
+               MeasurementChunk.currents)
+        .where(MeasurementChunk.experiment_id.in_(experiment_ids))
+        .order_by(MeasurementChunk.experiment_id, MeasurementChunk.first_timestamp)
+    )
+    parts_by_experiment: Dict[int, List[MeasurementColumns]] = {experiment_id: [] for experiment_id in experiment_ids}
+
+    for experiment in experiments:
+        if experiment.archived_on is not None:
+            parts_by_experiment[experiment.id].append(measurement_archive.read_archive(experiment.id))
+
+    for experiment_id, *chunk in chunks:
+        parts_by_experiment[experiment_id].append(decode_chunk(*chunk))
+
+    rows = db.execute(
+        select(Measurement.experiment_id, Measurement.timestamp, Measurement.voltage, Measurement.current)
+        .where(Measurement.experiment_id.in_(experiment_ids))
+        .order_by(Measurement.experiment_id, Measurement.timestamp)
+    )
+    records = np.array([tuple(row) for row in rows], dtype=[("experiment_id", "<i8"), *FIXED_POINT_RECORD_DTYPE.descr])
+
+    for experiment_id, columns in split_by_experiment(records).items():
+        parts_by_experiment[experiment_id].append(columns)
+
+    return {experiment_id: decode_columns(merge_columns(parts)) for experiment_id, parts in parts_by_experiment.items()}
+
+
+def split_by_experiment(records: np.ndarray) -> Dict[int, MeasurementColumns]:
+    """Split records sorted by experiment_id into columns per experiment"""
+
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(records["experiment_id"])) + 1])
+    ends = np.concatenate([starts[1:], [records.size]])
+
+    return {
+        int(records["experiment_id"][start]): records_to_columns(records[start:end])
+        for start, end in zip(starts.tolist(), ends.tolist())
+        if end > start
+    }
+
+
+def iterate_columns(db: Session, experiment: Experiment, batch_size: int) -> Iterator[MeasurementColumns]:
+    """Yield an experiment's points in timestamp order, in batches of about batch_size, through server-side cursors.
+
+    Rows written after compaction can fall inside or before the chunk ranges, so the chunk and row cursors are merged
+    rather than read one after the other. Closing the generator closes the open cursors, so an abandoned export stops
+    reading immediately.
+    """
+
+    if experiment.archived_on is not None:
+        for block in measurement_archive.iterate_archive(experiment.id):
+            for start in range(0, block.size, batch_size):
+                yield decode_columns(slice_columns(block, start, start + batch_size))
+
+        return
+
+    chunks = db.execute(
+        filter_chunks(select(MeasurementChunk.first_timestamp, MeasurementChunk.timestamps, MeasurementChunk.voltages,
+                             MeasurementChunk.currents), experiment.id, None, None)
+        .execution_options(stream_results=True, yield_per=max(1, batch_size // MEASUREMENT_CHUNK_MAX_POINTS))
+    )
+    rows = db.execute(
+        select(Measurement.timestamp, Measurement.voltage, Measurement.current)
+        .where(Measurement.experiment_id == experiment.id)
+        .order_by(Measurement.timestamp)
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+
+    try:
+        chunk_batches = ((first_timestamp, decode_chunk(*chunk)) for first_timestamp, *chunk in chunks)
+        row_batches = (
+            (columns.timestamps[-1], columns)
+            for columns in (rows_to_columns(partition, FIXED_POINT_RECORD_DTYPE) for partition in rows.partitions())
+        )
+
+        for columns in merge_ordered_batches([chunk_batches, row_batches], batch_size):
+            yield decode_columns(columns)
+    finally:
+        chunks.close()
+        rows.close()
+
+
+def merge_ordered_batches(sources: List[Iterator[Tuple[int, MeasurementColumns]]],
+                          batch_size: int) -> Iterator[MeasurementColumns]:
+    """Merge sources yielding (bound, columns) into timestamp order, where no later batch of a source holds a
+    timestamp below the bound of its last batch.
+
+    Points below the lowest bound of the unfinished sources are final and are yielded once batch_size of them are
+    pending; the source with the lowest bound is read next so that bound keeps rising.
+    """
+
+    bounds: List[Optional[int]] = [None] * len(sources)
+    active = set(range(len(sources)))
+    pending = empty_fixed_point_columns()
+
+    while active:
+        index = min(active, key=lambda source: -np.inf if bounds[source] is None else bounds[source])
+        batch = next(sources[index], None)
+
+        if batch is None:
+            active.discard(index)
+        else:
+            bounds[index], columns = batch
+            pending = merge_columns([pending, columns])
+
+        if any(bounds[source] is None for source in active):
+            continue
+
+        watermark = min((bounds[source] for source in active), default=None)
+        ready = pending.size if watermark is None else int(np.searchsorted(pending.timestamps, watermark))
+
+        if ready >= batch_size or (ready and not active):
+            for start in range(0, ready, batch_size):
+                yield slice_columns(pending, start, min(start + batch_size, ready))
+
+            pending = slice_columns(pending, ready, pending.size)
+
+
+def empty_fixed_point_columns() -> MeasurementColumns:
+    return records_to_columns(np.empty(0, dtype=FIXED_POINT_RECORD_DTYPE))
+
+
+def read_page(db: Session, experiment: Experiment, from_timestamp: Optional[int], to_timestamp: Optional[int],
+              limit: int) -> MeasurementColumns:
+    """Read the first limit points with from_timestamp <= timestamp <= to_timestamp.
+
+    Both stores are read in timestamp order and stop early, so the cost depends on limit rather than on how far into
+    the experiment the range starts.
+    """
+
+    if experiment.archived_on is not None:
+        return decode_columns(measurement_archive.read_archive_page(experiment.id, from_timestamp, to_timestamp, limit))
+
+    stored = merge_columns([
+        read_chunk_page(db, experiment.id, from_timestamp, to_timestamp, limit),
+        read_row_columns(db, experiment.id, from_timestamp, to_timestamp, limit)
+    ])
+
+    return decode_columns(slice_columns(stored, 0, limit))
+
+
+def read_row_columns(db: Session, experiment_id: int, from_timestamp: Optional[int] = None,
+                     to_timestamp: Optional[int] = None, limit: Optional[int] = None) -> MeasurementColumns:
+    query = select(Measurement.timestamp, Measurement.voltage, Measurement.current) \
+        .where(Measurement.experiment_id == experiment_id) \
+        .order_by(Measurement.timestamp) \
+        .limit(limit)
+
+    if from_timestamp is not None:
+        query = query.where(Measurement.timestamp >= from_timestamp)
+    if to_timestamp is not None:
+        query = query.where(Measurement.timestamp <= to_timestamp)
+
+    return rows_to_columns(db.execute(query), FIXED_POINT_RECORD_DTYPE)
+
+
+def read_chunk_columns(db: Session, experiment_id: int, from_timestamp: Optional[int] = None,
+                       to_timestamp: Optional[int] = None) -> MeasurementColumns:
+    """Decode the fixed-point chunks overlapping [from_timestamp, to_timestamp]; points outside the range are not trimmed"""
+
+    query = filter_chunks(
+        select(MeasurementChunk.timestamps, MeasurementChunk.voltages, MeasurementChunk.currents),
+        experiment_id, from_timestamp, to_timestamp
+    )
+
+    return merge_columns([decode_chunk(*chunk) for chunk in db.execute(query)])
+
+
+def read_chunk_page(db: Session, experiment_id: int, from_timestamp: Optional[int], to_timestamp: Optional[int],
+                    limit: int) -> MeasurementColumns:
+    """Decode overlapping chunks in first_timestamp order until the first limit points of the range are known.
+
+    The blobs are read through one server-side cursor, fetching about as many chunks as limit needs plus the one whose
+    first timestamp proves the page complete. Points earlier than that timestamp cannot appear in any later chunk, so
+    reading stops once at least limit of them have been decoded.
+    """
+
+    chunks = db.execute(
+        filter_chunks(select(MeasurementChunk.first_timestamp, MeasurementChunk.timestamps, MeasurementChunk.voltages,
+                             MeasurementChunk.currents), experiment_id, from_timestamp, to_timestamp)
+        .execution_options(stream_results=True, yield_per=limit // MEASUREMENT_CHUNK_MAX_POINTS + 2)
+    )
+    parts = []
+
+    try:
+        for first_timestamp, *chunk in chunks:
+            if sum(int((part.timestamps < first_timestamp).sum()) for part in parts) >= limit:
+                break
+
+            parts.append(trim_columns(decode_chunk(*chunk), from_timestamp, to_timestamp))
+    finally:
+        chunks.close()
+
+    return merge_columns(parts)
+
+
+def filter_chunks(query: Select, experiment_id: int, from_timestamp: Optional[int], to_timestamp: Optional[int]) -> Select:
+    query = query.where(MeasurementChunk.experiment_id == experiment_id).order_by(MeasurementChunk.first_timestamp)
+
+    if from_timestamp is not None:
+        query = query.where(MeasurementChunk.last_timestamp >= from_timestamp)
+    if to_timestamp is not None:
+        query = query.where(MeasurementChunk.first_timestamp <= to_timestamp)
+
+    return query
+
+
+def trim_columns(columns: MeasurementColumns, from_timestamp: Optional[int],
+                 to_timestamp: Optional[int]) -> MeasurementColumns:
+    if from_timestamp is not None:
+        columns = take_columns(columns, columns.timestamps >= from_timestamp)
+    if to_timestamp is not None:
+        columns = take_columns(columns, columns.timestamps <= to_timestamp)
+
+    return columns
+
+
+def decode_chunk(timestamps: bytes, voltages: bytes, currents: bytes) -> MeasurementColumns:
+    return MeasurementColumns(
+        timestamps=np.frombuffer(timestamps, dtype=FIXED_POINT_DTYPE),
+        voltages=np.frombuffer(voltages, dtype=FIXED_POINT_DTYPE),
+        currents=np.frombuffer(currents, dtype=FIXED_POINT_DTYPE)
+    )
+
+
+def build_chunk(experiment_id: int, columns: MeasurementColumns) -> MeasurementChunk:
+    return MeasurementChunk(
+        first_timestamp=int(columns.timestamps[0]),
+        last_timestamp=int(columns.timestamps[-1]),
+        point_count=columns.size,
+        timestamps=columns.timestamps.astype(FIXED_POINT_DTYPE).tobytes(),
+        voltages=columns.voltages.astype(FIXED_POINT_DTYPE).tobytes(),
+        currents=columns.currents.astype(FIXED_POINT_DTYPE).tobytes(),
+        experiment_id=experiment_id
+    )
+
+
+def compact(db: Session, experiment_id: int) -> int:
+    """Pack an experiment's rows into chunks of at most MEASUREMENT_CHUNK_MAX_POINTS points and delete the rows.
+
+    Only rows read here are deleted, so points written while compaction runs stay behind as rows and are still
+    returned by read_columns.
+    """
+
+    query = select(Measurement.id, Measurement.timestamp, Measurement.voltage, Measurement.current) \
+        .where(Measurement.experiment_id == experiment_id) \
+        .order_by(Measurement.timestamp)
+
+    rows = db.execute(query).all()
+
+    if not rows:
+        return 0
+
+    max_id = max(row[0] for row in rows)
+    columns = drop_chunked_points(db, experiment_id, rows_to_columns((row[1:] for row in rows), FIXED_POINT_RECORD_DTYPE))
+
+    for start in range(0, columns.size, MEASUREMENT_CHUNK_MAX_POINTS):
+        db.add(build_chunk(experiment_id, slice_columns(columns, start, start + MEASUREMENT_CHUNK_MAX_POINTS)))
+
+    if not measurement_partitions.truncate_partition(db, experiment_id, max_id):
+        db.execute(delete(Measurement).where(Measurement.experiment_id == experiment_id, Measurement.id <= max_id))
+
+    db.commit()
+
+    return columns.size
+
+
+def drop_chunked_points(db: Session, experiment_id: int, columns: MeasurementColumns) -> MeasurementColumns:
+    chunked = read_chunk_columns(db, experiment_id, int(columns.timestamps[0]), int(columns.timestamps[-1]))
+
+    if not chunked.size:
+        return columns
+
+    return take_columns(columns, ~np.isin(columns.timestamps, chunked.timestamps))
@@ -0,0 +1,49 @@
+import asyncio
+from typing import Dict, List, Set
+
+
+class StreamSession:
+    """A streaming session of an experiment: completed is set to ask it to stop, finished resolves once its last
+    points are flushed"""
+
+    def __init__(self):
+        self.completed = asyncio.Event()
+        self.finished = asyncio.get_running_loop().create_future()
+
+
+_sessions: Dict[int, Set[StreamSession]] = {}
+
+
+def register(experiment_id: int) -> StreamSession:
+    """Track a streaming session so it can be closed once its experiment completes"""
+
+    session = StreamSession()
+    _sessions.setdefault(experiment_id, set()).add(session)
+
+    return session
+
+
+def unregister(experiment_id: int, session: StreamSession) -> None:
+    if not session.finished.done():
+        session.finished.set_result(None)
+
+    sessions = _sessions.get(experiment_id)
+
+    if sessions is None:
+        return
+
+    sessions.discard(session)
+
+    if not sessions:
+        del _sessions[experiment_id]
+
+
+def close_streams(experiment_id: int) -> List[asyncio.Future]:
+    """Ask the experiment's sessions to stop, returning futures that resolve once each has flushed its last points"""
+
+    sessions = _sessions.pop(experiment_id, set())
+
+    for session in sessions:
+        session.completed.set()
+
+    return [session.finished for session in sessions]
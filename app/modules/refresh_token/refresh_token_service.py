@@ -0,0 +1,70 @@
+"""Opaque, rotating refresh tokens that let device clients renew access tokens without re-sending their secret.
+
+Only a SHA-256 hash of each token is stored; tokens are random, so a fast hash is enough and the lookup by hash stays
+on an index. Every use rotates the token. A token presented after it was rotated means a copy is held by someone
+else, so all of the client's refresh tokens are revoked.
+"""
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm.session import Session
+
+from app.common.data.models import RefreshToken
+from app.common.domain.config import REFRESH_TOKEN_EXPIRE_IN_SECONDS, REFRESH_TOKEN_LENGTH
+from app.common.exceptions.app_exceptions import UnauthorizedRequestException
+from app.modules.auth import auth_service
+
+
+def issue_token(db: Session, client_id: int) -> str:
+    """Create a refresh token for the client and commit it with any pending rotation"""
+
+    now = datetime.utcnow()
+    token = secrets.token_urlsafe(REFRESH_TOKEN_LENGTH)
+
+    db.query(RefreshToken).filter(RefreshToken.client_id == client_id, RefreshToken.expires_on <= now).delete()
+    db.add(RefreshToken(
+        token_hash=hash_token(token),
+        client_id=client_id,
+        expires_on=now + timedelta(seconds=REFRESH_TOKEN_EXPIRE_IN_SECONDS)
+    ))
+    db.commit()
+
+    return token
+
+
+def use_token(db: Session, token: str) -> int:
+    """Mark a refresh token used, returning its client id; the caller commits along with the replacement token"""
+
+    now = datetime.utcnow()
+    refresh_token = db.query(RefreshToken).filter(RefreshToken.token_hash == hash_token(token)).first()
+
+    if not refresh_token:
+        raise UnauthorizedRequestException("Invalid refresh token")
+
+    if refresh_token.expires_on <= now:
+        raise UnauthorizedRequestException("Refresh token has expired")
+
+    rotated = db.query(RefreshToken).filter(RefreshToken.id == refresh_token.id, RefreshToken.used_on.is_(None)) \
+        .update({RefreshToken.used_on: now}, synchronize_session=False)
+
+    if not rotated:
+        revoke_client_tokens(db, refresh_token.client_id)
+        raise UnauthorizedRequestException("Refresh token has already been used")
+
+    return refresh_token.client_id
+
+
+def revoke_client_tokens(db: Session, client_id: int) -> int:
+    """Delete every refresh token of a client and drop its cached principals, returning how many were deleted"""
+
+    count = db.query(RefreshToken).filter(RefreshToken.client_id == client_id).delete()
+    db.commit()
+
+    auth_service.invalidate_client_principals(client_id)
+
+    return count
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
@@ -29,7 +29,7 @@ async def create_user(
         db: Session = Depends(get_db)
 ):
     """Create new user"""
-    return user_service.create_user(db, user_data)
+    return await user_service.create_user(db, user_data)
 
 
 @controller.get(
@@ -109,7 +109,7 @@ async def update_user(
         db: Session = Depends(get_db)
 ):
     """Update user"""
-    return user_service.update_user(db, id, request, user_data)
+    return await user_service.update_user(db, id, request, user_data)
 
 
 @controller.put(
@@ -1,4 +1,4 @@
-from app.common import utils
+from app.common.hashing import Credential
 from app.common.data.models import User
 from app.modules.user.user_dtos import UserResponse, UserCreateRequest
 
@@ -18,16 +18,15 @@ def user_to_user_response(user: User) -> UserResponse:
     return result
 
 
-def user_create_to_user(user_create: UserCreateRequest) -> User:
-    password_hash, password_salt = utils.generate_hash_and_salt(user_create.password)
-
+def user_create_to_user(user_create: UserCreateRequest, credential: Credential) -> User:
     result = User(
         username=user_create.username,
         email=user_create.email,
         first_name=user_create.first_name,
         last_name=user_create.last_name,
-        password_hash=password_hash,
-        password_salt=password_salt
+        password_hash=credential.hash,
+        password_salt=credential.salt,
+        password_hash_parameters=credential.parameters
     )
 
     return result
@@ -1,9 +1,12 @@
+from typing import Optional
+
 from fastapi import Request
 from pydantic import EmailStr
 from sqlalchemy.orm import Query
 from sqlalchemy.orm.session import Session
 
-from app.common import utils
+from app.common import hashing
+from app.common.auth.principal import Principal
 from app.common.data.models import User
 from app.common.exceptions.app_exceptions import BadRequestException, ForbiddenException, NotFoundException
 from app.common.pagination import paginate, page_to_page_response, PageResponse
@@ -13,9 +16,12 @@ from app.modules.user.user_mappings import user_create_to_user, user_to_user_res
 from app.modules.user.user_queries import SearchUsersQuery
 
 
-def create_user(db: Session, user_data: UserCreateRequest) -> UserResponse:
-    user = user_create_to_user(user_data)
+async def create_user(db: Session, user_data: UserCreateRequest) -> UserResponse:
+    credential = await hashing.hash_secret(user_data.password)
+    return save_user(db, user_create_to_user(user_data, credential))
+
 
+def save_user(db: Session, user: User) -> UserResponse:
     db.add(user)
     db.commit()
     db.refresh(user)
@@ -31,7 +37,8 @@ def seed_user(db: Session, username: str, first_name: str, last_name: str, passw
         password=password
     )
 
-    admin_user = create_user(db, payload)
+    # Seeding runs while the application is imported, outside the event loop, so it hashes on this thread
+    admin_user = save_user(db, user_create_to_user(payload, hashing.create_credential(password)))
     return admin_user
 
 
@@ -43,6 +50,8 @@ def set_super_admin(db: Session, id: int):
     db.commit()
     db.refresh(user)
 
+    auth_service.invalidate_user_principals(user.id)
+
     return user_to_user_response(user)
 
 
@@ -63,16 +72,16 @@ def change_admin_status(db: Session, id: int, user_admin_status: UserAdminStatus
     db.commit()
     db.refresh(user)
 
+    auth_service.invalidate_user_principals(user.id)
+
     response = user_to_user_response(user)
 
     return response
 
 
-def update_user(db: Session, id: int, request: Request, user_data: UserUpdateRequest) -> UserResponse:
+async def update_user(db: Session, id: int, request: Request, user_data: UserUpdateRequest) -> UserResponse:
     logged_in_user = get_logged_in_user(db, request)
 
-    password_hash, password_salt = utils.generate_hash_and_salt(user_data.password)
-
     user = get_user_by_id(db, id)
 
     if user.is_staff:
@@ -86,17 +95,22 @@ def update_user(db: Session, id: int, request: Request, user_data: UserUpdateReq
     if get_user_by_username(db, user_data_username) and user.username != user_data_username:
         raise BadRequestException(f"Cannot update username. User with username: '{user_data_username}' already exists")
 
+    credential = await hashing.hash_secret(user_data.password)
+
     user.username = user_data_username
     user.email = user_data.email
     user.first_name = user_data.first_name
     user.middle_name = user_data.middle_name
     user.last_name = user_data.last_name
-    user.password_hash = password_hash
-    user.password_salt = password_salt
+    user.password_hash = credential.hash
+    user.password_salt = credential.salt
+    user.password_hash_parameters = credential.parameters
 
     db.commit()
     db.refresh(user)
 
+    auth_service.invalidate_user_principals(user.id)
+
     return user_to_user_response(user)
 
 
@@ -146,22 +160,22 @@ def get_current_user_details(db: Session, request: Request) -> UserResponse:
     return user_to_user_response(user)
 
 
-def get_logged_in_user(db: Session, request: Request) -> User:
-    try:
-        return get_current_user(db, request)
-    except NotFoundException:
+def get_logged_in_user(db: Session, request: Request) -> Principal:
+    principal = auth_service.get_request_principal(db, request)
+
+    if not principal or not principal.is_user:
         raise ForbiddenException()
 
+    return principal
+
 
 def get_current_user(db: Session, request: Request) -> User:
-    username = get_username_from_token(db, request)
-    return get_user_by_username(db, username)
+    return get_user_by_id(db, get_logged_in_user(db, request).id)
 
 
-def get_username_from_token(db: Session, request: Request) -> EmailStr:
-    token = request.headers.get("Authorization").split(" ")[1]
-    payload = auth_service.decode_jwt(db, token)
-    return payload.get("sub")
+def get_username_from_token(db: Session, request: Request) -> Optional[EmailStr]:
+    principal = auth_service.get_request_principal(db, request)
+    return principal.username if principal else None
 
 
 def get_user_by_username(db: Session, username: str) -> User: